@@ -0,0 +1,430 @@
+import argparse
+import glob
+import hashlib
+import json
+import os
+import sys
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+import numpy as np
+import cv2
+from camera_feature import keypoint_store
+
+# Headless batch analysis of the recording archive.
+#
+# Recordings matched by the globs (default: every .svo2 in captured_videos/, every .avi and .events
+# recording in captured_davis_video/) are spread over a spawn process pool, one recording per task.
+# Each produces <output-dir>/<recording name>.<hash>.stats.npz, where the hash is taken from the
+# recording's absolute directory, so same-named recordings in different session folders (the DAVIS
+# recorder always writes recording.avi) get their own output:
+#   .svo2    per frame: timestamp, share of valid depth, depth percentiles (5/50/95) and mean
+#            confidence; a confidence histogram over the recording; keypoint tracks (frame, body id,
+#            confidence, keypoint_2d, 3D keypoints) of every tracked body. The full body data also goes
+#            to the SVO's keypoint_store (<name>.bodies/) unless a complete one exists.
+#   .avi     per frame: timestamp, mean and standard deviation of the intensity, mean absolute
+#            difference to the previous frame
+#   .events  event and ON-polarity counts per EVENT_BIN_US bin, and an event count per pixel
+#
+# batch_progress.json in the output directory records every finished recording with the size and
+# mtime it had; a rerun skips those, so an interrupted job resumes with the remaining recordings.
+# Failed recordings are retried on the next run. With --memory-mb every worker process gets a cap
+# (address space on POSIX, committed memory through a job object on Windows); a recording that
+# hits it fails with MemoryError without taking the whole batch down.
+
+CHECKPOINT_NAME = "batch_progress.json"
+CHECKPOINT_VERSION = 1
+OUTPUT_SUFFIX = ".stats.npz"
+CONFIDENCE_BINS = 101  # MEASURE.CONFIDENCE is 0..100
+DEPTH_PERCENTILES = (5, 50, 95)
+DEPTH_SAMPLE_STEP = 4  # Depth and confidence statistics use every 4th pixel in each direction
+EVENT_BIN_US = 10000
+MAX_GRAB_FAILURES = 100  # Consecutive grab errors before a damaged SVO is given up
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+DEFAULT_PATTERNS = (
+    os.path.join(ROOT, 'captured_videos', '*.svo2'),
+    os.path.join(ROOT, 'captured_davis_video', '*.avi'),
+    os.path.join(ROOT, 'captured_davis_video', '*.events'),
+)
+
+
+# --- Worker set-up ---
+
+def limit_memory(limit_mb):
+    # Caps the calling process; returns False where no mechanism is available
+    limit = int(limit_mb) * 1024 * 1024
+    if sys.platform == "win32":
+        import ctypes
+        from ctypes import wintypes
+
+        class IO_COUNTERS(ctypes.Structure):
+            _fields_ = [(name, ctypes.c_ulonglong) for name in (
+                "ReadOperationCount", "WriteOperationCount", "OtherOperationCount",
+                "ReadTransferCount", "WriteTransferCount", "OtherTransferCount")]
+
+        class JOBOBJECT_BASIC_LIMIT_INFORMATION(ctypes.Structure):
+            _fields_ = [("PerProcessUserTimeLimit", ctypes.c_int64), ("PerJobUserTimeLimit", ctypes.c_int64),
+                        ("LimitFlags", wintypes.DWORD), ("MinimumWorkingSetSize", ctypes.c_size_t),
+                        ("MaximumWorkingSetSize", ctypes.c_size_t), ("ActiveProcessLimit", wintypes.DWORD),
+                        ("Affinity", ctypes.c_size_t), ("PriorityClass", wintypes.DWORD),
+                        ("SchedulingClass", wintypes.DWORD)]
+
+        class JOBOBJECT_EXTENDED_LIMIT_INFORMATION(ctypes.Structure):
+            _fields_ = [("BasicLimitInformation", JOBOBJECT_BASIC_LIMIT_INFORMATION), ("IoInfo", IO_COUNTERS),
+                        ("ProcessMemoryLimit", ctypes.c_size_t), ("JobMemoryLimit", ctypes.c_size_t),
+                        ("PeakProcessMemoryUsed", ctypes.c_size_t), ("PeakJobMemoryUsed", ctypes.c_size_t)]
+
+        JOB_OBJECT_LIMIT_PROCESS_MEMORY = 0x100
+        JOB_OBJECT_EXTENDED_LIMIT_INFORMATION_CLASS = 9
+        kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+        kernel32.CreateJobObjectW.restype = wintypes.HANDLE
+        kernel32.GetCurrentProcess.restype = wintypes.HANDLE
+        job = kernel32.CreateJobObjectW(None, None)
+        info = JOBOBJECT_EXTENDED_LIMIT_INFORMATION()
+        info.BasicLimitInformation.LimitFlags = JOB_OBJECT_LIMIT_PROCESS_MEMORY
+        info.ProcessMemoryLimit = limit
+        if not job or not kernel32.SetInformationJobObject(job, JOB_OBJECT_EXTENDED_LIMIT_INFORMATION_CLASS,
+                                                           ctypes.byref(info), ctypes.sizeof(info)):
+            return False
+        return bool(kernel32.AssignProcessToJobObject(job, kernel32.GetCurrentProcess()))
+    try:
+        import resource
+    except ImportError:
+        return False
+    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    return True
+
+
+def _init_worker(memory_mb, synthetic):
+    if synthetic:
+        # The synthetic SDK stand-ins, so the batch can run (and be tested) without cameras or SDKs
+        from camera_feature import headless_runner
+        synthetic_zed, _ = headless_runner.install_sdk_stand_ins()
+        synthetic_zed.configure(**synthetic)
+    if memory_mb and not limit_memory(memory_mb):
+        print(f"Worker {os.getpid()}: memory cap not supported here, running without it")
+
+
+# --- Per-recording analysis (runs in the workers) ---
+
+def _save_output(output_path, arrays):
+    # Written to a temporary file and renamed so a half-written result is never picked up
+    with open(output_path + ".tmp", "wb") as f:
+        np.savez(f, **arrays)
+    os.replace(output_path + ".tmp", output_path)
+
+
+def analyze_svo(path, output_path, depth_mode="NEURAL", bodies=True):
+    import pyzed.sl as sl
+
+    input_type = sl.InputType()
+    input_type.set_from_svo_file(path)
+    init = sl.InitParameters(input_t=input_type)
+    init.depth_mode = sl.DEPTH_MODE[depth_mode]
+    init.coordinate_units = sl.UNIT.MILLIMETER
+    init.svo_real_time_mode = False
+
+    zed = sl.Camera()
+    err = zed.open(init)
+    if err != sl.ERROR_CODE.SUCCESS:
+        raise RuntimeError(f"Failed to open {path}: {err!r}")
+
+    body_runtime_params = None
+    if bodies:
+        zed.enable_positional_tracking(sl.PositionalTrackingParameters())
+        body_tracking_params = sl.BodyTrackingParameters()
+        body_tracking_params.detection_model = sl.BODY_TRACKING_MODEL.HUMAN_BODY_ACCURATE
+        body_tracking_params.enable_tracking = True
+        body_tracking_params.enable_body_fitting = True
+        body_tracking_params.body_format = sl.BODY_FORMAT.BODY_34
+        if zed.enable_body_tracking(body_tracking_params) != sl.ERROR_CODE.SUCCESS:
+            zed.close()
+            raise RuntimeError(f"Failed to enable body tracking for {path}")
+        body_runtime_params = sl.BodyTrackingRuntimeParameters()
+        body_runtime_params.detection_confidence_threshold = 40
+
+    runtime_params = sl.RuntimeParameters()
+    depth = sl.Mat()
+    confidence = sl.Mat()
+    body_data = sl.Bodies()
+    # Full keypoint data goes to the SVO's columnar store once, so later analytics skip body tracking
+    keypoint_writer = keypoint_store.writer_for(path) if body_runtime_params is not None else None
+
+    timestamps, valid_fraction, percentiles, confidence_mean = [], [], [], []
+    histogram = np.zeros(CONFIDENCE_BINS, np.int64)
+    track_frame, track_id, track_confidence, track_keypoints_2d, track_keypoints = [], [], [], [], []
+    step = DEPTH_SAMPLE_STEP
+    failures = 0
+    try:
+        while True:
+            err = zed.grab(runtime_params)
+            if err == sl.ERROR_CODE.END_OF_SVOFILE_REACHED:
+                break
+            if err != sl.ERROR_CODE.SUCCESS:
+                failures += 1
+                if failures >= MAX_GRAB_FAILURES:
+                    raise RuntimeError(f"{path}: {failures} grabs failed in a row, last {err!r}")
+                continue
+            failures = 0
+            frame = len(timestamps)
+            timestamps.append(zed.get_timestamp(sl.TIME_REFERENCE.IMAGE).get_nanoseconds())
+
+            zed.retrieve_measure(depth, sl.MEASURE.DEPTH)
+            sample = depth.get_data()[::step, ::step]
+            valid = sample[np.isfinite(sample) & (sample > 0)]
+            valid_fraction.append(valid.size / sample.size)
+            percentiles.append(np.percentile(valid, DEPTH_PERCENTILES) if valid.size else (np.nan,) * len(DEPTH_PERCENTILES))
+
+            zed.retrieve_measure(confidence, sl.MEASURE.CONFIDENCE)
+            levels = np.nan_to_num(confidence.get_data()[::step, ::step], nan=0.0)
+            histogram += np.bincount(np.clip(levels, 0, CONFIDENCE_BINS - 1).astype(np.intp).ravel(),
+                                     minlength=CONFIDENCE_BINS)
+            confidence_mean.append(float(levels.mean()))
+
+            if body_runtime_params is not None:
+                zed.retrieve_bodies(body_data, body_runtime_params)
+                if keypoint_writer is not None:
+                    keypoint_writer.append(timestamps[-1], body_data)
+                for body in body_data.body_list:
+                    if body.tracking_state != sl.OBJECT_TRACKING_STATE.OK:
+                        continue
+                    track_frame.append(frame)
+                    track_id.append(body.id)
+                    track_confidence.append(body.confidence)
+                    track_keypoints_2d.append(body.keypoint_2d)
+                    track_keypoints.append(body.keypoint)
+        if keypoint_writer is not None:
+            keypoint_writer.close(complete=keypoint_writer.frames_written >= zed.get_svo_number_of_frames())
+            keypoint_writer = None
+    finally:
+        if keypoint_writer is not None:
+            keypoint_writer.close()
+        zed.close()
+
+    _save_output(output_path, {
+        "timestamps_ns": np.asarray(timestamps, np.int64),
+        "depth_valid_fraction": np.asarray(valid_fraction, np.float32),
+        "depth_percentiles_mm": np.asarray(percentiles, np.float32).reshape(-1, len(DEPTH_PERCENTILES)),
+        "confidence_mean": np.asarray(confidence_mean, np.float32),
+        "confidence_histogram": histogram,
+        "track_frame": np.asarray(track_frame, np.int64),
+        "track_id": np.asarray(track_id, np.int64),
+        "track_confidence": np.asarray(track_confidence, np.float32),
+        "track_keypoints_2d": np.asarray(track_keypoints_2d, np.float32).reshape(-1, 34, 2),
+        "track_keypoints": np.asarray(track_keypoints, np.float32).reshape(-1, 34, 3),
+    })
+    return {"frames": len(timestamps), "bodies": len(track_frame)}
+
+
+def analyze_avi(path, output_path):
+    from camera_feature import frame_index
+
+    index = frame_index.load(path)
+    capture = cv2.VideoCapture(path)
+    if not capture.isOpened():
+        raise RuntimeError(f"Failed to open {path}")
+    means, stds, motion = [], [], []
+    previous = None
+    while True:
+        ok, frame = capture.read()
+        if not ok:
+            break
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        mean, std = cv2.meanStdDev(gray)
+        means.append(mean[0, 0])
+        stds.append(std[0, 0])
+        motion.append(cv2.norm(gray, previous, cv2.NORM_L1) / gray.size if previous is not None else 0.0)
+        previous = gray
+    capture.release()
+
+    frames = len(means)
+    _save_output(output_path, {
+        "timestamps_ns": np.asarray(index.timestamps[:frames], np.int64),
+        "intensity_mean": np.asarray(means, np.float32),
+        "intensity_std": np.asarray(stds, np.float32),
+        "frame_difference": np.asarray(motion, np.float32),
+    })
+    return {"frames": frames}
+
+
+def analyze_events(path, output_path):
+    from camera_feature import event_recording
+
+    reader = event_recording.EventRecordingReader(path)
+    width, height = reader.resolution
+    time_range = reader.time_range()
+    start = time_range[0] if time_range else 0
+    bins = (time_range[1] - start) // EVENT_BIN_US + 1 if time_range else 0
+    counts = np.zeros(bins, np.int64)
+    on_counts = np.zeros(bins, np.int64)
+    pixel_counts = np.zeros(height * width, np.int64)
+    # Chunk by chunk through the memory map, so memory stays at one chunk whatever the length
+    for chunk in reader.iter_chunks():
+        bin_index = (chunk["t"] - start) // EVENT_BIN_US
+        counts += np.bincount(bin_index, minlength=bins)
+        on_counts += np.bincount(bin_index, weights=chunk["p"], minlength=bins).astype(np.int64)
+        pixel_counts += np.bincount(chunk["y"].astype(np.intp) * width + chunk["x"], minlength=height * width)
+
+    _save_output(output_path, {
+        "bin_start_us": start + np.arange(bins, dtype=np.int64) * EVENT_BIN_US,
+        "event_count": counts,
+        "on_count": on_counts,
+        "pixel_count": pixel_counts.reshape(height, width),
+        "frame_times_us": reader.frame_timestamps(),
+    })
+    return {"frames": len(reader.frame_timestamps()), "events": len(reader)}
+
+
+def process_recording(path, output_path, options):
+    start = time.perf_counter()
+    if path.lower().endswith(".svo2"):
+        result = analyze_svo(path, output_path, options["depth_mode"], options["bodies"])
+    elif path.lower().endswith(".avi"):
+        result = analyze_avi(path, output_path)
+    else:
+        result = analyze_events(path, output_path)
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+
+# --- Checkpoint ---
+
+def source_stat(path):
+    # A directory recording (.events) changes through its chunk index
+    stat = os.stat(os.path.join(path, "index.bin") if os.path.isdir(path) else path)
+    return {"source_size": stat.st_size, "source_mtime_ns": stat.st_mtime_ns}
+
+
+def load_checkpoint(path):
+    if not os.path.isfile(path):
+        return {"version": CHECKPOINT_VERSION, "recordings": {}}
+    with open(path) as f:
+        checkpoint = json.load(f)
+    if checkpoint.get("version") != CHECKPOINT_VERSION:
+        return {"version": CHECKPOINT_VERSION, "recordings": {}}
+    return checkpoint
+
+
+def save_checkpoint(path, checkpoint):
+    with open(path + ".tmp", "w") as f:
+        json.dump(checkpoint, f, indent=1)
+    os.replace(path + ".tmp", path)
+
+
+def is_done(checkpoint, path, output_path):
+    entry = checkpoint["recordings"].get(os.path.abspath(path))
+    return (entry is not None and entry.get("error") is None and os.path.isfile(output_path)
+            and all(entry.get(key) == value for key, value in source_stat(path).items()))
+
+
+def output_path_for(output_dir, path):
+    path = os.path.abspath(path)
+    directory_hash = hashlib.sha1(os.path.normcase(os.path.dirname(path)).encode("utf-8")).hexdigest()[:8]
+    return os.path.join(output_dir, f"{os.path.basename(path)}.{directory_hash}{OUTPUT_SUFFIX}")
+
+
+def output_collisions(output_dir, recordings):
+    # Groups of recordings that would write the same output file
+    by_output = {}
+    for path in recordings:
+        by_output.setdefault(os.path.normcase(output_path_for(output_dir, path)), []).append(path)
+    return [paths for paths in by_output.values() if len(paths) > 1]
+
+
+# --- Batch ---
+
+def find_recordings(patterns):
+    recordings = []
+    seen = set()
+    for pattern in patterns:
+        for path in sorted(glob.glob(pattern)):
+            # The same recording reached through two globs (or two spellings of its path) runs once
+            key = os.path.normcase(os.path.abspath(path))
+            if path.lower().endswith((".svo2", ".avi", ".events")) and key not in seen:
+                seen.add(key)
+                recordings.append(path)
+    return recordings
+
+
+def run_batch(recordings, output_dir, workers=2, memory_mb=None, options=None, synthetic=None):
+    # Returns the number of recordings that failed
+    options = options or {"depth_mode": "NEURAL", "bodies": True}
+    collisions = output_collisions(output_dir, recordings)
+    if collisions:
+        for paths in collisions:
+            print(f"Recordings would share the output {output_path_for(output_dir, paths[0])}: {', '.join(paths)}")
+        return sum(len(paths) for paths in collisions)
+    os.makedirs(output_dir, exist_ok=True)
+    checkpoint_path = os.path.join(output_dir, CHECKPOINT_NAME)
+    checkpoint = load_checkpoint(checkpoint_path)
+
+    pending = [path for path in recordings if not is_done(checkpoint, path, output_path_for(output_dir, path))]
+    print(f"{len(recordings)} recordings, {len(recordings) - len(pending)} already done, {len(pending)} to process "
+          f"with {workers} workers" + (f", {memory_mb} MB each" if memory_mb else ""))
+    if not pending:
+        return 0
+
+    start_time = time.perf_counter()
+    done = failed = frames = 0
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker,
+                             initargs=(memory_mb, synthetic)) as pool:
+        futures = {pool.submit(process_recording, path, output_path_for(output_dir, path), options): path
+                   for path in pending}
+        for future in as_completed(futures):
+            path = futures[future]
+            entry = dict(source_stat(path), output=output_path_for(output_dir, path))
+            try:
+                result = future.result()
+            except BrokenProcessPool:
+                print(f"A worker died while processing {path}; finished recordings are checkpointed, rerun to resume.")
+                failed += len(pending) - done - failed
+                break
+            except Exception as exc:  # MemoryError from the cap included
+                entry["error"] = repr(exc)
+                failed += 1
+                print(f"[{done + failed}/{len(pending)}] {path} failed: {exc!r}")
+            else:
+                entry.update(result)
+                done += 1
+                frames += result["frames"]
+                print(f"[{done + failed}/{len(pending)}] {path}: {result['frames']} frames in "
+                      f"{result['seconds']:.1f} s ({result['frames'] / max(result['seconds'], 1e-9):.1f} fps)")
+            checkpoint["recordings"][os.path.abspath(path)] = entry
+            save_checkpoint(checkpoint_path, checkpoint)
+
+    elapsed = time.perf_counter() - start_time
+    print(f"Processed {done} recordings ({failed} failed), {frames} frames in {elapsed:.1f} s: "
+          f"{done / elapsed:.2f} recordings/s, {frames / elapsed:.1f} frames/s")
+    return failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analyze recordings headless in parallel, resumable")
+    parser.add_argument("patterns", nargs="*", help="Recording globs (default: captured_videos/*.svo2, "
+                                                    "captured_davis_video/*.avi and *.events)")
+    parser.add_argument("--output-dir", default=os.path.join(ROOT, 'batch_output'), help="Results and checkpoint")
+    parser.add_argument("--workers", type=int, default=2,
+                        help="Worker processes; every SVO worker loads its own depth model on the GPU (default: 2)")
+    parser.add_argument("--memory-mb", type=int,
+                        help="Memory cap per worker process (address space on POSIX, leave room for GPU mappings)")
+    parser.add_argument("--depth-mode", default="NEURAL", help="sl.DEPTH_MODE for SVO recordings")
+    parser.add_argument("--no-bodies", action="store_true", help="Skip body tracking (no keypoint tracks)")
+    parser.add_argument("--synthetic-frames", type=int,
+                        help="Use the synthetic ZED stand-in with this many frames per SVO (testing without the SDK)")
+    args = parser.parse_args(argv)
+
+    recordings = find_recordings(args.patterns or DEFAULT_PATTERNS)
+    if not recordings:
+        print("No recordings found.")
+        sys.exit(1)
+    synthetic = {"svo_frames": args.synthetic_frames} if args.synthetic_frames else None
+    options = {"depth_mode": args.depth_mode, "bodies": not args.no_bodies}
+    failed = run_batch(recordings, args.output_dir, args.workers, args.memory_mb, options, synthetic)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
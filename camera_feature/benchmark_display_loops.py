@@ -0,0 +1,304 @@
+import argparse
+import json
+import platform
+import sys
+import time
+import numpy as np
+import cv2
+from camera_feature import frame_processing
+from camera_feature import depth_colorizer
+
+# Per-stage benchmark of the ZED display loops, without any windows.
+#
+# Each loop's per-frame processing (the same frame_processing stages the run() loops use) is
+# driven from a synthetic camera (default) or a recorded SVO, and every stage is timed separately.
+# Results are written as JSON and can be compared against a stored baseline:
+#
+#   python -m camera_feature.benchmark_display_loops --output bench.json
+#   python -m camera_feature.benchmark_display_loops --baseline bench.json
+#   python -m camera_feature.benchmark_display_loops --svo captured_videos/x.svo2 --loops display_depth_video
+
+RESOLUTIONS = {
+    "VGA": (672, 376),
+    "HD720": (1280, 720),
+    "HD1080": (1920, 1080),
+    "HD2K": (2208, 1242),
+}
+
+PERCENTILES = (50, 95, 99)
+
+
+class StageTimer:
+    def __init__(self):
+        self.samples = {}
+        self.frame_totals = []
+        self.last = 0
+        self.frame_start = 0
+
+    def start_frame(self):
+        self.frame_start = self.last = time.perf_counter_ns()
+
+    def lap(self, stage):
+        # Time since the previous lap is charged to `stage`; stages may repeat within a frame
+        now = time.perf_counter_ns()
+        frame_samples = self.samples.setdefault(stage, {})
+        frame_samples[len(self.frame_totals)] = frame_samples.get(len(self.frame_totals), 0) + now - self.last
+        self.last = now
+
+    def end_frame(self):
+        self.frame_totals.append(self.last - self.frame_start)
+
+    def discard(self):
+        self.samples = {}
+        self.frame_totals = []
+
+
+def summarize(samples_ns):
+    samples_ms = np.asarray(samples_ns, dtype=np.float64) / 1e6
+    summary = {"mean_ms": float(samples_ms.mean())}
+    for p, value in zip(PERCENTILES, np.percentile(samples_ms, PERCENTILES)):
+        summary[f"p{p}_ms"] = float(value)
+    return summary
+
+
+def to_display(image):
+    # What imshow does before drawing: convert to 8-bit BGR
+    if image.ndim == 2:
+        return cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+    if image.shape[2] == 4:
+        return cv2.cvtColor(image, cv2.COLOR_BGRA2BGR)
+    return image
+
+
+# --- Per-frame processing of each loop, stage by stage ---
+
+def frame_depth_video(sl, zed, ctx, timer):
+    zed.retrieve_measure(ctx["depth"], sl.MEASURE.DEPTH, sl.MEM.CPU, ctx["size"])
+    timer.lap("retrieve")
+    depth_ocv = ctx["colorizer"].colorize(ctx["depth"].get_data())
+    timer.lap("colorize")
+    to_display(depth_ocv)
+    timer.lap("display")
+
+
+def frame_confidence_map(sl, zed, ctx, timer):
+    zed.retrieve_measure(ctx["confidence"], sl.MEASURE.CONFIDENCE, sl.MEM.CPU, ctx["size"])
+    timer.lap("retrieve")
+    normalized_confidence = frame_processing.normalize_confidence(ctx["confidence"].get_data())
+    timer.lap("normalize")
+    colored_map = frame_processing.colorize_confidence(normalized_confidence)
+    timer.lap("colormap")
+    to_display(colored_map)
+    timer.lap("display")
+
+
+def frame_body_tracking(sl, zed, ctx, timer):
+    zed.retrieve_image(ctx["image"], sl.VIEW.LEFT, sl.MEM.CPU, ctx["size"])
+    zed.retrieve_bodies(ctx["bodies"], ctx["body_runtime"])
+    timer.lap("retrieve")
+    img_np = frame_processing.draw_body_keypoints(ctx["image"].get_data(), ctx["bodies"], sl.OBJECT_TRACKING_STATE.OK)
+    timer.lap("keypoints")
+    to_display(img_np)
+    timer.lap("display")
+
+
+def frame_all_features(sl, zed, ctx, timer):
+    zed.retrieve_image(ctx["image"], sl.VIEW.LEFT, sl.MEM.CPU, ctx["size"])
+    zed.retrieve_measure(ctx["depth"], sl.MEASURE.DEPTH, sl.MEM.CPU, ctx["size"])
+    zed.retrieve_measure(ctx["confidence"], sl.MEASURE.CONFIDENCE, sl.MEM.CPU, ctx["size"])
+    zed.retrieve_bodies(ctx["bodies"], ctx["body_runtime"])
+    timer.lap("retrieve")
+    image_ocv = ctx["image"].get_data()
+    depth_ocv = ctx["colorizer"].colorize(ctx["depth"].get_data())
+    timer.lap("colorize")
+    normalized_confidence = frame_processing.normalize_confidence(ctx["confidence"].get_data())
+    timer.lap("normalize")
+    colored_map = frame_processing.colorize_confidence(normalized_confidence)
+    timer.lap("colormap")
+    image_with_keypoints = frame_processing.draw_body_keypoints(image_ocv.copy(), ctx["bodies"], sl.OBJECT_TRACKING_STATE.OK)
+    timer.lap("keypoints")
+    for image in (image_ocv, depth_ocv, colored_map, image_with_keypoints):
+        to_display(image)
+    timer.lap("display")
+
+
+LOOPS = {
+    "display_depth_video": (frame_depth_video, False),
+    "display_confidence_map": (frame_confidence_map, False),
+    "display_body_tracking": (frame_body_tracking, True),
+    "display_all_features": (frame_all_features, True),
+}
+
+
+def open_camera(sl, resolution_name, svo_path, body_tracking):
+    init = sl.InitParameters()
+    if svo_path:
+        input_type = sl.InputType()
+        input_type.set_from_svo_file(svo_path)
+        init = sl.InitParameters(input_t=input_type)
+    init.camera_resolution = getattr(sl.RESOLUTION, resolution_name)
+    init.depth_mode = sl.DEPTH_MODE.NEURAL
+    init.coordinate_units = sl.UNIT.MILLIMETER
+
+    zed = sl.Camera()
+    if zed.open(init) != sl.ERROR_CODE.SUCCESS:
+        return None
+
+    if body_tracking:
+        zed.enable_positional_tracking(sl.PositionalTrackingParameters())
+        body_tracking_params = sl.BodyTrackingParameters()
+        body_tracking_params.detection_model = sl.BODY_TRACKING_MODEL.HUMAN_BODY_ACCURATE
+        body_tracking_params.enable_tracking = True
+        body_tracking_params.enable_body_fitting = True
+        body_tracking_params.body_format = sl.BODY_FORMAT.BODY_34
+        if zed.enable_body_tracking(body_tracking_params) != sl.ERROR_CODE.SUCCESS:
+            zed.close()
+            return None
+    return zed
+
+
+def benchmark_loop(sl, loop_name, resolution_name, frames, warmup, svo_path=None):
+    frame_fn, body_tracking = LOOPS[loop_name]
+    zed = open_camera(sl, resolution_name, svo_path, body_tracking)
+    if zed is None:
+        print(f"Failed to open camera for {loop_name} at {resolution_name}")
+        return None
+
+    body_runtime = sl.BodyTrackingRuntimeParameters()
+    body_runtime.detection_confidence_threshold = 40
+    ctx = {
+        "size": sl.Resolution(*RESOLUTIONS[resolution_name]),
+        "image": sl.Mat(),
+        "depth": sl.Mat(),
+        "colorizer": depth_colorizer.DepthColorizer(),
+        "confidence": sl.Mat(),
+        "bodies": sl.Bodies(),
+        "body_runtime": body_runtime,
+    }
+    runtime = sl.RuntimeParameters()
+    timer = StageTimer()
+
+    done = 0
+    while done < warmup + frames:
+        if done == warmup:
+            timer.discard()
+        timer.start_frame()
+        err = zed.grab(runtime)
+        if err == sl.ERROR_CODE.END_OF_SVOFILE_REACHED:
+            zed.set_svo_position(0)
+            continue
+        if err != sl.ERROR_CODE.SUCCESS:
+            print(f"Grab failed: {err}")
+            break
+        timer.lap("grab")
+        frame_fn(sl, zed, ctx, timer)
+        timer.end_frame()
+        done += 1
+    zed.close()
+
+    if not timer.frame_totals:
+        return None
+    total = summarize(timer.frame_totals)
+    return {
+        "frames": len(timer.frame_totals),
+        "fps": 1000.0 / total["mean_ms"] if total["mean_ms"] else 0.0,
+        "total": total,
+        "stages": {stage: summarize(list(per_frame.values())) for stage, per_frame in timer.samples.items()},
+    }
+
+
+def run_suite(sl, loops, resolutions, frames, warmup, svo_path=None):
+    results = {}
+    for loop_name in loops:
+        results[loop_name] = {}
+        for resolution_name in resolutions:
+            print(f"Benchmarking {loop_name} @ {resolution_name}...")
+            result = benchmark_loop(sl, loop_name, resolution_name, frames, warmup, svo_path)
+            if result is not None:
+                results[loop_name][resolution_name] = result
+    return results
+
+
+def compare(results, baseline, tolerance):
+    # Returns a list of regressions: lower fps or higher per-stage p95 than the baseline allows
+    regressions = []
+    for loop_name, by_resolution in results.items():
+        for resolution_name, current in by_resolution.items():
+            reference = baseline.get("results", {}).get(loop_name, {}).get(resolution_name)
+            if reference is None:
+                continue
+            if current["fps"] < reference["fps"] * (1.0 - tolerance):
+                regressions.append(f"{loop_name} @ {resolution_name}: fps {current['fps']:.1f} < baseline {reference['fps']:.1f}")
+            for stage, summary in current["stages"].items():
+                reference_stage = reference["stages"].get(stage)
+                if reference_stage and summary["p95_ms"] > reference_stage["p95_ms"] * (1.0 + tolerance):
+                    regressions.append(f"{loop_name} @ {resolution_name}: {stage} p95 {summary['p95_ms']:.2f} ms "
+                                       f"> baseline {reference_stage['p95_ms']:.2f} ms")
+    return regressions
+
+
+def print_summary(results):
+    for loop_name, by_resolution in results.items():
+        for resolution_name, result in by_resolution.items():
+            stages = ", ".join(f"{stage} {s['p50_ms']:.2f}/{s['p95_ms']:.2f}/{s['p99_ms']:.2f}"
+                               for stage, s in result["stages"].items())
+            print(f"{loop_name:24s} {resolution_name:7s} {result['fps']:8.1f} fps  [p50/p95/p99 ms] {stages}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Per-stage benchmark of the ZED display loops")
+    parser.add_argument("--loops", nargs="+", choices=list(LOOPS), default=list(LOOPS))
+    parser.add_argument("--resolutions", nargs="+", choices=list(RESOLUTIONS), default=list(RESOLUTIONS))
+    parser.add_argument("--frames", type=int, default=200, help="Measured frames per loop and resolution")
+    parser.add_argument("--warmup", type=int, default=10, help="Frames discarded before measuring")
+    parser.add_argument("--svo", help="Recorded SVO to drive the loops with the real ZED SDK")
+    parser.add_argument("--bodies", type=int, default=2, help="Bodies per frame for the synthetic source")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parser.add_argument("--baseline", help="JSON results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Allowed relative slowdown vs baseline")
+    args = parser.parse_args(argv)
+
+    if args.svo:
+        import pyzed.sl as sl
+        source = args.svo
+    else:
+        from camera_feature import headless_runner
+        sl, _ = headless_runner.install_sdk_stand_ins()
+        sl.configure(num_bodies=args.bodies, svo_frames=max(args.frames + args.warmup, 300))
+        source = "synthetic"
+
+    results = run_suite(sl, args.loops, args.resolutions, args.frames, args.warmup, args.svo)
+    report = {
+        "meta": {
+            "source": source,
+            "frames": args.frames,
+            "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "machine": platform.machine(),
+            "processor": platform.processor(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "opencv": cv2.__version__,
+        },
+        "results": results,
+    }
+
+    print_summary(results)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results saved to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) vs {args.baseline}:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print(f"\nNo regressions vs {args.baseline} (tolerance {args.tolerance:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,42 +1,56 @@
 import pyzed.sl as sl
 
-def run():
-    zed = sl.Camera()
-    init_params = sl.InitParameters()
-    init_params.sdk_verbose = 0
-
-    if zed.open(init_params) != sl.ERROR_CODE.SUCCESS:
-        exit(1)
-
-    # Get camera information and calibration parameters
+def calibration_info(zed):
+    # Calibration summary of an opened camera; the camera service answers "calibration" with this
     calibration_params = zed.get_camera_information().camera_configuration.calibration_parameters
-    focal_left_x = calibration_params.left_cam.fx
-    focal_left_y = calibration_params.left_cam.fy
-    focal_right_x = calibration_params.right_cam.fx
-    focal_right_y = calibration_params.right_cam.fy
-    k1 = calibration_params.left_cam.disto[0]
-    tx = calibration_params.stereo_transform.get_translation().get()[0]
-    h_fov = calibration_params.left_cam.h_fov
-
-    # Get camera resolution (width, height)
     resolution = zed.get_camera_information().camera_configuration.resolution
-    width = resolution.width
-    height = resolution.height
+    return {
+        "focal_left_x": calibration_params.left_cam.fx,
+        "focal_left_y": calibration_params.left_cam.fy,
+        "focal_right_x": calibration_params.right_cam.fx,
+        "focal_right_y": calibration_params.right_cam.fy,
+        "k1": calibration_params.left_cam.disto[0],
+        "tx": calibration_params.stereo_transform.get_translation().get()[0],
+        "h_fov": calibration_params.left_cam.h_fov,
+        "width": resolution.width,
+        "height": resolution.height,
+    }
+
+def run(service_address=None):
+    if service_address is not None:
+        # Ask the running camera service instead of opening the device again
+        from camera_feature import camera_service
+        client = camera_service.CameraClient(service_address)
+        reply = client.request("calibration")
+        client.close()
+        if not reply["ok"]:
+            print(f"Camera service: {reply['error']}")
+            return
+        info = reply["calibration"]
+    else:
+        zed = sl.Camera()
+        init_params = sl.InitParameters()
+        init_params.sdk_verbose = 0
+
+        if zed.open(init_params) != sl.ERROR_CODE.SUCCESS:
+            exit(1)
+
+        # Get camera information and calibration parameters
+        info = calibration_info(zed)
+        zed.close()
 
     # Calculate aspect ratio
-    aspect_ratio = width / height
+    aspect_ratio = info["width"] / info["height"]
 
     # Print camera information
-    print(f"Focal Length (Left X): {focal_left_x}")
-    print(f"Focal Length (Left Y): {focal_left_y}")
-    print(f"Focal Length (Right X): {focal_right_x}")
-    print(f"Focal Length (Right Y): {focal_right_y}")
-    print(f"Radial Distortion (k1): {k1}")
-    print(f"Translation (tx): {tx}")
-    print(f"Horizontal FoV: {h_fov}")
+    print(f"Focal Length (Left X): {info['focal_left_x']}")
+    print(f"Focal Length (Left Y): {info['focal_left_y']}")
+    print(f"Focal Length (Right X): {info['focal_right_x']}")
+    print(f"Focal Length (Right Y): {info['focal_right_y']}")
+    print(f"Radial Distortion (k1): {info['k1']}")
+    print(f"Translation (tx): {info['tx']}")
+    print(f"Horizontal FoV: {info['h_fov']}")
     print(f"Aspect Ratio: {aspect_ratio}")
 
-    zed.close()
-
 if __name__ == "__main__":
     run()
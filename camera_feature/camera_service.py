@@ -0,0 +1,383 @@
+import multiprocessing
+import threading
+import time
+from multiprocessing import connection
+import numpy as np
+import pyzed.sl as sl
+from camera_feature import camera_calibration
+from camera_feature import shared_frame_ring
+from camera_feature import skeleton_renderer
+
+# Long-lived ZED service shared by the main.py menu options.
+#
+# One process opens the camera once (NEURAL depth model loaded, body tracking enabled on first
+# use) and keeps it open between menu options. Clients connect over a local
+# multiprocessing.connection socket (named pipe on Windows) with the session authkey, request the
+# streams they need and read frames from SharedFrameRings; only commands go over the socket.
+#
+# Streams are retrieved only while at least one client is attached to them. Every grab is written
+# in STREAM_ORDER with the same sensor timestamp, so a reader that sees the newest frame of the
+# last stream it attached can find the matching frames of the others. All ZED calls stay on the
+# service loop; commands are handled between grabs.
+#
+# Options that need the device with other settings (capture at another resolution, calibration
+# tools) suspend the service, which closes the camera, and resume it afterwards.
+
+STREAM_ORDER = ("keypoints", "confidence", "depth", "left")
+MAX_BODIES = 8  # Keypoint slots per frame, unused rows are NaN
+IDLE_POLL_S = 0.05
+
+
+class _Server:
+    def __init__(self, resolution, fps):
+        self.init_params = sl.InitParameters()
+        self.init_params.camera_resolution = sl.RESOLUTION[resolution]
+        self.init_params.camera_fps = fps
+        self.init_params.depth_mode = sl.DEPTH_MODE.NEURAL
+        self.init_params.coordinate_units = sl.UNIT.MILLIMETER
+
+        self.zed = sl.Camera()
+        self.opened = False
+        self.runtime_params = sl.RuntimeParameters()
+        self.body_tracking = False
+        self.body_runtime_params = sl.BodyTrackingRuntimeParameters()
+        self.body_runtime_params.detection_confidence_threshold = 40
+        self.bodies = sl.Bodies()
+        self.recording_path = None
+
+        self.rings = {}
+        self.mats = {}
+        self.keypoint_slot = np.full((MAX_BODIES, skeleton_renderer.NUM_KEYPOINTS, 2), np.nan, np.float32)
+        self.attached = {}  # Client connection -> set of stream names
+        self.clients = []
+        self.clients_lock = threading.Lock()
+        self.running = True
+        self.grabbed = 0
+        self.started = time.perf_counter()
+
+    # --- Device ---
+
+    def open(self):
+        err = self.zed.open(self.init_params)
+        if err != sl.ERROR_CODE.SUCCESS:
+            return f"Failed to open camera: {err}"
+        self.opened = True
+        if self.body_tracking:
+            self.body_tracking = False
+            return self.enable_body_tracking()
+        return None
+
+    def close(self):
+        if self.recording_path is not None:
+            self.zed.disable_recording()
+            self.recording_path = None
+        self.zed.close()
+        self.opened = False
+
+    def enable_body_tracking(self):
+        if self.body_tracking:
+            return None
+        self.zed.enable_positional_tracking(sl.PositionalTrackingParameters())
+        body_tracking_params = sl.BodyTrackingParameters()
+        body_tracking_params.detection_model = sl.BODY_TRACKING_MODEL.HUMAN_BODY_ACCURATE
+        body_tracking_params.enable_tracking = True
+        body_tracking_params.enable_body_fitting = True
+        body_tracking_params.body_format = sl.BODY_FORMAT.BODY_34
+        if self.zed.enable_body_tracking(body_tracking_params) != sl.ERROR_CODE.SUCCESS:
+            return "Failed to enable body tracking."
+        self.body_tracking = True
+        return None
+
+    def stream_shape(self, name):
+        resolution = self.zed.get_camera_information().camera_configuration.resolution
+        if name == "keypoints":
+            return self.keypoint_slot.shape, np.float32
+        if name == "left":
+            return (resolution.height, resolution.width, 4), np.uint8
+        return (resolution.height, resolution.width, 1), np.float32
+
+    # --- Streaming ---
+
+    def active_streams(self):
+        active = set()
+        for streams in self.attached.values():
+            active |= streams
+        return [name for name in STREAM_ORDER if name in active]
+
+    def publish(self):
+        timestamp_ns = self.zed.get_timestamp(sl.TIME_REFERENCE.IMAGE).get_nanoseconds()
+        for name in self.active_streams():
+            if name == "keypoints":
+                self.zed.retrieve_bodies(self.bodies, self.body_runtime_params)
+                keypoints = skeleton_renderer.collect_keypoints(self.bodies, sl.OBJECT_TRACKING_STATE.OK)[:MAX_BODIES]
+                self.keypoint_slot.fill(np.nan)
+                self.keypoint_slot[:len(keypoints)] = keypoints
+                data = self.keypoint_slot
+            else:
+                mat = self.mats.setdefault(name, sl.Mat())
+                if name == "left":
+                    self.zed.retrieve_image(mat, sl.VIEW.LEFT)
+                else:
+                    self.zed.retrieve_measure(mat, sl.MEASURE.DEPTH if name == "depth" else sl.MEASURE.CONFIDENCE)
+                data = mat.get_data()
+            self.rings[name].write(data, timestamp_ns)
+
+    # --- Commands ---
+
+    def handle(self, conn, command, args):
+        if command == "attach":
+            if not self.opened:
+                return {"ok": False, "error": "Camera service is suspended"}
+            streams = [name for name in args["streams"] if name in STREAM_ORDER]
+            if len(streams) != len(args["streams"]):
+                return {"ok": False, "error": f"Unknown stream in {args['streams']}, available: {STREAM_ORDER}"}
+            if "keypoints" in streams:
+                error = self.enable_body_tracking()
+                if error:
+                    return {"ok": False, "error": error}
+            for name in streams:
+                if name not in self.rings:
+                    shape, dtype = self.stream_shape(name)
+                    self.rings[name] = shared_frame_ring.SharedFrameRing.create(shape, dtype=dtype)
+            self.attached[conn] = set(streams)
+            return {"ok": True, "rings": {name: self.rings[name].name for name in streams}}
+        if command == "detach":
+            self.attached.pop(conn, None)
+            return {"ok": True}
+        if command == "calibration":
+            if not self.opened:
+                return {"ok": False, "error": "Camera service is suspended"}
+            return {"ok": True, "calibration": camera_calibration.calibration_info(self.zed)}
+        if command == "record_start":
+            if not self.opened:
+                return {"ok": False, "error": "Camera service is suspended"}
+            if self.recording_path is not None:
+                return {"ok": False, "error": f"Already recording to {self.recording_path}"}
+            recording_params = sl.RecordingParameters(args["path"], sl.SVO_COMPRESSION_MODE.H264)
+            err = self.zed.enable_recording(recording_params)
+            if err != sl.ERROR_CODE.SUCCESS:
+                return {"ok": False, "error": f"Failed to start recording: {err}"}
+            self.recording_path = args["path"]
+            return {"ok": True}
+        if command == "record_stop":
+            path = self.recording_path
+            if path is not None:
+                self.zed.disable_recording()
+                self.recording_path = None
+            return {"ok": True, "path": path}
+        if command == "suspend":
+            if self.opened:
+                self.close()
+            return {"ok": True}
+        if command == "resume":
+            error = self.open() if not self.opened else None
+            return {"ok": error is None, "error": error}
+        if command == "status":
+            elapsed = time.perf_counter() - self.started
+            return {"ok": True, "opened": self.opened, "streams": self.active_streams(), "clients": len(self.clients),
+                    "grabbed": self.grabbed, "fps": self.grabbed / elapsed if elapsed else 0.0,
+                    "recording": self.recording_path}
+        if command == "shutdown":
+            self.running = False
+            return {"ok": True}
+        return {"ok": False, "error": f"Unknown command {command!r}"}
+
+    def accept_loop(self, listener):
+        while self.running:
+            try:
+                conn = listener.accept()
+            except (OSError, EOFError, connection.AuthenticationError):
+                if not self.running:
+                    return
+                continue
+            with self.clients_lock:
+                self.clients.append(conn)
+
+    def drop(self, conn):
+        with self.clients_lock:
+            self.clients.remove(conn)
+        self.attached.pop(conn, None)
+        conn.close()
+
+    def serve(self, listener):
+        threading.Thread(target=self.accept_loop, args=(listener,), daemon=True).start()
+        while self.running:
+            streaming = self.opened and (self.active_streams() or self.recording_path is not None)
+            with self.clients_lock:
+                clients = list(self.clients)
+            # Do not block while frames are flowing; idle, wait for the next command instead
+            for conn in connection.wait(clients, timeout=0 if streaming else IDLE_POLL_S) if clients else ():
+                try:
+                    command, args = conn.recv()
+                except (EOFError, OSError):
+                    self.drop(conn)
+                    continue
+                try:
+                    conn.send(self.handle(conn, command, args))
+                except (EOFError, OSError):
+                    self.drop(conn)
+            if not clients and not streaming:
+                time.sleep(IDLE_POLL_S)
+
+            if streaming and self.zed.grab(self.runtime_params) == sl.ERROR_CODE.SUCCESS:
+                self.grabbed += 1
+                self.publish()
+
+        if self.opened:
+            self.close()
+        for ring in self.rings.values():
+            ring.close()
+
+
+def serve(parent_conn, resolution="VGA", fps=30):
+    # Service process entry point; reports {"ok", "address" | "error"} over parent_conn once ready
+    server = _Server(resolution, fps)
+    error = server.open()
+    if error:
+        parent_conn.send({"ok": False, "error": error})
+        return
+    listener = connection.Listener(authkey=multiprocessing.current_process().authkey)
+    parent_conn.send({"ok": True, "address": listener.address})
+    parent_conn.close()
+    try:
+        server.serve(listener)
+    finally:
+        listener.close()
+
+
+class ServiceFrames:
+    # Reader side of the rings a client attached to
+    def __init__(self, ring_names):
+        self.rings = {name: shared_frame_ring.SharedFrameRing.attach(ring) for name, ring in ring_names.items()}
+        self.primary = [name for name in STREAM_ORDER if name in self.rings][-1]
+        self.last_seq = 0
+        self.dropped = 0  # Frames overwritten before they could be read, or missing a stream
+
+    def _copy(self, name, seq):
+        ring = self.rings[name]
+        result = ring.read(seq)
+        if result is None:
+            return None
+        data = result[1].copy()
+        if not ring.is_valid(seq):
+            return None
+        if name == "keypoints":
+            return data[~np.isnan(data).all(axis=(1, 2))]
+        return data[:, :, 0] if data.shape[2] == 1 else data
+
+    def read(self, timeout=1.0):
+        # Newest frame set not returned before: (timestamp_ns, {stream: array}), or None on timeout
+        deadline = time.perf_counter() + timeout
+        primary = self.rings[self.primary]
+        while True:
+            latest = primary.read_latest()
+            if latest is not None and latest[0] != self.last_seq:
+                seq, timestamp_ns, _ = latest
+                frames = {self.primary: self._copy(self.primary, seq)}
+                for name, ring in self.rings.items():
+                    if name != self.primary:
+                        other_seq = ring.find(timestamp_ns)
+                        frames[name] = self._copy(name, other_seq) if other_seq else None
+                self.last_seq = seq
+                if all(frame is not None for frame in frames.values()):
+                    return timestamp_ns, frames
+                self.dropped += 1
+            if time.perf_counter() >= deadline:
+                return None
+            time.sleep(0.002)
+
+    def close(self):
+        for ring in self.rings.values():
+            ring.close()
+
+
+class CameraClient:
+    def __init__(self, address):
+        self.conn = connection.Client(address, authkey=multiprocessing.current_process().authkey)
+        self.frames = None
+
+    def request(self, command, **args):
+        self.conn.send((command, args))
+        return self.conn.recv()
+
+    def attach(self, streams):
+        # Returns ServiceFrames for the streams, or None (after printing why) if the service refused
+        reply = self.request("attach", streams=list(streams))
+        if not reply["ok"]:
+            print(f"Camera service: {reply['error']}")
+            return None
+        self.frames = ServiceFrames(reply["rings"])
+        return self.frames
+
+    def close(self):
+        if self.frames is not None:
+            self.frames.close()
+            self.frames = None
+        self.conn.close()
+
+
+class CameraService:
+    # Handle on the service process, owned by main.py
+    def __init__(self, resolution="VGA", fps=30):
+        self.resolution = resolution
+        self.fps = fps
+        self.process = None
+        self.parent_conn = None
+        self.address = None
+        self.control = None
+
+    def start(self):
+        # Launches the service process; the camera opens in the background, ready() waits for it
+        context = multiprocessing.get_context("spawn")
+        self.parent_conn, child_conn = context.Pipe()
+        self.process = context.Process(target=serve, args=(child_conn, self.resolution, self.fps), daemon=True)
+        self.process.start()
+        child_conn.close()
+        return self
+
+    def ready(self, timeout=60.0):
+        # True once the camera is open and the service accepts clients
+        if self.control is not None:
+            return True
+        if self.parent_conn is None:
+            return False
+        parent_conn, self.parent_conn = self.parent_conn, None
+        if not parent_conn.poll(timeout):
+            print("Camera service did not start in time.")
+            self.process.terminate()
+            return False
+        try:
+            reply = parent_conn.recv()
+        except EOFError:
+            reply = {"ok": False, "error": "service process exited"}
+        parent_conn.close()
+        if not reply["ok"]:
+            print(f"Camera service: {reply['error']}")
+            self.process.join()
+            return False
+        self.address = reply["address"]
+        self.control = CameraClient(self.address)
+        return True
+
+    def request(self, command, **args):
+        return self.control.request(command, **args)
+
+    def suspend(self):
+        # Releases the device for an option that opens it itself
+        self.request("suspend")
+
+    def resume(self):
+        reply = self.request("resume")
+        if not reply["ok"]:
+            print(f"Camera service: {reply['error']}")
+
+    def stop(self):
+        if self.parent_conn is not None:
+            self.ready()
+        if self.control is not None:
+            self.request("shutdown")
+            self.control.close()
+            self.control = None
+        if self.process is not None:
+            self.process.join(timeout=5)
+            self.process = None
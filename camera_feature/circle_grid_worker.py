@@ -0,0 +1,92 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import cv2
+from camera_feature import frame_queue
+
+# Circle-grid detection off the UI thread.
+#
+# The UI submits every DAVIS/ZED frame pair; a dispatcher thread always takes the newest pair
+# (older ones still waiting are dropped) and detects the grid in both images concurrently on a
+# small thread pool. OpenCV releases the GIL inside findCirclesGrid, so the preview keeps running
+# at camera rate while detection catches up. The latest result is read without blocking.
+#
+# findCirclesGrid already returns sub-pixel circle centers. They are not passed through
+# cornerSubPix, which is meant for chessboard corners and pulls circle centers towards the edges.
+
+
+class DetectionResult:
+    def __init__(self, pair_id, found_davis, corners_davis, found_zed, corners_zed, submitted):
+        self.pair_id = pair_id
+        self.found_davis = found_davis
+        self.corners_davis = corners_davis
+        self.found_zed = found_zed
+        self.corners_zed = corners_zed
+        self.latency = time.perf_counter() - submitted
+
+    @property
+    def found_both(self):
+        return self.found_davis and self.found_zed
+
+
+def to_gray(image):
+    if image.ndim == 2:
+        return image
+    return cv2.cvtColor(image, cv2.COLOR_BGRA2GRAY if image.shape[2] == 4 else cv2.COLOR_BGR2GRAY)
+
+
+def detect_circle_grid(gray, pattern_size, flags=cv2.CALIB_CB_SYMMETRIC_GRID):
+    return cv2.findCirclesGrid(gray, pattern_size, None, flags)
+
+
+class CircleGridWorker:
+    def __init__(self, pattern_size, flags=cv2.CALIB_CB_SYMMETRIC_GRID):
+        self.pattern_size = pattern_size
+        self.flags = flags
+        self.jobs = frame_queue.LatestFrameQueue(1)
+        self.pool = ThreadPoolExecutor(max_workers=1)  # DAVIS image, while the dispatcher does the ZED one
+        self.lock = threading.Lock()
+        self.result = None
+        self.detected = 0
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self._dispatch, daemon=True)
+        self.thread.start()
+
+    @property
+    def submitted(self):
+        return self.jobs.put_count
+
+    @property
+    def dropped(self):
+        # Pairs superseded by a newer pair before detection started
+        return self.jobs.dropped + self.jobs.skipped
+
+    def submit(self, pair_id, davis_image, zed_image):
+        # Never blocks; the images must not be modified afterwards
+        self.jobs.put((pair_id, davis_image, zed_image, time.perf_counter()))
+
+    def latest(self):
+        with self.lock:
+            return self.result
+
+    def _detect(self, image):
+        return detect_circle_grid(to_gray(image), self.pattern_size, self.flags)
+
+    def _dispatch(self):
+        while not self.stop_event.is_set():
+            job = self.jobs.get_latest(timeout=0.1)
+            if job is None:
+                continue
+            pair_id, davis_image, zed_image, submitted = job
+            davis_future = self.pool.submit(self._detect, davis_image)
+            found_zed, corners_zed = self._detect(zed_image)
+            found_davis, corners_davis = davis_future.result()
+            result = DetectionResult(pair_id, found_davis, corners_davis, found_zed, corners_zed, submitted)
+            with self.lock:
+                self.result = result
+                self.detected += 1
+
+    def close(self):
+        self.stop_event.set()
+        self.thread.join()
+        self.pool.shutdown()
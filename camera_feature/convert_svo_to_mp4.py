@@ -1,42 +1,277 @@
-import pyzed.sl as sl
+import argparse
+import glob
+import os
+import queue
+import shutil
+import subprocess
+import sys
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import cv2
+
+# Segment-parallel SVO -> MP4 exporter.
+#
+# The SVO is split into frame ranges. Every worker process opens its own reader, seeks to the
+# start of its range, decodes and encodes that segment to its own file. The segments are then
+# joined without re-encoding (ffmpeg concat demuxer, stream copy). Without ffmpeg on the PATH the
+# recording is exported as a single segment.
+#
+# Readers are pluggable: reader_factory(source) must return an object with frame_count(), fps(),
+# size(), seek(frame) and read() -> BGR frame or None. SvoFrameReader reads ZED recordings,
+# SyntheticFrameReader generates frames so the exporter can run without the ZED SDK.
+
+FOURCC = "mp4v"
+PROGRESS_EVERY = 30  # Frames between progress messages from a worker
+
+
+class SvoFrameReader:
+    def __init__(self, source):
+        # Imported here so workers driven by another reader do not need the ZED SDK
+        import pyzed.sl as sl
+        self.sl = sl
+
+        input_type = sl.InputType()
+        input_type.set_from_svo_file(source)
+        init = sl.InitParameters(input_t=input_type)
+        init.depth_mode = sl.DEPTH_MODE.NONE  # Only the left RGB image is exported
+        init.svo_real_time_mode = False
+
+        self.zed = sl.Camera()
+        err = self.zed.open(init)
+        if err != sl.ERROR_CODE.SUCCESS:
+            raise RuntimeError(f"Failed to open {source}: {err!r}")
+        self.runtime = sl.RuntimeParameters()
+        self.image = sl.Mat()
+        self.config = self.zed.get_camera_information().camera_configuration
+
+    def frame_count(self):
+        return self.zed.get_svo_number_of_frames()
+
+    def fps(self):
+        return self.config.fps
+
+    def size(self):
+        return self.config.resolution.width, self.config.resolution.height
+
+    def seek(self, frame):
+        self.zed.set_svo_position(frame)
+
+    def read(self):
+        if self.zed.grab(self.runtime) != self.sl.ERROR_CODE.SUCCESS:
+            return None
+        self.zed.retrieve_image(self.image, self.sl.VIEW.LEFT)
+        return cv2.cvtColor(self.image.get_data(), cv2.COLOR_BGRA2BGR)
+
+    def close(self):
+        self.zed.close()
+
+
+class SyntheticFrameReader:
+    # source: "synthetic:<frames>:<width>x<height>:<fps>", e.g. "synthetic:600:1280x720:30"
+    def __init__(self, source):
+        _, frames, size, fps = source.split(":")
+        width, height = (int(v) for v in size.split("x"))
+        self.frames = int(frames)
+        self.width = width
+        self.height = height
+        self.rate = float(fps)
+        self.position = 0
+        ys, xs = np.mgrid[0:height, 0:width]
+        self.base = ((xs + ys) % 256).astype(np.uint8)
+
+    def frame_count(self):
+        return self.frames
+
+    def fps(self):
+        return self.rate
+
+    def size(self):
+        return self.width, self.height
+
+    def seek(self, frame):
+        self.position = frame
+
+    def read(self):
+        if self.position >= self.frames:
+            return None
+        frame = cv2.merge([self.base + self.position % 256, self.base, np.full_like(self.base, self.position % 256)])
+        cv2.putText(frame, str(self.position), (20, 60), cv2.FONT_HERSHEY_SIMPLEX, 2, (255, 255, 255), 3)
+        self.position += 1
+        return frame
+
+    def close(self):
+        pass
+
+
+def reader_for(source):
+    return SyntheticFrameReader(source) if source.startswith("synthetic:") else SvoFrameReader(source)
+
+
+def split_ranges(frame_count, segments):
+    bounds = np.linspace(0, frame_count, segments + 1).astype(int)
+    return [(int(a), int(b)) for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+
+
+def export_segment(reader_factory, source, start, end, segment_path, progress_queue=None):
+    # Runs in a worker process: decode frames [start, end) and encode them to segment_path
+    reader = reader_factory(source)
+    try:
+        reader.seek(start)
+        writer = cv2.VideoWriter(segment_path, cv2.VideoWriter_fourcc(*FOURCC), reader.fps(), reader.size())
+        if not writer.isOpened():
+            raise RuntimeError(f"Could not open a {FOURCC} video writer for {segment_path}")
+        written = 0
+        reported = 0
+        for _ in range(start, end):
+            frame = reader.read()
+            if frame is None:
+                break
+            writer.write(frame)
+            written += 1
+            if progress_queue is not None and written - reported >= PROGRESS_EVERY:
+                progress_queue.put(written - reported)
+                reported = written
+        writer.release()
+        if progress_queue is not None and written > reported:
+            progress_queue.put(written - reported)
+        return segment_path, written
+    finally:
+        reader.close()
+
+
+def write_segment_list(segment_paths, output_path):
+    list_path = output_path + ".segments.txt"
+    with open(list_path, "w") as f:
+        for path in segment_paths:
+            f.write(f"file '{os.path.abspath(path)}'\n")
+    return list_path
+
+
+def concat_segments(list_path, output_path):
+    # Stream copy, no re-encoding. Returns False if ffmpeg is not available.
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg is None:
+        return False
+    result = subprocess.run([ffmpeg, "-y", "-loglevel", "error", "-f", "concat", "-safe", "0", "-i", list_path,
+                             "-c", "copy", output_path])
+    return result.returncode == 0
+
+
+def export_svo(source, output_path, reader_factory=reader_for, workers=None, segments=None):
+    workers = workers or os.cpu_count() or 1
+    probe = reader_factory(source)
+    frame_count = probe.frame_count()
+    probe.close()
+    if frame_count <= 0:
+        print(f"No frames in {source}")
+        return False
+
+    segments = segments or workers
+    if segments > 1 and shutil.which("ffmpeg") is None:
+        # Segments could not be joined afterwards
+        print("ffmpeg not found, exporting in a single segment.")
+        segments = 1
+    ranges = split_ranges(frame_count, segments)
+    base, _ = os.path.splitext(output_path)
+    segment_paths = [f"{base}.part{i:03d}.mp4" for i in range(len(ranges))]
+    print(f"Exporting {frame_count} frames in {len(ranges)} segments with {min(workers, len(ranges))} workers -> {output_path}")
+
+    start_time = time.perf_counter()
+    done = 0
+    with multiprocessing.Manager() as manager:
+        progress_queue = manager.Queue()
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            futures = [pool.submit(export_segment, reader_factory, source, start, end, path, progress_queue)
+                       for (start, end), path in zip(ranges, segment_paths)]
+            while not all(f.done() for f in futures) or not progress_queue.empty():
+                try:
+                    done += progress_queue.get(timeout=0.5)
+                except queue.Empty:
+                    continue
+                elapsed = time.perf_counter() - start_time
+                print(f"\r{done}/{frame_count} frames ({100.0 * done / frame_count:.1f}%), {done / elapsed:.1f} fps",
+                      end="", flush=True)
+            errors = [f.exception() for f in futures if f.exception() is not None]
+            written = sum(f.result()[1] for f in futures if f.exception() is None)
+
+    if errors:
+        print(f"\nExport of {source} failed: {errors[0]}")
+        for path in segment_paths:
+            if os.path.exists(path):
+                os.remove(path)
+        return False
+
+    elapsed = time.perf_counter() - start_time
+    print(f"\nEncoded {written} frames in {elapsed:.1f} s ({written / elapsed:.1f} fps)")
+    if written < frame_count:
+        print(f"Warning: only {written} of {frame_count} frames could be read, the MP4 is shorter than the recording.")
+
+    if len(segment_paths) == 1:
+        os.replace(segment_paths[0], output_path)
+    else:
+        list_path = write_segment_list(segment_paths, output_path)
+        if not concat_segments(list_path, output_path):
+            print("Could not join the segments (is ffmpeg installed?). They were kept, join them losslessly with")
+            print(f"  ffmpeg -f concat -safe 0 -i {list_path} -c copy {output_path}")
+            return False
+        os.remove(list_path)
+        for path in segment_paths:
+            os.remove(path)
+    print(f"Saved {output_path}")
+    return True
+
 
 def run():
-    zed = sl.Camera()
-    init_params = sl.InitParameters()
-    init_params.sdk_verbose = 0
-
-    if zed.open(init_params) != sl.ERROR_CODE.SUCCESS:
-        exit(1)
-
-    # Get camera information and calibration parameters
-    calibration_params = zed.get_camera_information().camera_configuration.calibration_parameters
-    focal_left_x = calibration_params.left_cam.fx
-    focal_left_y = calibration_params.left_cam.fy
-    focal_right_x = calibration_params.right_cam.fx
-    focal_right_y = calibration_params.right_cam.fy
-    k1 = calibration_params.left_cam.disto[0]
-    tx = calibration_params.stereo_transform.get_translation().get()[0]
-    h_fov = calibration_params.left_cam.h_fov
-
-    # Get camera resolution (width, height)
-    resolution = zed.get_camera_information().camera_configuration.resolution
-    width = resolution.width
-    height = resolution.height
-
-    # Calculate aspect ratio
-    aspect_ratio = width / height
-
-    # Print camera information
-    print(f"Focal Length (Left X): {focal_left_x}")
-    print(f"Focal Length (Left Y): {focal_left_y}")
-    print(f"Focal Length (Right X): {focal_right_x}")
-    print(f"Focal Length (Right Y): {focal_right_y}")
-    print(f"Radial Distortion (k1): {k1}")
-    print(f"Translation (tx): {tx}")
-    print(f"Horizontal FoV: {h_fov}")
-    print(f"Aspect Ratio: {aspect_ratio}")
-
-    zed.close()
+    video_folder = os.path.join(os.path.dirname(__file__), '..', 'captured_videos')
+    video_files = [f for f in os.listdir(video_folder) if f.endswith('.svo2')]
+
+    if not video_files:
+        print("No SVO files found in the directory.")
+        return
+
+    print("Available video files:")
+    for idx, video in enumerate(video_files, start=1):
+        print(f"{idx}. {video}")
+    print("0. Export all")
+
+    choice = input(f"Select a video (0-{len(video_files)}): ")
+    try:
+        choice = int(choice)
+        if choice < 0 or choice > len(video_files):
+            raise ValueError
+    except ValueError:
+        print("Invalid choice. Exiting.")
+        return
+
+    selected = video_files if choice == 0 else [video_files[choice - 1]]
+    for video in selected:
+        input_file = os.path.join(video_folder, video)
+        export_svo(input_file, os.path.splitext(input_file)[0] + ".mp4")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export SVO recordings to MP4 with parallel segments")
+    parser.add_argument("inputs", nargs="+", help="SVO files or globs, or synthetic:<frames>:<W>x<H>:<fps>")
+    parser.add_argument("--output-dir", help="Directory for the MP4 files (default: next to each input)")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: all cores)")
+    parser.add_argument("--segments", type=int, help="Segments per recording (default: one per worker)")
+    args = parser.parse_args(argv)
+
+    sources = []
+    for pattern in args.inputs:
+        sources.extend([pattern] if pattern.startswith("synthetic:") else sorted(glob.glob(pattern)))
+    if not sources:
+        print("No input recordings found.")
+        sys.exit(1)
+
+    for source in sources:
+        name = "synthetic" if source.startswith("synthetic:") else os.path.splitext(os.path.basename(source))[0]
+        output_dir = args.output_dir or (os.path.dirname(source) if not source.startswith("synthetic:") else ".")
+        os.makedirs(output_dir, exist_ok=True)
+        export_svo(source, os.path.join(output_dir, name + ".mp4"), workers=args.workers, segments=args.segments)
+
 
 if __name__ == "__main__":
-    run()
+    main()
@@ -1,6 +1,9 @@
-import cv2 as cv
 import os
 import sys
+import numpy as np
+from camera_feature import event_recording
+from camera_feature import frame_index
+from camera_feature import timestamp_matcher
 
 def run():
     # Path to the folder containing the videos, go one level up from the current directory
@@ -30,39 +33,83 @@ def run():
     video_file = os.path.join(video_folder, selected_video)
     print(f"Playing video: {selected_video}")
 
-    # Open the video file using OpenCV
-    cap = cv.VideoCapture(video_file)
-    if not cap.isOpened():
-        print("Error: Could not open the video file.")
-        return
-
-    # Get video properties
-    fps = cap.get(cv.CAP_PROP_FPS)
-    width = int(cap.get(cv.CAP_PROP_FRAME_WIDTH))
-    height = int(cap.get(cv.CAP_PROP_FRAME_HEIGHT))
-    total_frames = int(cap.get(cv.CAP_PROP_FRAME_COUNT))
+    # Video properties from the frame index sidecar, built on first use
+    index = frame_index.load(video_file)
+    width, height = index.resolution
 
     # Display video information
-    print(f"FPS: {fps}")
+    print(f"FPS: {index.fps}")
     print(f"Resolution: {width}x{height}")
+    print(f"Duration: {index.duration:.6f} s")
+    if index.meta["capture_timestamps"]:
+        print(f"Start / end timestamp (ns): {index.time_range()[0]} / {index.time_range()[1]}")
+
+    # Pair the DAVIS recording with a ZED recording using the real capture timestamps
+    pair_with_zed(video_folder)
+
+
+def choose(prompt, options):
+    for idx, option in enumerate(options, start=1):
+        print(f"{idx}. {option}")
+    choice = input(f"{prompt} (1-{len(options)}): ")
+    try:
+        choice = int(choice)
+        if choice < 1 or choice > len(options):
+            raise ValueError
+    except ValueError:
+        print("Invalid choice.")
+        return None
+    return options[choice - 1]
 
-    # Assuming the starting timestamp for the other device (e.g., depth camera)
-    # Start timestamp from the other device (in nanoseconds from epoch)
-    depth_camera_start_ns = 1745407877796142228  # Example timestamp (nanoseconds from epoch)
 
-    # Calculate the ending timestamp (in seconds)
-    end_timestamp_sec = total_frames / fps
+def pair_with_zed(davis_folder):
+    svo_folder = os.path.join(os.path.dirname(__file__), '..', 'captured_videos')
+    event_recordings = sorted(f for f in os.listdir(davis_folder) if f.endswith('.events'))
+    svo_files = sorted(f for f in os.listdir(svo_folder) if f.endswith('.svo2')) if os.path.isdir(svo_folder) else []
+    if not event_recordings or not svo_files:
+        print("No event recording / SVO pair available, skipping timestamp matching.")
+        return
+
+    print("Event recordings:")
+    events_name = choose("Select an event recording", event_recordings)
+    if events_name is None:
+        return
+    print("ZED recordings:")
+    svo_name = choose("Select an SVO", svo_files)
+    if svo_name is None:
+        return
+
+    reader = event_recording.EventRecordingReader(os.path.join(davis_folder, events_name))
+    try:
+        zed_t_ns = frame_index.load(os.path.join(svo_folder, svo_name)).timestamps
+    except RuntimeError as e:
+        print(f"Error: {e}")
+        return
+    if len(zed_t_ns) == 0:
+        print("Error: The SVO file has no frames.")
+        return
+    davis_t_us = reader.frame_timestamps()
+
+    print(f"ZED start / end (ns): {zed_t_ns[0]} / {zed_t_ns[-1]}")
+    if len(davis_t_us):
+        print(f"DAVIS frames start / end (us): {davis_t_us[0]} / {davis_t_us[-1]}")
+    if reader.time_range() is not None:
+        print(f"DAVIS events start / end (us): {reader.time_range()[0]} / {reader.time_range()[1]}")
 
-    # Convert event camera timestamp (in seconds) to nanoseconds from epoch for synchronization
-    # Example: If event camera timestamp is 1.5 seconds, convert to nanoseconds:
-    event_relative_sec = 1.5  # Example event timestamp in seconds
-    event_absolute_ns = depth_camera_start_ns + int(event_relative_sec * 1e9)
+    matches = timestamp_matcher.match_recording(zed_t_ns, reader)
+    matched = matches[matches["davis_index"] >= 0]
+    print(f"Matched {len(matched)} of {len(matches)} ZED frames to a DAVIS frame "
+          f"(tolerance {timestamp_matcher.DEFAULT_TOLERANCE_US} us)")
+    if len(matched):
+        print(f"Median |offset|: {np.median(np.abs(matched['offset_us'])):.0f} us")
+        for match in matched[:5]:
+            print(f"  ZED {match['zed_index']} @ {match['zed_t_ns']} ns <-> DAVIS {match['davis_index']} "
+                  f"@ {match['davis_t_us']} us, events [{match['event_start']}, {match['event_end']})")
 
-    print(f"Starting timestamp (from other device in nanoseconds): {depth_camera_start_ns}")
-    print(f"Ending timestamp (in seconds): {end_timestamp_sec:.6f}")
-    print(f"Event timestamp (converted to nanoseconds from epoch): {event_absolute_ns}")
+    output_file = os.path.join(davis_folder, f"matches_{os.path.splitext(svo_name)[0]}.npy")
+    np.save(output_file, matches)
+    print(f"Matches saved to {output_file}")
 
-    cap.release()
 
 if __name__ == "__main__":
     run()
@@ -0,0 +1,81 @@
+import numpy as np
+import cv2
+
+# Metric depth (MEASURE.DEPTH, float32 millimetres) to BGRA for display.
+#
+# The colour table is built once: 65536 packed BGRA entries, index 0 reserved for invalid depth
+# (NaN, +/-inf, occluded, closer than min_mm) and drawn black. Each frame costs one quantizing
+# pass (addWeighted with a CV_16U destination saturates: NaN and below-range land on 0, beyond
+# max_mm on the last entry) and one table lookup written straight into a reused BGRA buffer.
+# There is no per-frame min/max scan, so a given distance always has the same colour.
+#
+# With adapt_rate > 0 the range follows the scene slowly: every adapt_interval frames the 2nd and
+# 98th percentiles of a subsampled frame are blended into min_mm/max_mm. Only the quantizing scale
+# changes; the table never does.
+
+LEVELS = 65536
+DEFAULT_MIN_MM = 300.0  # ZED minimum depth
+DEFAULT_MAX_MM = 10000.0
+
+
+def build_lut(colormap=cv2.COLORMAP_TURBO, invalid_color=(0, 0, 0)):
+    # 256-entry OpenCV colormap stretched to LEVELS - 1 entries, packed as one uint32 per BGRA pixel
+    ramp = cv2.applyColorMap(np.arange(256, dtype=np.uint8).reshape(256, 1), colormap).reshape(256, 3)
+    positions = np.linspace(0, 255, LEVELS - 1)
+    bgra = np.empty((LEVELS, 4), np.uint8)
+    for channel in range(3):
+        bgra[1:, channel] = np.round(np.interp(positions, np.arange(256), ramp[:, channel]))
+    bgra[0, :3] = invalid_color
+    bgra[:, 3] = 255
+    return bgra.view(np.uint32).reshape(LEVELS)
+
+
+class DepthColorizer:
+    def __init__(self, min_mm=DEFAULT_MIN_MM, max_mm=DEFAULT_MAX_MM, colormap=cv2.COLORMAP_TURBO,
+                 adapt_rate=0.0, adapt_interval=15):
+        self.lut = build_lut(colormap)
+        self.adapt_rate = adapt_rate
+        self.adapt_interval = adapt_interval
+        self.frames = 0
+        self.index = None
+        self.output = None
+        self.set_range(min_mm, max_mm)
+
+    def set_range(self, min_mm, max_mm):
+        # index = 1 + (depth - min_mm) * scale, so min_mm maps to 1 and max_mm to LEVELS - 1
+        self.min_mm = float(min_mm)
+        self.max_mm = max(float(max_mm), self.min_mm + 1.0)
+        self.scale = (LEVELS - 2) / (self.max_mm - self.min_mm)
+        self.offset = 1.0 - self.min_mm * self.scale
+
+    def _buffers(self, shape):
+        if self.index is None or self.index.shape != shape:
+            self.index = np.empty(shape, np.uint16)
+            self.output = np.empty(shape + (4,), np.uint8)
+        return self.index, self.output
+
+    def adapt(self, depth_mm):
+        sample = depth_mm[::8, ::8]
+        sample = sample[np.isfinite(sample) & (sample > 0)]
+        if sample.size < 64:
+            return
+        low, high = np.percentile(sample, (2, 98))
+        rate = self.adapt_rate
+        self.set_range(self.min_mm + (low - self.min_mm) * rate, self.max_mm + (high - self.max_mm) * rate)
+
+    def colorize(self, depth_mm):
+        # Returns the reused BGRA buffer; copy it if it has to outlive the next call
+        depth_mm = np.asarray(depth_mm)
+        if depth_mm.ndim == 3:
+            depth_mm = depth_mm[:, :, 0]
+        if self.adapt_rate > 0 and self.frames % self.adapt_interval == 0:
+            self.adapt(depth_mm)
+        self.frames += 1
+
+        index, output = self._buffers(depth_mm.shape[:2])
+        cv2.addWeighted(depth_mm, self.scale, depth_mm, 0.0, self.offset, dst=index, dtype=cv2.CV_16U)
+        np.take(self.lut, index, out=output.view(np.uint32).reshape(index.shape), mode='clip')
+        return output
+
+    def status(self):
+        return f"depth {self.min_mm / 1000:.2f}-{self.max_mm / 1000:.2f} m"
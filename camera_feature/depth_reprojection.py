@@ -0,0 +1,217 @@
+import numpy as np
+import cv2
+
+# ZED metric depth registered into the DAVIS image plane.
+#
+# stereo_calibration.npz holds R, T with X_zed = R @ X_davis + T (camera 1 = DAVIS, camera 2 = ZED
+# left), so a ZED pixel with ray r and depth z lands at X_davis = z * (R^T r) - R^T T. Everything
+# that does not depend on z is folded into per-pixel planes once, and a frame is
+#   Z = z * Az + bz,  U = (z * Pu + qu) / Z,  V = (z * Pv + qv) / Z
+# into reused buffers, followed by a z-buffer (np.minimum.at: the nearest surface wins) on an
+# ideal, distortion-free DAVIS grid. One nearest-neighbour remap then moves that grid onto the raw
+# (distorted) DAVIS pixels, which is where the events are.
+#
+# Only the ZED pixels that can land inside the DAVIS view for some depth in [min, max] are
+# processed; the DAVIS sees a small part of the ZED field of view, so this is a fraction of the
+# frame. The ZED samples are sparser than DAVIS pixels towards the edges, so single-pixel holes are
+# filled from their nearest neighbour. The output is DAVIS-frame Z in the depth unit (mm), NaN
+# where nothing projects, the same convention as MEASURE.DEPTH.
+
+DAVIS_SIZE = (346, 260)
+UNDISTORT_CRITERIA = (cv2.TERM_CRITERIA_COUNT + cv2.TERM_CRITERIA_EPS, 40, 1e-6)
+
+
+def scale_camera_matrix(K, from_size, to_size):
+    # Pixel-centre convention: x_to = (x_from + 0.5) * scale - 0.5
+    sx = to_size[0] / from_size[0]
+    sy = to_size[1] / from_size[1]
+    K = np.array(K, np.float64)
+    K[0, 0] *= sx
+    K[1, 1] *= sy
+    K[0, 2] = (K[0, 2] + 0.5) * sx - 0.5
+    K[1, 2] = (K[1, 2] + 0.5) * sy - 0.5
+    return K
+
+
+def pixel_grid(width, height, stride=1):
+    xs, ys = np.meshgrid(np.arange(0, width, stride, dtype=np.float32), np.arange(0, height, stride, dtype=np.float32))
+    return np.stack([xs, ys], axis=-1)
+
+
+def normalized_rays(K, D, width, height, stride=1):
+    # Undistorted (x/z, y/z) of every stride-th pixel centre, shape (rows, cols, 2)
+    grid = pixel_grid(width, height, stride)
+    rays = cv2.undistortPoints(grid.reshape(-1, 1, 2), K, D, criteria=UNDISTORT_CRITERIA)
+    return rays.reshape(grid.shape)
+
+
+class DepthReprojector:
+    def __init__(self, calib, depth_size, davis_size=DAVIS_SIZE, min_depth_mm=300.0, max_depth_mm=20000.0,
+                 fill_holes=True, stride=None):
+        # calib: stereo_calibration.npz contents; depth_size: (width, height) of the ZED depth maps.
+        # stride=None samples the ZED depth about as densely as DAVIS pixels (every pixel up to ~2x).
+        self.depth_size = tuple(depth_size)
+        self.davis_size = tuple(davis_size)
+        self.min_depth_mm = min_depth_mm
+        self.max_depth_mm = max_depth_mm
+        self.fill_holes = fill_holes
+
+        zed_size = tuple(int(v) for v in calib["imageSize"])
+        zed_matrix = scale_camera_matrix(calib["cameraMatrix2"], zed_size, self.depth_size)
+        davis_matrix = np.asarray(calib["cameraMatrix1"], np.float64)
+        davis_dist = np.asarray(calib["distCoeffs1"], np.float64)
+        R = np.asarray(calib["R"], np.float64)
+        T = np.asarray(calib["T"], np.float64).reshape(3)
+
+        if stride is None:
+            stride = max(1, int(zed_matrix[0, 0] / davis_matrix[0, 0]))
+        self.stride = stride
+
+        self._build_ideal_grid(davis_matrix, davis_dist)
+        self._build_planes(zed_matrix, np.asarray(calib["distCoeffs2"], np.float64), R, T)
+
+        self.zbuffer = np.empty((self.grid_size[1], self.grid_size[0]), np.float32)
+        self.filled = np.empty_like(self.zbuffer)
+        self.output = np.empty((self.davis_size[1], self.davis_size[0]), np.float32)
+        self.projected_points = 0
+
+    def _build_ideal_grid(self, davis_matrix, davis_dist):
+        # Where each raw DAVIS pixel sits in an ideal pinhole image with the same focal length. The
+        # grid is the bounding box of those positions, so no raw pixel falls off it.
+        width, height = self.davis_size
+        ideal = normalized_rays(davis_matrix, davis_dist, width, height)
+
+        # With strong barrel distortion the model folds over in the far corners and the undistortion
+        # does not converge there; those pixels get no depth rather than a wrong one
+        points = np.dstack([ideal, np.ones((height, width))]).reshape(-1, 1, 3)
+        reprojected, _ = cv2.projectPoints(points, np.zeros(3), np.zeros(3), davis_matrix, davis_dist)
+        converged = np.linalg.norm(reprojected.reshape(height, width, 2) - pixel_grid(width, height), axis=-1) < 0.5
+
+        map_x = ideal[..., 0] * davis_matrix[0, 0] + davis_matrix[0, 2]
+        map_y = ideal[..., 1] * davis_matrix[1, 1] + davis_matrix[1, 2]
+        origin_x = int(np.floor(map_x[converged].min()))
+        origin_y = int(np.floor(map_y[converged].min()))
+        self.grid_size = (int(np.ceil(map_x[converged].max())) - origin_x + 1,
+                          int(np.ceil(map_y[converged].max())) - origin_y + 1)
+        self.grid_matrix = davis_matrix.copy()
+        self.grid_matrix[0, 2] -= origin_x
+        self.grid_matrix[1, 2] -= origin_y
+        self.map_x = np.where(converged, map_x - origin_x, -1).astype(np.float32)
+        self.map_y = np.where(converged, map_y - origin_y, -1).astype(np.float32)
+
+    def _build_planes(self, zed_matrix, zed_dist, R, T):
+        rays = normalized_rays(zed_matrix, zed_dist, *self.depth_size, self.stride)
+        rays = np.dstack([rays, np.ones(rays.shape[:2])]).astype(np.float64)
+        A = rays @ R  # Row-wise R^T r
+        b = -R.T @ T
+
+        # The +0.5 rounds to the nearest grid pixel when U, V are truncated to integers
+        fx, fy = self.grid_matrix[0, 0], self.grid_matrix[1, 1]
+        cx, cy = self.grid_matrix[0, 2] + 0.5, self.grid_matrix[1, 2] + 0.5
+        Az = A[..., 2]
+        Pu = fx * A[..., 0] + cx * Az
+        Pv = fy * A[..., 1] + cy * Az
+        bz = b[2]
+        qu = fx * b[0] + cx * bz
+        qv = fy * b[1] + cy * bz
+
+        # ZED pixels whose projection can enter the grid for some depth in range. The projection moves
+        # along a straight segment between the two depth limits, so test the segment's bounding box.
+        grid_w, grid_h = self.grid_size
+        candidates = np.ones(rays.shape[:2], bool)
+        ends = []
+        for z in (self.min_depth_mm, self.max_depth_mm):
+            Z = z * Az + bz
+            candidates &= Z > 0
+            with np.errstate(divide='ignore', invalid='ignore'):
+                ends.append(((z * Pu + qu) / Z, (z * Pv + qv) / Z))
+        (u0, v0), (u1, v1) = ends
+        candidates &= (np.maximum(u0, u1) >= 0) & (np.minimum(u0, u1) < grid_w)
+        candidates &= (np.maximum(v0, v1) >= 0) & (np.minimum(v0, v1) < grid_h)
+
+        rows = np.flatnonzero(candidates.any(axis=1))
+        cols = np.flatnonzero(candidates.any(axis=0))
+        if len(rows) == 0:
+            self.roi = (slice(0, 0), slice(0, 0))
+        else:
+            self.roi = (slice(rows[0], rows[-1] + 1), slice(cols[0], cols[-1] + 1))
+
+        def crop(plane):
+            return np.ascontiguousarray(plane[self.roi], np.float32)
+
+        self.Az, self.Pu, self.Pv = crop(Az), crop(Pu), crop(Pv)
+        self.bz, self.qu, self.qv = np.float32(bz), np.float32(qu), np.float32(qv)
+        self.candidates = candidates[self.roi].copy()
+
+        shape = self.candidates.shape
+        self.buffers = {name: np.empty(shape, np.float32) for name in ("Z", "U", "V")}
+        self.buffers["ui"] = np.empty(shape, np.int32)
+        self.buffers["vi"] = np.empty(shape, np.int32)
+        self.buffers["valid"] = np.empty(shape, bool)
+        self.buffers["check"] = np.empty(shape, bool)
+
+    @property
+    def roi_fraction(self):
+        # Share of the ZED frame that is processed
+        return self.candidates.size * self.stride ** 2 / (self.depth_size[0] * self.depth_size[1])
+
+    def _project(self, z):
+        Z, U, V = self.buffers["Z"], self.buffers["U"], self.buffers["V"]
+        np.multiply(z, self.Az, out=Z)
+        Z += self.bz
+        np.multiply(z, self.Pu, out=U)
+        U += self.qu
+        U /= Z
+        np.multiply(z, self.Pv, out=V)
+        V += self.qv
+        V /= Z
+        return Z, U, V
+
+    def _valid_mask(self, z, U, V):
+        valid, check = self.buffers["valid"], self.buffers["check"]
+        # NaN depth makes U and V NaN, which fail every comparison
+        np.greater_equal(z, self.min_depth_mm, out=valid)
+        np.less_equal(z, self.max_depth_mm, out=check)
+        valid &= check
+        valid &= self.candidates
+        for plane, limit in ((U, self.grid_size[0]), (V, self.grid_size[1])):
+            np.greater_equal(plane, 0, out=check)
+            valid &= check
+            np.less(plane, limit, out=check)
+            valid &= check
+        return valid
+
+    def reproject(self, depth_mm):
+        # Returns the reused (davis_h, davis_w) float32 buffer; copy it if it has to outlive the next call
+        depth_mm = np.asarray(depth_mm)
+        if depth_mm.ndim == 3:
+            depth_mm = depth_mm[:, :, 0]
+        if depth_mm.shape[:2] != (self.depth_size[1], self.depth_size[0]):
+            raise ValueError(f"depth is {depth_mm.shape[1]}x{depth_mm.shape[0]}, "
+                             f"the reprojector was built for {self.depth_size[0]}x{self.depth_size[1]}")
+        if self.stride > 1:
+            depth_mm = depth_mm[::self.stride, ::self.stride]
+        z = depth_mm[self.roi]
+        Z, U, V = self._project(z)
+        valid = np.flatnonzero(self._valid_mask(z, U, V))
+        self.projected_points = len(valid)
+
+        ui, vi = self.buffers["ui"], self.buffers["vi"]
+        with np.errstate(invalid='ignore'):  # Invalid pixels are not used
+            np.copyto(ui, U, casting='unsafe')
+            np.copyto(vi, V, casting='unsafe')
+        index = vi.ravel()[valid] * self.grid_size[0] + ui.ravel()[valid]
+
+        self.zbuffer.fill(np.inf)
+        np.minimum.at(self.zbuffer.ravel(), index, Z.ravel()[valid])
+
+        grid = self.zbuffer
+        if self.fill_holes:
+            # A hole takes the nearest depth around it; pixels that already have depth keep theirs
+            cv2.erode(self.zbuffer, None, dst=self.filled, borderType=cv2.BORDER_REPLICATE)
+            np.copyto(self.filled, self.zbuffer, where=np.isfinite(self.zbuffer))
+            grid = self.filled
+        grid[np.isinf(grid)] = np.nan
+
+        return cv2.remap(grid, self.map_x, self.map_y, cv2.INTER_NEAREST, dst=self.output,
+                         borderMode=cv2.BORDER_CONSTANT, borderValue=float("nan"))
@@ -1,10 +1,120 @@
 import sys
 import os
-import numpy as np
+import time
+import threading
 import pyzed.sl as sl
 import cv2
+from camera_feature import frame_processing
+from camera_feature import depth_colorizer
+from camera_feature import frame_queue
+from camera_feature import keypoint_store
+
+STATS_INTERVAL_S = 2.0
+GRAB_RETRY_S = 0.01  # Wait after a failed grab
+MAX_GRAB_FAILURES = 100  # Consecutive grab errors before the producer gives up
+
+def show_frame(image_ocv, depth_mm, confidence_np, bodies, colorizer):
+    # Colour metric depth over a fixed range
+    depth_ocv = colorizer.colorize(depth_mm)
+
+    # Process confidence map
+    normalized_confidence = frame_processing.normalize_confidence(confidence_np)
+    colored_map = frame_processing.colorize_confidence(normalized_confidence)
+
+    # Copy for keypoint drawing
+    image_with_keypoints = image_ocv.copy()
+
+    # Draw body keypoints only on the copy
+    frame_processing.draw_body_keypoints(image_with_keypoints, bodies, sl.OBJECT_TRACKING_STATE.OK)
+
+    # Show the images
+    cv2.imshow("Image", image_ocv)
+    cv2.imshow("Depth", depth_ocv)
+    cv2.imshow("Confidence Map", colored_map)
+    cv2.imshow("Body Tracking", image_with_keypoints)
+
+def finish_keypoints(keypoint_writer, zed):
+    # Complete only if every SVO frame made it in (real-time playback may skip some)
+    complete = keypoint_writer.frames_written >= zed.get_svo_number_of_frames()
+    if keypoint_writer.close(complete=complete):
+        print(f"Keypoints of {keypoint_writer.frames_written} frames saved.")
+    elif not complete:
+        print(f"Keypoints not saved: only {keypoint_writer.frames_written} frames were processed.")
+
+def grab_loop(zed, runtime_params, body_runtime_params, queue, stop_event, keypoint_writer=None):
+    # Producer: grab and retrieve at camera rate, never waits for the renderer
+    image_zed = sl.Mat()
+    depth_measure = sl.Mat()
+    confidence_map = sl.Mat()
+
+    failures = 0
+    while not stop_event.is_set():
+        err = zed.grab(runtime_params)
+        if err == sl.ERROR_CODE.SUCCESS:
+            failures = 0
+            zed.retrieve_image(image_zed, sl.VIEW.LEFT)
+            zed.retrieve_measure(depth_measure, sl.MEASURE.DEPTH)
+            zed.retrieve_measure(confidence_map, sl.MEASURE.CONFIDENCE)
+            bodies = sl.Bodies()
+            zed.retrieve_bodies(bodies, body_runtime_params)
+            if keypoint_writer is not None:
+                keypoint_writer.append(zed.get_timestamp(sl.TIME_REFERENCE.IMAGE).get_nanoseconds(), bodies)
+
+            # sl.Mat buffers are reused by the next retrieve, so hand over copies
+            queue.put((time.perf_counter(), image_zed.get_data().copy(), depth_measure.get_data().copy(),
+                       confidence_map.get_data().copy(), bodies))
 
-def run():
+        elif err == sl.ERROR_CODE.END_OF_SVOFILE_REACHED:
+            print("End of file reached. Looping back.")
+            if keypoint_writer is not None:
+                finish_keypoints(keypoint_writer, zed)
+                keypoint_writer = None
+            zed.set_svo_position(0)
+
+        else:
+            failures += 1
+            if failures >= MAX_GRAB_FAILURES:
+                print(f"Grab failed {failures} times in a row ({err}). Stopping.")
+                break
+            stop_event.wait(GRAB_RETRY_S)
+
+    if keypoint_writer is not None:
+        keypoint_writer.close()
+
+def render_threaded(zed, runtime_params, body_runtime_params, queue_size, keypoint_writer=None):
+    # Consumer (main thread, OpenCV windows must stay on it): always shows the newest frame
+    queue = frame_queue.LatestFrameQueue(queue_size)
+    latency = frame_queue.LatencyStats()
+    colorizer = depth_colorizer.DepthColorizer()
+    stop_event = threading.Event()
+    grab_thread = threading.Thread(target=grab_loop, args=(zed, runtime_params, body_runtime_params, queue, stop_event,
+                                                           keypoint_writer), daemon=True)
+    grab_thread.start()
+
+    shown = 0
+    last_report = time.perf_counter()
+    key = ' '
+    while key != 113 and grab_thread.is_alive():  # ASCII for 'q'
+        frame = queue.get_latest(timeout=0.1)
+        if frame is not None:
+            grab_time, image_ocv, depth_mm, confidence_np, bodies = frame
+            show_frame(image_ocv, depth_mm, confidence_np, bodies, colorizer)
+            latency.add(grab_time)
+            shown += 1
+
+        now = time.perf_counter()
+        if now - last_report >= STATS_INTERVAL_S:
+            p50, p95 = latency.summary_ms()
+            print(f"Grabbed {queue.put_count}, shown {shown}, queue depth {queue.depth()}, "
+                  f"dropped {queue.dropped}, skipped {queue.skipped}, latency p50 {p50:.1f} ms / p95 {p95:.1f} ms")
+            last_report = now
+
+        key = cv2.waitKey(1) & 0xFF
+
+    stop_event.set()
+    grab_thread.join()
+
+def run(threaded=True, queue_size=2, record_keypoints=False):
     zed = sl.Camera()
 
     # Folder setup and video file selection
@@ -39,6 +149,8 @@ def run():
     init.camera_resolution = sl.RESOLUTION.HD1080
     init.depth_mode = sl.DEPTH_MODE.NEURAL
     init.coordinate_units = sl.UNIT.MILLIMETER
+    # With a free-running grab thread the SVO must play at its recorded rate
+    init.svo_real_time_mode = threaded
 
     if zed.open(init) != sl.ERROR_CODE.SUCCESS:
         print("ZED initialization failed.")
@@ -64,11 +176,10 @@ def run():
     body_runtime_params = sl.BodyTrackingRuntimeParameters()
     body_runtime_params.detection_confidence_threshold = 40
 
-    # Image and data setup
-    image_zed = sl.Mat()
-    depth_image = sl.Mat()
-    confidence_map = sl.Mat()
-    bodies = sl.Bodies()
+    # On request the first pass also goes to a columnar keypoint store next to the SVO, unless one is there
+    keypoint_writer = keypoint_store.writer_for(input_file) if record_keypoints else None
+    if keypoint_writer is not None:
+        print(f"Recording keypoints to {keypoint_writer.path}")
 
     # OpenCV window setup
     cv2.namedWindow("Image", cv2.WINDOW_NORMAL)
@@ -77,50 +188,42 @@ def run():
     cv2.namedWindow("Body Tracking", cv2.WINDOW_NORMAL)
 
     print("Press 'q' to quit.")
-    key = ' '
-    while key != 113:  # ASCII for 'q'
-        err = zed.grab(runtime_params)
-        if err == sl.ERROR_CODE.SUCCESS:
-            # Retrieve images and depth data
-            zed.retrieve_image(image_zed, sl.VIEW.LEFT)
-            zed.retrieve_image(depth_image, sl.VIEW.DEPTH)
-            zed.retrieve_measure(confidence_map, sl.MEASURE.CONFIDENCE)
-            zed.retrieve_bodies(bodies, body_runtime_params)
-
-            image_ocv = image_zed.get_data()
-            depth_ocv = depth_image.get_data()
-
-            # Normalize and convert depth image
-            depth_ocv = cv2.normalize(depth_ocv, None, 0, 255, cv2.NORM_MINMAX)
-            depth_ocv = cv2.convertScaleAbs(depth_ocv)
-
-            # Process confidence map
-            confidence_np = confidence_map.get_data()
-            normalized_confidence = cv2.normalize(confidence_np, None, 0, 255, cv2.NORM_MINMAX).astype(np.uint8)
-            colored_map = cv2.applyColorMap(normalized_confidence, cv2.COLORMAP_JET)
-
-            # Copy for keypoint drawing
-            image_with_keypoints = image_ocv.copy()
-
-            # Draw body keypoints only on the copy
-            for body in bodies.body_list:
-                if body.tracking_state == sl.OBJECT_TRACKING_STATE.OK:
-                    for kp in body.keypoint_2d:
-                        if not np.isnan(kp[0]) and not np.isnan(kp[1]):
-                            cv2.circle(image_with_keypoints, (int(kp[0]), int(kp[1])), 3, (0, 255, 0), -1)
-
-            # Show the images
-            cv2.imshow("Image", image_ocv)
-            cv2.imshow("Depth", depth_ocv)
-            cv2.imshow("Confidence Map", colored_map)
-            cv2.imshow("Body Tracking", image_with_keypoints)
-
-        elif err == sl.ERROR_CODE.END_OF_SVOFILE_REACHED:
-            print("End of file reached. Looping back.")
-            zed.set_svo_position(0)
-            continue
-
-        key = cv2.waitKey(10) & 0xFF
+    if threaded:
+        render_threaded(zed, runtime_params, body_runtime_params, queue_size, keypoint_writer)
+    else:
+        # Image and data setup
+        image_zed = sl.Mat()
+        depth_measure = sl.Mat()
+        confidence_map = sl.Mat()
+        bodies = sl.Bodies()
+        colorizer = depth_colorizer.DepthColorizer()
+
+        key = ' '
+        while key != 113:  # ASCII for 'q'
+            err = zed.grab(runtime_params)
+            if err == sl.ERROR_CODE.SUCCESS:
+                # Retrieve images and depth data
+                zed.retrieve_image(image_zed, sl.VIEW.LEFT)
+                zed.retrieve_measure(depth_measure, sl.MEASURE.DEPTH)
+                zed.retrieve_measure(confidence_map, sl.MEASURE.CONFIDENCE)
+                zed.retrieve_bodies(bodies, body_runtime_params)
+                if keypoint_writer is not None:
+                    keypoint_writer.append(zed.get_timestamp(sl.TIME_REFERENCE.IMAGE).get_nanoseconds(), bodies)
+
+                show_frame(image_zed.get_data(), depth_measure.get_data(), confidence_map.get_data(), bodies, colorizer)
+
+            elif err == sl.ERROR_CODE.END_OF_SVOFILE_REACHED:
+                print("End of file reached. Looping back.")
+                if keypoint_writer is not None:
+                    finish_keypoints(keypoint_writer, zed)
+                    keypoint_writer = None
+                zed.set_svo_position(0)
+                continue
+
+            key = cv2.waitKey(10) & 0xFF
+
+        if keypoint_writer is not None:
+            keypoint_writer.close()
 
     # Cleanup
     cv2.destroyAllWindows()
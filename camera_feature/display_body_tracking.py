@@ -1,13 +1,12 @@
-import sys
-import numpy as np
 import pyzed.sl as sl
 import cv2
 import os
+from camera_feature import frame_processing
+from camera_feature import keypoint_store
+from camera_feature import svo_session
 
 
-def run():
-    zed = sl.Camera()
-
+def run(record_keypoints=False):
     video_folder = os.path.join(os.path.dirname(__file__), '..', 'captured_videos')
     video_files = [f for f in os.listdir(video_folder) if f.endswith('.svo2')]
 
@@ -32,17 +31,13 @@ def run():
     input_file = os.path.join(video_folder, video_files[choice - 1])
     print(f"Playing body tracking video: {video_files[choice - 1]}")
 
-    input_type = sl.InputType()
-    input_type.set_from_svo_file(input_file)
-
-    init = sl.InitParameters(input_t=input_type)
-    init.camera_resolution = sl.RESOLUTION.HD1080
-    init.depth_mode = sl.DEPTH_MODE.NEURAL
-    init.coordinate_units = sl.UNIT.MILLIMETER
+    session = svo_session.SvoSession(input_file, {"image": sl.VIEW.LEFT})
+    zed = session.zed
+    session.runtime_params.measure3D_reference_frame = sl.REFERENCE_FRAME.WORLD
 
-    if zed.open(init) != sl.ERROR_CODE.SUCCESS:
+    if session.open() != sl.ERROR_CODE.SUCCESS:
         print("Failed to open ZED camera.")
-        zed.close()
+        session.close()
         exit(1)
 
     # Enable positional tracking
@@ -58,41 +53,45 @@ def run():
 
     if zed.enable_body_tracking(body_tracking_params) != sl.ERROR_CODE.SUCCESS:
         print("Failed to enable body tracking.")
-        zed.close()
+        session.close()
         exit(1)
 
-    runtime_params = sl.RuntimeParameters()
-    runtime_params.measure3D_reference_frame = sl.REFERENCE_FRAME.WORLD
     body_runtime_params = sl.BodyTrackingRuntimeParameters()
     body_runtime_params.detection_confidence_threshold = 40
+    session.enable_bodies(body_runtime_params)
+    session.start()
 
-    image = sl.Mat()
-    bodies = sl.Bodies()
+    # On request the first pass also goes to a columnar keypoint store next to the SVO, unless one is there
+    keypoint_writer = keypoint_store.writer_for(input_file) if record_keypoints else None
+    if keypoint_writer is not None:
+        print(f"Recording keypoints to {keypoint_writer.path}")
 
     key = ' '
     print("Press 'q' to quit.")
     while key != 113:  # ASCII for 'q'
-        if zed.grab(runtime_params) == sl.ERROR_CODE.SUCCESS:
-            zed.retrieve_image(image, sl.VIEW.LEFT)
-            zed.retrieve_bodies(bodies, body_runtime_params)
-            img_np = image.get_data()
-
-            for body in bodies.body_list:
-                if body.tracking_state == sl.OBJECT_TRACKING_STATE.OK:
-                    for kp in body.keypoint_2d:
-                        if not np.isnan(kp[0]) and not np.isnan(kp[1]):
-                            cv2.circle(img_np, (int(kp[0]), int(kp[1])), 3, (0, 255, 0), -1)
+        frame = session.read(timeout=1.0)
+        if frame is not None:
+            if frame.looped:
+                print("End of file reached. Looping back.")
+                if keypoint_writer is not None:
+                    if keypoint_writer.close(complete=keypoint_writer.frames_written >= session.number_of_frames):
+                        print(f"Keypoints of {keypoint_writer.frames_written} frames saved.")
+                    keypoint_writer = None
+            if keypoint_writer is not None:
+                keypoint_writer.append(frame.timestamp_ns, frame.bodies)
+            img_np = frame["image"]
+
+            frame_processing.draw_body_keypoints(img_np, frame.bodies, sl.OBJECT_TRACKING_STATE.OK)
 
             cv2.imshow("Body Tracking", img_np)
 
-        elif err == sl.ERROR_CODE.END_OF_SVOFILE_REACHED:
-            print("End of file reached. Looping back.")
-            zed.set_svo_position(0)
-
         key = cv2.waitKey(10)
 
     cv2.destroyAllWindows()
-    zed.close()
+    session.close()
+    if keypoint_writer is not None:
+        # Quit before the end: the partial pass is discarded
+        keypoint_writer.close()
     print("\nFINISH")
 
 
@@ -1,14 +1,11 @@
-import sys
-import numpy as np
 import pyzed.sl as sl
 import cv2
 import os
+from camera_feature import frame_processing
+from camera_feature import svo_session
 
 
 def run():
-    # Create a ZED camera object
-    zed = sl.Camera()
-
     # Path to the folder containing the videos
     video_folder = os.path.join(os.path.dirname(__file__), '..', 'captured_videos')
 
@@ -39,46 +36,31 @@ def run():
 
     print(f"Playing confidence map video: {video_files[choice - 1]}")
 
-    input_type = sl.InputType()
-    input_type.set_from_svo_file(input_file)
-
-    init = sl.InitParameters(input_t=input_type)
-    init.camera_resolution = sl.RESOLUTION.HD1080
-    init.depth_mode = sl.DEPTH_MODE.NEURAL
-    init.coordinate_units = sl.UNIT.MILLIMETER
-
-    err = zed.open(init)
+    # One session for the whole playback: the depth model is loaded once and the file loops in place
+    session = svo_session.SvoSession(input_file, {"confidence": sl.MEASURE.CONFIDENCE})
+    err = session.open()
     if err != sl.ERROR_CODE.SUCCESS:
         print(repr(err))
-        zed.close()
+        session.close()
         exit(1)
-
-    runtime = sl.RuntimeParameters()
-    image_size = zed.get_camera_information().camera_configuration.resolution
-
-    confidence_map = sl.Mat(image_size.width, image_size.height, sl.MAT_TYPE.U8_C1)
+    session.start()
 
     key = ' '
     print('Press q to close the playback window')
     while key != 113:  # 'q' to quit
-        err = zed.grab(runtime)
-        if err == sl.ERROR_CODE.SUCCESS:
-            zed.retrieve_measure(confidence_map, sl.MEASURE.CONFIDENCE)
-            confidence_np = confidence_map.get_data()
-            normalized_confidence = cv2.normalize(confidence_np, None, 0, 255, cv2.NORM_MINMAX).astype(np.uint8)
-            colored_map = cv2.applyColorMap(normalized_confidence, cv2.COLORMAP_JET)
+        frame = session.read(timeout=1.0)
+        if frame is not None:
+            if frame.looped:
+                print("End of file reached. Looping back.")
+            normalized_confidence = frame_processing.normalize_confidence(frame["confidence"])
+            colored_map = frame_processing.colorize_confidence(normalized_confidence)
 
             cv2.imshow("Confidence Map", colored_map)
 
-        elif err == sl.ERROR_CODE.END_OF_SVOFILE_REACHED:
-            print("End of file reached. Looping back.")
-            zed.close()
-            zed.open(init)
-
         key = cv2.waitKey(10)
 
     cv2.destroyAllWindows()
-    zed.close()
+    session.close()
     print("\nFINISH")
 
 
@@ -1,7 +1,7 @@
-import cv2 as cv
 import os
 import sys
 import math
+from camera_feature import frame_index
 
 def compute_fov(focal_length_px, resolution_width):
     # Compute horizontal FoV in degrees
@@ -33,15 +33,10 @@ def run():
     video_file = os.path.join(video_folder, selected_video)
     print(f"Playing video: {selected_video}")
 
-    cap = cv.VideoCapture(video_file)
-    if not cap.isOpened():
-        print("Error: Could not open the video file.")
-        return
-
-    fps = cap.get(cv.CAP_PROP_FPS)
-    width = int(cap.get(cv.CAP_PROP_FRAME_WIDTH))
-    height = int(cap.get(cv.CAP_PROP_FRAME_HEIGHT))
-    total_frames = int(cap.get(cv.CAP_PROP_FRAME_COUNT))
+    # Recording facts come from the frame index sidecar, built on first use
+    index = frame_index.load(video_file)
+    fps = index.fps
+    width, height = index.resolution
 
     # === INSERT YOUR FOCAL LENGTH IN PIXELS (fx) HERE ===
     fx = 300.0  # <-- Replace with real value from calibration
@@ -54,7 +49,5 @@ def run():
     print(f"Aspect Ratio: {aspect_ratio:.2f}")
     print(f"Horizontal FoV (approx): {fov:.2f} degrees")
 
-    cap.release()
-
 if __name__ == "__main__":
     run()
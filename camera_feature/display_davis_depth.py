@@ -0,0 +1,89 @@
+import os
+import sys
+import time
+import numpy as np
+import pyzed.sl as sl
+import cv2
+from camera_feature import depth_colorizer
+from camera_feature import depth_reprojection
+from camera_feature import svo_session
+
+STATS_INTERVAL_S = 2.0
+
+
+def run():
+    video_folder = os.path.join(os.path.dirname(__file__), '..', 'captured_videos')
+    calib_path = os.path.join(os.path.dirname(__file__), '..', 'stereo_calibration.npz')
+    video_files = [f for f in os.listdir(video_folder) if f.endswith('.svo2')]
+
+    if not video_files:
+        print("No SVO files found in the directory.")
+        sys.exit(1)
+
+    print("Available video files:")
+    for idx, video in enumerate(video_files, 1):
+        print(f"{idx}. {video}")
+
+    choice = input(f"Select a video (1-{len(video_files)}): ")
+    try:
+        choice = int(choice)
+        if not (1 <= choice <= len(video_files)):
+            raise ValueError
+    except ValueError:
+        print("Invalid choice. Exiting.")
+        sys.exit(1)
+
+    input_file = os.path.join(video_folder, video_files[choice - 1])
+    print(f"Playing video: {video_files[choice - 1]}")
+
+    session = svo_session.SvoSession(input_file, {"depth": sl.MEASURE.DEPTH})
+    if session.open() != sl.ERROR_CODE.SUCCESS:
+        print("ZED initialization failed.")
+        session.close()
+        sys.exit(1)
+    session.start()
+
+    # Per-pixel rays and the DAVIS grid are built once for the depth resolution
+    resolution = session.resolution
+    reprojector = depth_reprojection.DepthReprojector(dict(np.load(calib_path)), (resolution.width, resolution.height))
+    colorizer = depth_colorizer.DepthColorizer()
+    print(f"Reprojecting {reprojector.roi_fraction * 100:.0f}% of the ZED frame (stride {reprojector.stride}) "
+          f"into {reprojector.davis_size[0]}x{reprojector.davis_size[1]}")
+
+    cv2.namedWindow("Depth in DAVIS view", cv2.WINDOW_NORMAL)
+
+    shown = 0
+    reproject_seconds = 0.0
+    last_report = time.perf_counter()
+    key = ' '
+    print("Press 'q' to quit.")
+    while key != 113:  # ASCII for 'q'
+        frame = session.read(timeout=1.0)
+        if frame is not None:
+            if frame.looped:
+                print("End of file reached. Looping back.")
+
+            start = time.perf_counter()
+            davis_depth = reprojector.reproject(frame["depth"])
+            reproject_seconds += time.perf_counter() - start
+            shown += 1
+
+            cv2.imshow("Depth in DAVIS view", colorizer.colorize(davis_depth))
+
+        now = time.perf_counter()
+        if now - last_report >= STATS_INTERVAL_S and shown:
+            print(f"{shown} frames, reprojection {reproject_seconds / shown * 1000:.1f} ms per frame, "
+                  f"{reprojector.projected_points} points")
+            last_report = now
+
+        key = cv2.waitKey(1) & 0xFF
+
+    cv2.destroyAllWindows()
+    session.close()
+    if shown:
+        print(f"Reprojection {reproject_seconds / shown * 1000:.1f} ms per frame over {shown} frames")
+    print("\nFINISH")
+
+
+if __name__ == "__main__":
+    run()
@@ -2,8 +2,13 @@ import dv_processing as dv
 import cv2 as cv
 from datetime import timedelta
 import os
+import time
+from camera_feature import shared_frame_ring
+from camera_feature import event_accumulator
+from camera_feature import event_recording
+from camera_feature import frame_index
 
-def run(recording_flag):
+def run(recording_flag, frame_ring_name=None):
     # Open the camera, just use first detected DAVIS camera
     camera = dv.io.CameraCapture("", dv.io.CameraCapture.CameraType.DAVIS)
 
@@ -21,8 +26,16 @@ def run(recording_flag):
         dv.visualization.colors.red()
     )
 
+    # Publish frames to a shared-memory ring so other processes can consume them without copies
+    frame_ring = shared_frame_ring.SharedFrameRing.attach(frame_ring_name) if frame_ring_name else None
+
+    # Count images, signed sums and time surfaces of every slice, at full event rate
+    event_width, event_height = camera.getEventResolution()
+    accumulator = event_accumulator.EventAccumulator(event_width, event_height)
+
     # Create a window for image display
     cv.namedWindow("Preview", cv.WINDOW_NORMAL)
+    cv.namedWindow("Time Surface", cv.WINDOW_NORMAL)
 
     # Create output directory
     output_dir = "captured_davis_video"
@@ -31,11 +44,15 @@ def run(recording_flag):
 
     # Initialize video writer (for saving the video)
     video_writer = None
+    frame_times_file = None
     recording = False
 
+    # Raw events with timestamps, one .events recording per recording session
+    event_writer = None
+
     # Callback method for time-based slicing
     def display_preview(data):
-        nonlocal recording, video_writer
+        nonlocal recording, video_writer, frame_times_file, event_writer
 
         # Retrieve frame data
         frames = data.getFrames("frames")
@@ -43,6 +60,14 @@ def run(recording_flag):
         # Retrieve event data
         events = data.getEvents("events")
 
+        # Per-slice counts, time surface decays across slices
+        accumulator.reset_counts()
+        accumulator.accumulate(events)
+
+        # Record every event of the slice, including slices without an APS frame
+        if event_writer is not None:
+            event_writer.append(events)
+
         # Retrieve and color convert the latest frame
         latest_image = None
         if len(frames) > 0:
@@ -53,8 +78,13 @@ def run(recording_flag):
         else:
             return
 
+        if frame_ring is not None:
+            # DAVIS timestamps are in microseconds, the ring stores nanoseconds
+            frame_ring.write(latest_image, frames[-1].timestamp * 1000)
+
         # Show the preview
         cv.imshow("Preview", visualizer.generateImage(events, latest_image))
+        cv.imshow("Time Surface", accumulator.combined_time_surface())
 
         # If recording, write the frame to video file
         if recording and latest_image is not None:
@@ -63,22 +93,35 @@ def run(recording_flag):
                 fourcc = cv.VideoWriter_fourcc(*'XVID')  # Video codec
                 filename = os.path.join(output_dir, "recording.avi")
                 video_writer = cv.VideoWriter(filename, fourcc, 30.0, (latest_image.shape[1], latest_image.shape[0]))
+                # Capture timestamp (us) of every video frame, picked up by the frame index
+                frame_times_file = open(frame_index.frame_times_path(filename), "wb")
 
             video_writer.write(latest_image)
+            frame_times_file.write(int(frames[-1].timestamp).to_bytes(8, "little", signed=True))
+            if event_writer is not None:
+                event_writer.append_frame(frames[-1].timestamp)
 
         # Check for keyboard events (Spacebar for recording toggle, ESC to quit)
         key = cv.waitKey(1) & 0xFF
         if key == 27:  # ESC key to exit
             if video_writer:
                 video_writer.release()  # Release the video writer if open
+                frame_times_file.close()
+            if event_writer:
+                event_writer.close()
             exit(0)
         elif key == 32:  # Spacebar to start/stop recording
             recording = not recording
             recording_flag.value = recording  # Update the shared flag
             if recording:
-                print("Starting recording.")
+                timestamp = time.strftime("%Y%m%d_%H%M%S")
+                event_path = os.path.join(output_dir, f"recording_{timestamp}.events")
+                event_writer = event_recording.EventRecordingWriter(event_path, camera.getEventResolution())
+                print(f"Starting recording. Events go to {event_path}")
             else:
-                print("Stopping recording.")
+                event_writer.close()
+                print(f"Stopping recording. {event_writer.events_written} events saved.")
+                event_writer = None
 
     # Register a job every 40ms
     slicer.doEveryTimeInterval(timedelta(milliseconds=40), display_preview)
@@ -93,6 +136,12 @@ def run(recording_flag):
         if frame is not None:
             slicer.accept("frames", [frame])
 
+    if video_writer:
+        video_writer.release()
+        frame_times_file.close()
+    if event_writer:
+        event_writer.close()
+
 
 if __name__ == "__main__":
     # Add recording_flag to track state across both processes
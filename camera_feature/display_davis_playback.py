@@ -1,6 +1,8 @@
 import cv2 as cv
 import os
 import sys
+from camera_feature import video_scrubber
+from camera_feature import playback_clock
 
 def run():
     # Path to the folder containing the videos, one level behind the current directory
@@ -33,37 +35,90 @@ def run():
     selected_video = video_files[choice - 1]
     video_file = os.path.join(video_folder, selected_video)
 
-    # Open the selected video
-    cap = cv.VideoCapture(video_file)
-
-    if not cap.isOpened():
+    # Open the selected video with keyframe-aware random access and a decoded-frame cache
+    try:
+        reader = video_scrubber.ScrubbingReader(video_file)
+    except RuntimeError:
         print("Error: Could not open the video file.")
         return
+    total_frames = len(reader)
+    if total_frames == 0:
+        print("Error: The video has no frames.")
+        return
+
+    # Frames are paced against presentation deadlines, late frames are dropped
+    clock = playback_clock.PlaybackClock(reader.fps)
 
-    # Get the video's frame rate (FPS)
-    fps = cap.get(cv.CAP_PROP_FPS)
+    print("Controls: SPACE play/pause, r reverse, a/d step back/forward, j/l jump -/+1 s, "
+          "-/+ speed, b benchmark, ESC/q exit")
 
-    # Calculate the delay between frames to match the FPS
-    frame_delay = int(1000 / fps)  # Delay in milliseconds
+    frame_number = 0
+    playing = True
+    direction = 1
+    jump = max(int(round(reader.fps)), 1)
+
+    # The trackbar is the timeline, dragging it jumps to that frame
+    def on_trackbar(position):
+        nonlocal frame_number
+        if position != frame_number:
+            frame_number = position
+            clock.restart()
+
+    cv.namedWindow("Playback")
+    cv.createTrackbar("Frame", "Playback", 0, total_frames - 1, on_trackbar)
 
     while True:
-        # Read the next frame
-        ret, frame = cap.read()
-        if not ret:
-            print("End of video reached. Looping back.")
-            cap.set(cv.CAP_PROP_POS_FRAMES, 0)  # Loop back to the start
-            continue  # Continue to the next iteration to restart playback
+        frame = reader.read(frame_number)
+        if frame is None:
+            print("Error: Could not decode frame", frame_number)
+            break
 
-        # Display the frame
-        cv.imshow("Playback", frame)
+        # Display the frame with the position and cache state
+        display = frame.copy()
+        cache = reader.cache
+        cv.putText(display, f"{frame_number + 1}/{total_frames} {'>' if direction > 0 else '<'}"
+                            f"{'' if playing else ' paused'}", (5, 15), cv.FONT_HERSHEY_SIMPLEX, 0.4,
+                   (0, 255, 0), 1)
+        cv.putText(display, f"cache {cache.hit_rate * 100:.0f}% hit, {len(cache)} frames, "
+                            f"{cache.bytes / (1024 * 1024):.0f} MB", (5, 32), cv.FONT_HERSHEY_SIMPLEX, 0.4,
+                   (0, 255, 0), 1)
+        cv.putText(display, clock.status(), (5, 49), cv.FONT_HERSHEY_SIMPLEX, 0.4, (0, 255, 0), 1)
+        cv.imshow("Playback", display)
+        cv.setTrackbarPos("Frame", "Playback", frame_number)
 
         # Check for key events
-        key = cv.waitKey(frame_delay) & 0xFF
-        if key == 27:  # ESC key to exit
+        key = cv.waitKey(clock.wait_ms() if playing else 0) & 0xFF
+        if key == 27 or key == ord('q'):  # ESC or q to exit
             break
-
-    cap.release()
-    cv.destroyAllWindows()  
+        elif key == 32:  # Spacebar to play/pause
+            playing = not playing
+            clock.restart()
+        elif key == ord('r'):
+            direction = -direction
+            clock.restart()
+        elif clock.handle_key(key):
+            pass
+        elif key == ord('a'):
+            playing = False
+            frame_number -= 1
+        elif key == ord('d'):
+            playing = False
+            frame_number += 1
+        elif key == ord('j'):
+            frame_number -= jump
+            clock.restart()
+        elif key == ord('l'):
+            frame_number += jump
+            clock.restart()
+        elif playing:
+            frame_number += direction * clock.advance()
+
+        # Loop around at either end
+        frame_number %= total_frames
+
+    print(f"Playback: {clock.presented} frames shown, {clock.dropped} dropped")
+    reader.release()
+    cv.destroyAllWindows()
 
 if __name__ == "__main__":
     run()
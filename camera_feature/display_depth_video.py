@@ -2,11 +2,10 @@ import sys
 import pyzed.sl as sl
 import cv2
 import os
+from camera_feature import depth_colorizer
+from camera_feature import svo_session
 
 def run():
-    # Create a ZED camera object
-    zed = sl.Camera()
-
     # Path to the folder containing the videos, go one level up from the current directory
     video_folder = os.path.join(os.path.dirname(__file__), '..', 'captured_videos')
 
@@ -37,61 +36,37 @@ def run():
 
     print(f"Playing video: {video_files[choice - 1]}")
 
-    input_type = sl.InputType()
-    input_type.set_from_svo_file(input_file)
-
-    init = sl.InitParameters(input_t=input_type)
-    init.camera_resolution = sl.RESOLUTION.HD1080
-    init.depth_mode = sl.DEPTH_MODE.NEURAL
-    init.coordinate_units = sl.UNIT.MILLIMETER
-
-    # Open the ZED camera or load the SVO file
-    err = zed.open(init)
+    # One session for the whole playback: the depth model is loaded once and the file loops in place
+    session = svo_session.SvoSession(input_file, {"depth": sl.MEASURE.DEPTH})
+    err = session.open()
     if err != sl.ERROR_CODE.SUCCESS:
         print(repr(err))
-        zed.close()
+        session.close()
         exit(1)
+    session.start()
 
-    # Prepare runtime parameters
-    runtime = sl.RuntimeParameters()
-
-    # Get the resolution of the SVO file
-    image_size = zed.get_camera_information().camera_configuration.resolution
-
-    # Declare the image matrix for depth data
-    depth_image = sl.Mat(image_size.width, image_size.height, sl.MAT_TYPE.U8_C4)
+    # Metric depth in millimetres, coloured over a fixed range so colours stay stable between frames
+    colorizer = depth_colorizer.DepthColorizer()
 
     key = ' '
     print('Press q to close the playback window')
     while key != 113:  # 'q' to quit
-        err = zed.grab(runtime)
-        if err == sl.ERROR_CODE.SUCCESS:
-            # Retrieve the depth image from the SVO file
-            zed.retrieve_image(depth_image, sl.VIEW.DEPTH, sl.MEM.CPU, image_size)
-
-            # Convert depth data to OpenCV format
-            depth_ocv = depth_image.get_data()
+        frame = session.read(timeout=1.0)
+        if frame is not None:
+            if frame.looped:
+                print("End of file reached. Looping back.")
 
-            # Normalize depth image for better visualization (optional)
-            depth_ocv = cv2.normalize(depth_ocv, None, 0, 255, cv2.NORM_MINMAX)
-            depth_ocv = cv2.convertScaleAbs(depth_ocv)
+            # Colour it through the lookup table, invalid depth stays black
+            depth_ocv = colorizer.colorize(frame["depth"])
 
             # Display the depth image in OpenCV window
             cv2.imshow("Depth Image", depth_ocv)
 
-        # Check if the end of the SVO file is reached and reset
-        elif err == sl.ERROR_CODE.END_OF_SVOFILE_REACHED:
-            print("End of file reached. Looping back.")
-
-            # Close and reopen the SVO file to reset playback
-            zed.close()
-            zed.open(init)  # Reopen the file from the beginning
-
         # Wait for a key press to continue
         key = cv2.waitKey(10)
 
     cv2.destroyAllWindows()
-    zed.close()
+    session.close()
     print("\nFINISH")
 
 if __name__ == "__main__":
@@ -1,34 +1,44 @@
-import sys
-import numpy as np
 import pyzed.sl as sl
 import cv2
 import os
 import time
 import multiprocessing
+from camera_feature import camera_service
+from camera_feature import roi_pipeline
+from camera_feature import shared_frame_ring
 
 def get_next_filename(directory, base_filename):
     timestamp = time.strftime("%Y%m%d_%H%M%S")
     return os.path.join(directory, f"{base_filename}_{timestamp}.svo")
 
-def run(recording_flag):
-    zed = sl.Camera()
-
+def run(recording_flag, frame_ring_name=None, service_address=None, output_path=None):
     directory = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "captured_videos")
     os.makedirs(directory, exist_ok=True)
 
-    output_path = get_next_filename(directory, "captured_video")
-
-    resolution = sl.RESOLUTION.VGA
-
-    init_params = sl.InitParameters()
-    init_params.camera_resolution = resolution
-    init_params.camera_fps = 30
-    init_params.depth_mode = sl.DEPTH_MODE.NEURAL
-    init_params.coordinate_units = sl.UNIT.MILLIMETER
-
-    if zed.open(init_params) != sl.ERROR_CODE.SUCCESS:
-        print("Failed to open camera")
-        return
+    if output_path is None:
+        output_path = get_next_filename(directory, "captured_video")
+
+    if service_address is not None:
+        # Frames come from the running camera service, the device and depth model are already warm
+        zed = None
+        client = camera_service.CameraClient(service_address)
+        service_frames = client.attach(("left", "depth", "confidence"))
+        if service_frames is None:
+            client.close()
+            return
+    else:
+        zed = sl.Camera()
+        resolution = sl.RESOLUTION.VGA
+
+        init_params = sl.InitParameters()
+        init_params.camera_resolution = resolution
+        init_params.camera_fps = 30
+        init_params.depth_mode = sl.DEPTH_MODE.NEURAL
+        init_params.coordinate_units = sl.UNIT.MILLIMETER
+
+        if zed.open(init_params) != sl.ERROR_CODE.SUCCESS:
+            print("Failed to open camera")
+            return
 
     cv2.namedWindow("RGB View", cv2.WINDOW_NORMAL)
     cv2.namedWindow("Depth Map", cv2.WINDOW_NORMAL)
@@ -39,6 +49,9 @@ def run(recording_flag):
     cv2.moveWindow("Depth Map", 640, 0)
     cv2.moveWindow("Confidence Map", 0, 480)
 
+    # Publish frames to a shared-memory ring so other processes can consume them without copies
+    frame_ring = shared_frame_ring.SharedFrameRing.attach(frame_ring_name) if frame_ring_name else None
+
     recording = False
     runtime_params = sl.RuntimeParameters()
 
@@ -46,58 +59,49 @@ def run(recording_flag):
     depth = sl.Mat()
     confidence = sl.Mat()
 
+    # FoV adjustment (ZED -> DAVIS): crop window and output size are computed once
+    pipeline = roi_pipeline.RoiPipeline(zoom_factor=3.0)
+
     key = ' '
     print("Press 'q' to quit.")
     while key != 113:  # ASCII for 'q'
-        if zed.grab(runtime_params) == sl.ERROR_CODE.SUCCESS:
-            zed.retrieve_image(image, sl.VIEW.LEFT)
-            zed.retrieve_image(depth, sl.VIEW.DEPTH)
-            zed.retrieve_measure(confidence, sl.MEASURE.CONFIDENCE)
-
-            img_np = image.get_data()
-
-            # FoV adjustment (ZED -> DAVIS)
-            zoom_factor = 3.0
-
-            h, w, _ = img_np.shape
-            zoom_w = int(w / zoom_factor)
-            zoom_h = int(h / zoom_factor)
-
-            start_x = (w - zoom_w) // 2
-            start_y = (h - zoom_h) // 2
-            img_np = img_np[start_y:start_y + zoom_h, start_x:start_x + zoom_w]
-
-            # Resize while preserving aspect ratio
-            target_aspect_ratio = 1.33
-            window_width = 1280
-            window_height = 720
-
-            new_height = int(window_width / target_aspect_ratio)
-            if new_height > window_height:
-                new_height = window_height
-                new_width = int(new_height * target_aspect_ratio)
-            else:
-                new_width = window_width
-
-            img_resized = cv2.resize(img_np, (new_width, new_height))
+        if zed is None:
+            frame_set = service_frames.read(timeout=0.1)
+            grabbed = frame_set is not None
+            if grabbed:
+                timestamp_ns, frames = frame_set
+                img_np, depth_data, conf_data = frames["left"], frames["depth"], frames["confidence"]
+        else:
+            grabbed = zed.grab(runtime_params) == sl.ERROR_CODE.SUCCESS
+            if grabbed:
+                zed.retrieve_image(image, sl.VIEW.LEFT)
+                zed.retrieve_measure(depth, sl.MEASURE.DEPTH)
+                zed.retrieve_measure(confidence, sl.MEASURE.CONFIDENCE)
+                timestamp_ns = zed.get_timestamp(sl.TIME_REFERENCE.IMAGE).get_nanoseconds()
+                img_np, depth_data, conf_data = image.get_data(), depth.get_data(), confidence.get_data()
+
+        if grabbed:
+            if frame_ring is not None:
+                frame_ring.write(img_np, timestamp_ns)
+
+            pipeline.begin_frame()
+
+            # Crop before any per-pixel work, then resize into reused buffers
+            img_resized = pipeline.process_rgb(img_np)
 
             # Depth map
-            depth_data = depth.get_data()
             if depth_data is None:
                 continue
-            depth_map = cv2.normalize(depth_data, None, 0, 255, cv2.NORM_MINMAX)
-            depth_map = cv2.convertScaleAbs(depth_map)
-            depth_map = depth_map[start_y:start_y + zoom_h, start_x:start_x + zoom_w]
-            depth_map = cv2.resize(depth_map, (new_width, new_height))
+            depth_map = pipeline.process_depth(depth_data)
 
             # Confidence map
-            conf_data = confidence.get_data()
             if conf_data is None:
                 continue
-            conf_map = cv2.normalize(conf_data, None, 0, 255, cv2.NORM_MINMAX).astype(np.uint8)
-            conf_map = cv2.applyColorMap(conf_map, cv2.COLORMAP_JET)
-            conf_map = conf_map[start_y:start_y + zoom_h, start_x:start_x + zoom_w]
-            conf_map = cv2.resize(conf_map, (new_width, new_height))
+            conf_map = pipeline.process_confidence(conf_data)
+
+            allocations = pipeline.end_frame()
+            if allocations:
+                print(f"Frame {pipeline.frames}: {allocations} buffer allocation(s)")
 
             if recording:
                 cv2.putText(img_resized, "REC", (20, 50), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
@@ -108,23 +112,36 @@ def run(recording_flag):
 
             if recording_flag.value and not recording:
                 recording = True
-                recording_params = sl.RecordingParameters(output_path, sl.SVO_COMPRESSION_MODE.H264)
-                err = zed.enable_recording(recording_params)
-                if err != sl.ERROR_CODE.SUCCESS:
-                    print(f"Failed to start recording: {err}")
-                    zed.close()
-                    return
+                if zed is None:
+                    reply = client.request("record_start", path=output_path)
+                    error = None if reply["ok"] else reply["error"]
+                else:
+                    recording_params = sl.RecordingParameters(output_path, sl.SVO_COMPRESSION_MODE.H264)
+                    err = zed.enable_recording(recording_params)
+                    error = None if err == sl.ERROR_CODE.SUCCESS else f"Failed to start recording: {err}"
+                if error:
+                    print(error)
+                    break
                 print("Recording started...")
 
             if not recording_flag.value and recording:
-                zed.disable_recording()
+                if zed is None:
+                    client.request("record_stop")
+                else:
+                    zed.disable_recording()
                 recording = False
                 print("Recording stopped.")
 
         key = cv2.waitKey(10)
 
-    zed.close()
+    if zed is None:
+        if recording:
+            client.request("record_stop")
+        client.close()
+    else:
+        zed.close()
     cv2.destroyAllWindows()
+    print(f"Buffer allocations: {pipeline.total_allocations} over {pipeline.frames} frames")
     print(f"SVO file saved to {output_path}")
     print("\nFINISH")
 
@@ -0,0 +1,101 @@
+import numpy as np
+
+# Vectorized event-to-frame representations for DAVIS event batches.
+#
+# Batches are structured NumPy arrays with x, y, polarity and a timestamp field named either
+# 't' or 'timestamp' (the layout of dv.EventStore.numpy()), in microseconds and sorted by time.
+# All images live in buffers allocated once; accumulate() only does bincount / scatter work.
+
+
+def as_event_array(events):
+    # Accept a dv.EventStore (or anything with .numpy()) as well as a plain structured array
+    return events.numpy() if hasattr(events, "numpy") else events
+
+
+def _timestamps(events):
+    return events["t"] if "t" in events.dtype.names else events["timestamp"]
+
+
+class EventAccumulator:
+    def __init__(self, width, height, decay_us=30000.0):
+        self.width = width
+        self.height = height
+        self.decay_us = decay_us
+        size = width * height
+
+        # Index 0 = negative (OFF), 1 = positive (ON) polarity
+        self.counts = np.zeros((2, size), np.uint32)
+        self.timestamps = np.full((2, size), np.iinfo(np.int64).min // 2, np.int64)
+        self.latest_t = 0
+
+        # Output buffers, reused between calls
+        self.signed = np.empty(size, np.int32)
+        self.delta = np.empty((2, size), np.int64)
+        self.surface = np.empty((2, size), np.float32)
+        self.combined = np.empty(size, np.float32)
+        self.events_seen = 0
+
+    def reset_counts(self):
+        self.counts.fill(0)
+
+    def reset(self):
+        self.counts.fill(0)
+        self.timestamps.fill(np.iinfo(np.int64).min // 2)
+        self.latest_t = 0
+        self.events_seen = 0
+
+    def accumulate(self, events):
+        events = as_event_array(events)
+        if len(events) == 0:
+            return
+        # Flat index into the (2, H*W) buffers: polarity plane, then pixel
+        index = events["y"].astype(np.intp)
+        index *= self.width
+        index += events["x"]
+        index += events["polarity"].astype(np.intp) * (self.width * self.height)
+
+        size = 2 * self.width * self.height
+        flat_counts = self.counts.reshape(-1)
+        flat_counts += np.bincount(index, minlength=size).astype(np.uint32, copy=False)
+
+        # A pixel can appear several times in a batch, and fancy-index assignment does not say which
+        # of the repeated writes wins; maximum.at keeps the most recent timestamp
+        timestamps = _timestamps(events)
+        np.maximum.at(self.timestamps.reshape(-1), index, timestamps)
+        self.latest_t = max(self.latest_t, int(timestamps[-1]))
+        self.events_seen += len(events)
+
+    # --- Representations (views into reused buffers, valid until the next call) ---
+
+    def count_image(self, polarity=None):
+        # Events per pixel for one polarity (0/1), or both summed
+        if polarity is not None:
+            return self.counts[polarity].reshape(self.height, self.width)
+        np.add(self.counts[0], self.counts[1], out=self.signed, casting="unsafe")
+        return self.signed.reshape(self.height, self.width)
+
+    def signed_image(self):
+        # ON minus OFF events per pixel
+        np.subtract(self.counts[1], self.counts[0], out=self.signed, casting="unsafe")
+        return self.signed.reshape(self.height, self.width)
+
+    def timestamp_image(self, polarity=1):
+        # Most recent event timestamp per pixel (us); untouched pixels hold a large negative value
+        return self.timestamps[polarity].reshape(self.height, self.width)
+
+    def time_surface(self, t_ref=None, polarity=None):
+        # exp(-(t_ref - t_last) / decay) per pixel and polarity, 1.0 = event right now, 0.0 = never
+        t_ref = self.latest_t if t_ref is None else t_ref
+        np.subtract(t_ref, self.timestamps, out=self.delta)
+        np.multiply(self.delta, -1.0 / self.decay_us, out=self.surface, casting="unsafe")
+        np.exp(self.surface, out=self.surface)
+        surface = self.surface.reshape(2, self.height, self.width)
+        if polarity is None:
+            return surface
+        return surface[polarity]
+
+    def combined_time_surface(self, t_ref=None):
+        # Time surface of the most recent event of either polarity
+        surface = self.time_surface(t_ref).reshape(2, -1)
+        np.maximum(surface[0], surface[1], out=self.combined)
+        return self.combined.reshape(self.height, self.width)
@@ -0,0 +1,177 @@
+import bisect
+import json
+import os
+import numpy as np
+
+# Append-only, chunked raw event recording.
+#
+# A recording is a directory (<name>.events/) holding:
+#   meta.json         sensor resolution and record layout
+#   chunk_NNNNNN.npy  packed x:uint16, y:uint16, t:int64 (us), p:uint8 records, time-sorted
+#   index.bin         one (first_t, last_t, count) int64 record per chunk, appended after the chunk
+#   frame_times.bin   int64 timestamp (us) of every APS frame written to the matching video
+#
+# Chunks are plain .npy files, so the reader memory-maps them and hands out zero-copy views.
+# Seeking by time is a binary search over the chunk index followed by one inside the chunk.
+
+EVENT_DTYPE = np.dtype([("x", "<u2"), ("y", "<u2"), ("t", "<i8"), ("p", "u1")])
+INDEX_DTYPE = np.dtype([("first_t", "<i8"), ("last_t", "<i8"), ("count", "<i8")])
+
+DEFAULT_CHUNK_EVENTS = 1 << 20
+FORMAT_VERSION = 1
+
+
+def _chunk_path(path, chunk_number):
+    return os.path.join(path, f"chunk_{chunk_number:06d}.npy")
+
+
+def _search_t(chunk, timestamp):
+    # Offset of the first event with t >= timestamp. The "t" field of a packed chunk is a strided
+    # view, which np.searchsorted would copy (paging in the whole chunk); bisect reads ~log2(n) events.
+    return bisect.bisect_left(chunk["t"], timestamp)
+
+
+class EventRecordingWriter:
+    def __init__(self, path, resolution, chunk_events=DEFAULT_CHUNK_EVENTS):
+        self.path = path
+        self.chunk_events = chunk_events
+        os.makedirs(path, exist_ok=True)
+
+        with open(os.path.join(path, "meta.json"), "w") as f:
+            json.dump({
+                "version": FORMAT_VERSION,
+                "width": int(resolution[0]),
+                "height": int(resolution[1]),
+                "dtype": EVENT_DTYPE.descr,
+                "time_unit": "us",
+            }, f)
+
+        self.frame_times_file = open(os.path.join(path, "frame_times.bin"), "ab")
+        self.index_file = open(os.path.join(path, "index.bin"), "ab")
+        self.chunk_number = os.path.getsize(os.path.join(path, "index.bin")) // INDEX_DTYPE.itemsize
+        self.buffer = np.empty(chunk_events, EVENT_DTYPE)
+        self.filled = 0
+        self.events_written = 0
+
+    def append(self, events):
+        # Accepts dv.EventStore, dv's (timestamp, x, y, polarity) arrays or EVENT_DTYPE arrays
+        events = events.numpy() if hasattr(events, "numpy") else events
+        names = events.dtype.names
+        t = events["t"] if "t" in names else events["timestamp"]
+        p = events["p"] if "p" in names else events["polarity"]
+
+        start = 0
+        while start < len(events):
+            count = min(len(events) - start, self.chunk_events - self.filled)
+            target = self.buffer[self.filled:self.filled + count]
+            target["x"] = events["x"][start:start + count]
+            target["y"] = events["y"][start:start + count]
+            target["t"] = t[start:start + count]
+            target["p"] = p[start:start + count]
+            self.filled += count
+            start += count
+            if self.filled == self.chunk_events:
+                self.flush()
+        self.events_written += len(events)
+
+    def append_frame(self, timestamp):
+        # Timestamp of the next frame written to the APS video, so frames can be paired later
+        self.frame_times_file.write(np.int64(timestamp).tobytes())
+
+    def flush(self):
+        self.frame_times_file.flush()
+        if self.filled == 0:
+            return
+        chunk = self.buffer[:self.filled]
+        path = _chunk_path(self.path, self.chunk_number)
+        # Chunk first (atomically), index record second: a crash never indexes a partial chunk
+        with open(path + ".tmp", "wb") as f:
+            np.save(f, chunk)
+        os.replace(path + ".tmp", path)
+
+        record = np.array([(chunk["t"][0], chunk["t"][-1], self.filled)], INDEX_DTYPE)
+        self.index_file.write(record.tobytes())
+        self.index_file.flush()
+
+        self.chunk_number += 1
+        self.filled = 0
+
+    def close(self):
+        self.flush()
+        self.index_file.close()
+        self.frame_times_file.close()
+
+
+class EventRecordingReader:
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, "meta.json")) as f:
+            self.meta = json.load(f)
+        self.resolution = (self.meta["width"], self.meta["height"])
+        self.index = np.fromfile(os.path.join(path, "index.bin"), INDEX_DTYPE)
+        self.offsets = np.concatenate([[0], np.cumsum(self.index["count"])])
+        self.chunks = {}
+
+    def __len__(self):
+        return int(self.offsets[-1])
+
+    @property
+    def num_chunks(self):
+        return len(self.index)
+
+    def frame_timestamps(self):
+        path = os.path.join(self.path, "frame_times.bin")
+        if not os.path.isfile(path):
+            return np.empty(0, np.int64)
+        return np.fromfile(path, np.int64)
+
+    def time_range(self):
+        if not len(self.index):
+            return None
+        return int(self.index["first_t"][0]), int(self.index["last_t"][-1])
+
+    def chunk(self, chunk_number):
+        # Memory-mapped on first use; pages are only read when the view is touched
+        chunk = self.chunks.get(chunk_number)
+        if chunk is None:
+            chunk = np.load(_chunk_path(self.path, chunk_number), mmap_mode="r")
+            self.chunks[chunk_number] = chunk
+        return chunk
+
+    def iter_chunks(self):
+        for chunk_number in range(self.num_chunks):
+            yield self.chunk(chunk_number)
+
+    def seek(self, timestamp):
+        # (chunk_number, offset) of the first event with t >= timestamp, O(log n)
+        chunk_number = int(np.searchsorted(self.index["last_t"], timestamp, side="left"))
+        if chunk_number >= self.num_chunks:
+            return self.num_chunks, 0
+        offset = _search_t(self.chunk(chunk_number), timestamp)
+        return chunk_number, offset
+
+    def events_between(self, start_t, end_t):
+        # Zero-copy views (one per chunk touched) of all events with start_t <= t < end_t
+        chunk_number, offset = self.seek(start_t)
+        views = []
+        while chunk_number < self.num_chunks and self.index["first_t"][chunk_number] < end_t:
+            chunk = self.chunk(chunk_number)
+            # Chunks that end before end_t are taken whole, without searching them
+            end = len(chunk) if self.index["last_t"][chunk_number] < end_t else _search_t(chunk, end_t)
+            if end > offset:
+                views.append(chunk[offset:end])
+            chunk_number += 1
+            offset = 0
+        return views
+
+    def events_at(self, start, stop):
+        # Zero-copy views of events by global position [start, stop)
+        views = []
+        first = int(np.searchsorted(self.offsets, start, side="right")) - 1
+        for chunk_number in range(max(first, 0), self.num_chunks):
+            chunk_start = int(self.offsets[chunk_number])
+            if chunk_start >= stop:
+                break
+            chunk = self.chunk(chunk_number)
+            views.append(chunk[max(start - chunk_start, 0):min(stop - chunk_start, len(chunk))])
+        return views
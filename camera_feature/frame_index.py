@@ -0,0 +1,316 @@
+import argparse
+import glob
+import io
+import json
+import os
+import struct
+import numpy as np
+import cv2
+
+# Per-recording frame index sidecar.
+#
+# <recording>.frameindex.npz sits next to every recording in captured_videos/ (.svo2) and
+# captured_davis_video/ (.avi) and holds:
+#   meta    JSON: fps, width, height, frame count, duration, and the size / mtime of the recording
+#           it was built from (a changed recording invalidates the index)
+#   frames  one (timestamp_ns, offset, keyframe) record per frame
+#
+# AVI indexes are built from the container's idx1 chunk without decoding anything: byte offset and
+# keyframe flag per frame. Capture timestamps come from the <name>_frame_times.bin file written by
+# display_davis_feed; without it they are frame_number / fps (meta "capture_timestamps" is False).
+# SVO indexes need one pass through the ZED SDK (depth disabled) for the image timestamps; the SDK
+# seeks by frame number itself, so every frame is marked seekable and offsets are -1.
+
+FRAME_DTYPE = np.dtype([("timestamp_ns", "<i8"), ("offset", "<i8"), ("keyframe", "u1")])
+INDEX_SUFFIX = ".frameindex.npz"
+INDEX_VERSION = 1
+RECORDING_EXTENSIONS = (".avi", ".svo2")
+
+AVIIF_KEYFRAME = 0x10
+IDX1_DTYPE = np.dtype([("ckid", "S4"), ("flags", "<u4"), ("offset", "<u4"), ("size", "<u4")])
+
+
+class FrameIndex:
+    def __init__(self, meta, frames):
+        self.meta = meta
+        self.frames = frames
+        self.keyframes = np.flatnonzero(frames["keyframe"])
+
+    def __len__(self):
+        return len(self.frames)
+
+    @property
+    def fps(self):
+        return self.meta["fps"]
+
+    @property
+    def resolution(self):
+        return self.meta["width"], self.meta["height"]
+
+    @property
+    def duration(self):
+        return self.meta["duration"]
+
+    @property
+    def timestamps(self):
+        return self.frames["timestamp_ns"]
+
+    def time_range(self):
+        if not len(self.frames):
+            return None
+        return int(self.frames["timestamp_ns"][0]), int(self.frames["timestamp_ns"][-1])
+
+    def keyframe_before(self, frame):
+        # Nearest keyframe at or before frame; decoding forward from it reaches frame
+        position = int(np.searchsorted(self.keyframes, frame, side="right")) - 1
+        return int(self.keyframes[position]) if position >= 0 else 0
+
+    def frame_at(self, timestamp_ns):
+        # Last frame captured at or before timestamp_ns
+        frame = int(np.searchsorted(self.frames["timestamp_ns"], timestamp_ns, side="right")) - 1
+        return min(max(frame, 0), len(self.frames) - 1)
+
+
+def index_path(recording_path):
+    return recording_path + INDEX_SUFFIX
+
+
+def frame_times_path(recording_path):
+    return os.path.splitext(recording_path)[0] + "_frame_times.bin"
+
+
+def _source_stat(recording_path):
+    stat = os.stat(recording_path)
+    return {"source_size": stat.st_size, "source_mtime_ns": stat.st_mtime_ns}
+
+
+def _read_index(path):
+    with np.load(path) as data:
+        return json.loads(str(data["meta"])), data["frames"]
+
+
+def _save_index(path, meta, frames):
+    # Written to a temporary file and renamed so a half-written index is never picked up
+    buffer = io.BytesIO()
+    np.savez(buffer, meta=np.array(json.dumps(meta)), frames=frames)
+    with open(path + ".tmp", "wb") as f:
+        f.write(buffer.getvalue())
+    os.replace(path + ".tmp", path)
+
+
+# --- AVI ---
+
+def _read_avi_index(path):
+    # Walk the RIFF chunks: stream header for fps / size, idx1 for per-frame offsets and flags
+    fps, width, height = 0.0, 0, 0
+    movi_start = None
+    idx1 = None
+    with open(path, "rb") as f:
+        riff, _, form = struct.unpack("<4sI4s", f.read(12))
+        if riff != b"RIFF" or form != b"AVI ":
+            return None
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                break
+            chunk_id, size = struct.unpack("<4sI", header)
+            data_start = f.tell()
+            if chunk_id == b"LIST":
+                list_type = f.read(4)
+                if list_type == b"hdrl":
+                    fps, width, height = _parse_hdrl(f.read(size - 4), fps, width, height)
+                elif list_type == b"movi":
+                    movi_start = data_start
+            elif chunk_id == b"idx1":
+                idx1 = np.frombuffer(f.read(size), IDX1_DTYPE)
+            f.seek(data_start + size + (size & 1))
+
+    if idx1 is None or movi_start is None:
+        return None
+    video = idx1[np.char.endswith(idx1["ckid"], b"dc") | np.char.endswith(idx1["ckid"], b"db")]
+    offsets = video["offset"].astype(np.int64)
+    # idx1 offsets are relative to the 'movi' fourcc in most writers, absolute in some
+    if len(offsets) and offsets[0] < movi_start:
+        offsets += movi_start
+    return fps, width, height, offsets, (video["flags"] & AVIIF_KEYFRAME) != 0
+
+
+def _parse_hdrl(data, fps, width, height):
+    position = 0
+    while position + 8 <= len(data):
+        chunk_id, size = struct.unpack_from("<4sI", data, position)
+        body = position + 8
+        if chunk_id == b"LIST":
+            position = body + 4  # Descend into strl
+            continue
+        if chunk_id == b"avih" and size >= 40:
+            width, height = struct.unpack_from("<II", data, body + 32)
+        elif chunk_id == b"strh" and size >= 36 and data[body:body + 4] == b"vids" and not fps:
+            scale, rate = struct.unpack_from("<II", data, body + 20)
+            fps = rate / scale if scale else 0.0
+        position = body + size + (size & 1)
+    return fps, width, height
+
+
+def build_avi_index(recording_path):
+    parsed = _read_avi_index(recording_path)
+    if parsed is not None:
+        fps, width, height, offsets, keyframes = parsed
+        keyframes_known = True
+    else:
+        # No usable idx1 (e.g. OpenDML-only file): count frames by decoding once
+        cap = cv2.VideoCapture(recording_path)
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        count = 0
+        while cap.grab():
+            count += 1
+        cap.release()
+        offsets = np.full(count, -1, np.int64)
+        keyframes = np.zeros(count, bool)
+        keyframes_known = False
+
+    frames = np.zeros(len(offsets), FRAME_DTYPE)
+    frames["offset"] = offsets
+    frames["keyframe"] = keyframes
+    if len(frames):
+        frames["keyframe"][0] = 1
+
+    capture_timestamps = False
+    times_path = frame_times_path(recording_path)
+    if os.path.isfile(times_path):
+        times_us = np.fromfile(times_path, np.int64)
+        if len(times_us) == len(frames):
+            frames["timestamp_ns"] = times_us * 1000
+            capture_timestamps = True
+    if not capture_timestamps and fps:
+        frames["timestamp_ns"] = (np.arange(len(frames)) * (1e9 / fps)).astype(np.int64)
+
+    meta = {
+        "fps": fps,
+        "width": width,
+        "height": height,
+        "capture_timestamps": capture_timestamps,
+        "keyframes_known": keyframes_known,
+    }
+    return meta, frames
+
+
+# --- SVO ---
+
+def build_svo_index(recording_path):
+    # Imported here so AVI indexing does not need the ZED SDK
+    import pyzed.sl as sl
+
+    input_type = sl.InputType()
+    input_type.set_from_svo_file(recording_path)
+    init = sl.InitParameters(input_t=input_type)
+    init.depth_mode = sl.DEPTH_MODE.NONE
+    init.svo_real_time_mode = False
+
+    zed = sl.Camera()
+    err = zed.open(init)
+    if err != sl.ERROR_CODE.SUCCESS:
+        raise RuntimeError(f"Failed to open {recording_path}: {err!r}")
+    config = zed.get_camera_information().camera_configuration
+    runtime = sl.RuntimeParameters()
+    timestamps = []
+    while zed.grab(runtime) == sl.ERROR_CODE.SUCCESS:
+        timestamps.append(zed.get_timestamp(sl.TIME_REFERENCE.IMAGE).get_nanoseconds())
+    zed.close()
+
+    frames = np.zeros(len(timestamps), FRAME_DTYPE)
+    frames["timestamp_ns"] = timestamps
+    frames["offset"] = -1
+    frames["keyframe"] = 1
+
+    meta = {
+        "fps": config.fps,
+        "width": config.resolution.width,
+        "height": config.resolution.height,
+        "capture_timestamps": True,
+        "keyframes_known": True,
+    }
+    return meta, frames
+
+
+# --- Public ---
+
+def build(recording_path):
+    if recording_path.lower().endswith(".avi"):
+        meta, frames = build_avi_index(recording_path)
+    else:
+        meta, frames = build_svo_index(recording_path)
+
+    meta["version"] = INDEX_VERSION
+    meta["frame_count"] = len(frames)
+    meta["duration"] = len(frames) / meta["fps"] if meta["fps"] else 0.0
+    meta.update(_source_stat(recording_path))
+    _save_index(index_path(recording_path), meta, frames)
+    return FrameIndex(meta, frames)
+
+
+def _is_current(meta, recording_path):
+    return meta.get("version") == INDEX_VERSION and all(
+        meta.get(key) == value for key, value in _source_stat(recording_path).items())
+
+
+def _load_current(recording_path):
+    path = index_path(recording_path)
+    if not os.path.isfile(path):
+        return None
+    try:
+        meta, frames = _read_index(path)
+    except (OSError, ValueError, KeyError):
+        return None
+    return FrameIndex(meta, frames) if _is_current(meta, recording_path) else None
+
+
+def is_fresh(recording_path):
+    return _load_current(recording_path) is not None
+
+
+def load(recording_path, rebuild=False):
+    # The index for recording_path, (re)built if missing, outdated or explicitly requested
+    index = None if rebuild else _load_current(recording_path)
+    return index if index is not None else build(recording_path)
+
+
+def recordings_in(folder):
+    if not os.path.isdir(folder):
+        return []
+    return sorted(os.path.join(folder, f) for f in os.listdir(folder) if f.lower().endswith(RECORDING_EXTENSIONS))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or refresh frame index sidecars for recordings")
+    parser.add_argument("paths", nargs="*", help="Recordings, globs or folders (default: both capture folders)")
+    parser.add_argument("--rebuild", action="store_true", help="Rebuild even if the index is up to date")
+    args = parser.parse_args(argv)
+
+    root = os.path.join(os.path.dirname(__file__), '..')
+    paths = args.paths or [os.path.join(root, 'captured_videos'), os.path.join(root, 'captured_davis_video')]
+    recordings = []
+    for path in paths:
+        if os.path.isdir(path):
+            recordings.extend(recordings_in(path))
+        else:
+            recordings.extend(sorted(glob.glob(path)))
+
+    for recording in recordings:
+        index = None if args.rebuild else _load_current(recording)
+        fresh = index is not None
+        try:
+            if index is None:
+                index = build(recording)
+        except RuntimeError as e:
+            print(f"{recording}: {e}")
+            continue
+        width, height = index.resolution
+        print(f"{os.path.basename(recording)}: {len(index)} frames, {index.fps:.2f} fps, {width}x{height}, "
+              f"{index.duration:.2f} s{' (cached)' if fresh else ''}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,19 @@
+import numpy as np
+import cv2
+from camera_feature import skeleton_renderer
+
+# Per-frame processing stages shared by the ZED display loops and benchmark_display_loops
+
+
+def normalize_confidence(confidence_np):
+    return cv2.normalize(confidence_np, None, 0, 255, cv2.NORM_MINMAX).astype(np.uint8)
+
+
+def colorize_confidence(normalized_confidence):
+    return cv2.applyColorMap(normalized_confidence, cv2.COLORMAP_JET)
+
+
+def draw_body_keypoints(image, bodies, tracking_ok):
+    # tracking_ok is sl.OBJECT_TRACKING_STATE.OK, passed in so this module does not need pyzed
+    keypoints = skeleton_renderer.collect_keypoints(bodies, tracking_ok)
+    return skeleton_renderer.draw_skeletons(image, keypoints)
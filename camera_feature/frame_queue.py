@@ -0,0 +1,57 @@
+import collections
+import threading
+import time
+import numpy as np
+
+
+class LatestFrameQueue:
+    # Bounded hand-off between a grab thread and a render thread.
+    # put() never blocks: when the queue is full the oldest frame is dropped.
+    # get_latest() returns the newest frame and skips any older ones still queued.
+
+    def __init__(self, maxsize=2):
+        self.maxsize = maxsize
+        self.frames = collections.deque()
+        self.cond = threading.Condition()
+        self.put_count = 0
+        self.dropped = 0  # Dropped by put() because the queue was full
+        self.skipped = 0  # Queued but superseded by a newer frame at get_latest()
+
+    def put(self, item):
+        with self.cond:
+            if len(self.frames) >= self.maxsize:
+                self.frames.popleft()
+                self.dropped += 1
+            self.frames.append(item)
+            self.put_count += 1
+            self.cond.notify()
+
+    def get_latest(self, timeout=None):
+        with self.cond:
+            if not self.frames:
+                self.cond.wait(timeout)
+            if not self.frames:
+                return None
+            item = self.frames.pop()
+            self.skipped += len(self.frames)
+            self.frames.clear()
+            return item
+
+    def depth(self):
+        with self.cond:
+            return len(self.frames)
+
+
+class LatencyStats:
+    # Rolling end-to-end latency (grab finished -> frame shown) over the last `window` frames
+    def __init__(self, window=300):
+        self.samples = collections.deque(maxlen=window)
+
+    def add(self, grab_time):
+        self.samples.append(time.perf_counter() - grab_time)
+
+    def summary_ms(self):
+        if not self.samples:
+            return 0.0, 0.0
+        p50, p95 = np.percentile(np.asarray(self.samples) * 1000.0, (50, 95))
+        return float(p50), float(p95)
@@ -0,0 +1,140 @@
+import argparse
+import builtins
+import importlib
+import sys
+import time
+import types
+
+# Runs the existing camera_feature run() entry points without cameras, SDKs or windows.
+# pyzed.sl and dv_processing are replaced by the synthetic stand-ins, the OpenCV window
+# functions become no-ops and menu prompts are answered from a script.
+#
+# Example (from the project root):
+#   python -m camera_feature.headless_runner display_all_features --frames 300 --resolution HD1080
+
+QUIT_KEY = 113  # 'q', ends every ZED display loop
+
+# Modules whose run() takes the shared recording flag
+RECORDING_FLAG_MODULES = {"display_live_feed", "display_davis_feed", "display_rectified_view"}
+
+
+class RecordingFlag:
+    # Stand-in for the multiprocessing.Value('b') that main.py shares between processes
+    def __init__(self, value=False):
+        self.value = value
+
+
+def install_sdk_stand_ins():
+    from camera_feature import synthetic_zed
+    from camera_feature import synthetic_dv
+
+    pyzed = types.ModuleType("pyzed")
+    pyzed.sl = synthetic_zed
+    sys.modules["pyzed"] = pyzed
+    sys.modules["pyzed.sl"] = synthetic_zed
+    sys.modules["dv_processing"] = synthetic_dv
+    return synthetic_zed, synthetic_dv
+
+
+def install_headless_display(max_frames):
+    import cv2
+
+    state = {"wait_calls": 0}
+
+    def wait_key(delay=0):
+        # Every display loop calls waitKey once per iteration; quit after max_frames of them
+        state["wait_calls"] += 1
+        return QUIT_KEY if max_frames and state["wait_calls"] >= max_frames else -1
+
+    def no_op(*args, **kwargs):
+        return None
+
+    for name in ("namedWindow", "moveWindow", "resizeWindow", "imshow", "destroyWindow",
+                 "destroyAllWindows", "setWindowTitle", "createTrackbar", "setTrackbarPos"):
+        setattr(cv2, name, no_op)
+    cv2.waitKey = wait_key
+    cv2.pollKey = lambda: wait_key(0)
+    return state
+
+
+def install_scripted_input(answers):
+    # Answers menu prompts in order, then keeps choosing the first entry
+    answers = list(answers)
+
+    def scripted_input(prompt=""):
+        answer = answers.pop(0) if answers else "1"
+        print(f"{prompt}{answer}")
+        return answer
+
+    builtins.input = scripted_input
+
+
+def install(max_frames=0, answers=()):
+    synthetic_zed, synthetic_dv = install_sdk_stand_ins()
+    display_state = install_headless_display(max_frames)
+    install_scripted_input(answers)
+    return synthetic_zed, synthetic_dv, display_state
+
+
+def run_headless(module_name, max_frames=300, answers=()):
+    synthetic_zed, synthetic_dv, display_state = install(max_frames, answers)
+    synthetic_zed.reset_stats()
+    synthetic_dv.reset_stats()
+
+    module = importlib.import_module(f"camera_feature.{module_name}")
+    args = (RecordingFlag(),) if module_name in RECORDING_FLAG_MODULES else ()
+
+    start = time.perf_counter()
+    try:
+        module.run(*args)
+    except SystemExit:
+        pass
+    elapsed = time.perf_counter() - start
+
+    report = {
+        "module": module_name,
+        "seconds": elapsed,
+        "loop_iterations": display_state["wait_calls"],
+        "zed_grabs": synthetic_zed.stats["grabs"],
+        "davis_events": synthetic_dv.stats["events"],
+        "davis_frames": synthetic_dv.stats["frames"],
+    }
+    report["zed_fps"] = report["zed_grabs"] / elapsed if elapsed else 0.0
+    report["davis_events_per_s"] = report["davis_events"] / elapsed if elapsed else 0.0
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a camera_feature module headless against synthetic cameras")
+    parser.add_argument("module", help="camera_feature module name, e.g. display_all_features")
+    parser.add_argument("--frames", type=int, default=300, help="Loop iterations before quitting (0 = until the source ends)")
+    parser.add_argument("--resolution", choices=["VGA", "HD720", "HD1080", "HD2K"], help="ZED resolution override")
+    parser.add_argument("--fps", type=int, help="ZED fps override")
+    parser.add_argument("--svo-frames", type=int, default=300, help="Frames in a synthetic SVO")
+    parser.add_argument("--bodies", type=int, default=2, help="Bodies per frame")
+    parser.add_argument("--event-rate", type=float, default=1e6, help="DAVIS events per second")
+    parser.add_argument("--davis-fps", type=int, default=30, help="DAVIS APS frames per second")
+    parser.add_argument("--duration", type=float, default=10.0, help="DAVIS sensor time in seconds")
+    parser.add_argument("--realtime", action="store_true", help="Pace the synthetic cameras at their frame rate")
+    parser.add_argument("--input", action="append", default=[], help="Answer for the next input() prompt (repeatable)")
+    args = parser.parse_args(argv)
+
+    synthetic_zed, synthetic_dv = install_sdk_stand_ins()
+    synthetic_zed.configure(resolution=args.resolution, fps=args.fps, svo_frames=args.svo_frames,
+                            num_bodies=args.bodies, realtime=args.realtime)
+    synthetic_dv.configure(event_rate=args.event_rate, fps=args.davis_fps, duration_s=args.duration,
+                           realtime=args.realtime)
+
+    report = run_headless(args.module, args.frames, args.input)
+
+    print(f"\nModule: {report['module']}")
+    print(f"Elapsed: {report['seconds']:.3f} s over {report['loop_iterations']} loop iterations")
+    if report["zed_grabs"]:
+        print(f"ZED: {report['zed_grabs']} frames, {report['zed_fps']:.1f} fps")
+    if report["davis_events"]:
+        print(f"DAVIS: {report['davis_events']} events ({report['davis_events_per_s'] / 1e6:.2f} Mev/s), "
+              f"{report['davis_frames']} frames")
+
+
+if __name__ == "__main__":
+    main()
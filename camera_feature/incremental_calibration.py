@@ -0,0 +1,142 @@
+import numpy as np
+import cv2
+
+# Incremental DAVIS/ZED stereo calibration with fixed intrinsics.
+#
+# Every accepted view triggers a new stereo solve, warm-started from the previous R/T
+# (CALIB_USE_EXTRINSIC_GUESS), so each solve only takes a few iterations. Views whose corners barely
+# moved from an already accepted view are skipped as near-duplicates. The calibration has converged
+# once R and T stayed within a small band over the last few solves, with enough views and a low
+# reprojection error. Board coverage is tracked per camera on a coarse grid for the live heatmap.
+
+CRITERIA = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 30, 0.001)
+COVERAGE_GRID = (8, 6)  # Cells across, down
+
+
+class CoverageMap:
+    def __init__(self, image_size, grid=COVERAGE_GRID):
+        self.image_size = image_size
+        self.counts = np.zeros((grid[1], grid[0]), np.int32)
+
+    def add(self, corners):
+        points = corners.reshape(-1, 2)
+        cols = np.clip((points[:, 0] * self.counts.shape[1] / self.image_size[0]).astype(int), 0, self.counts.shape[1] - 1)
+        rows = np.clip((points[:, 1] * self.counts.shape[0] / self.image_size[1]).astype(int), 0, self.counts.shape[0] - 1)
+        np.add.at(self.counts, (rows, cols), 1)
+
+    @property
+    def fraction(self):
+        return np.count_nonzero(self.counts) / self.counts.size
+
+    def overlay(self, image, alpha=0.35):
+        # Heatmap of the corner counts blended over a BGR preview image; empty cells stay untinted
+        size = (image.shape[1], image.shape[0])
+        scaled = cv2.resize((np.minimum(self.counts, 10) * 25).astype(np.uint8), size, interpolation=cv2.INTER_NEAREST)
+        blended = cv2.addWeighted(image, 1.0 - alpha, cv2.applyColorMap(scaled, cv2.COLORMAP_JET), alpha, 0)
+        empty = scaled == 0
+        blended[empty] = image[empty]
+        return blended
+
+
+class IncrementalStereoCalibrator:
+    def __init__(self, objp, davis_matrix, davis_dist, davis_size, zed_matrix, zed_dist, zed_size,
+                 min_views=6, max_rms=1.0, duplicate_threshold=0.03, stable_solves=3,
+                 max_rotation_change_deg=0.2, max_translation_change=1.0):
+        self.objp = objp
+        self.davis_matrix = davis_matrix
+        self.davis_dist = davis_dist
+        self.zed_matrix = zed_matrix
+        self.zed_dist = zed_dist
+        self.zed_size = zed_size
+        self.davis_diagonal = float(np.hypot(*davis_size))
+        self.zed_diagonal = float(np.hypot(*zed_size))
+
+        self.min_views = min_views
+        self.max_rms = max_rms
+        self.duplicate_threshold = duplicate_threshold  # Mean corner shift as a fraction of the diagonal
+        self.stable_solves = stable_solves
+        self.max_rotation_change_deg = max_rotation_change_deg
+        self.max_translation_change = max_translation_change  # Same unit as objp (mm)
+
+        self.davis_points = []
+        self.zed_points = []
+        self.davis_coverage = CoverageMap(davis_size)
+        self.zed_coverage = CoverageMap(zed_size)
+
+        self.R = None
+        self.T = None
+        self.E = None
+        self.F = None
+        self.rms = None
+        self.per_view_errors = None
+        self.history = []  # (R, T) after each solve
+        self.skipped = 0
+
+    def __len__(self):
+        return len(self.davis_points)
+
+    def is_duplicate(self, corners_davis, corners_zed):
+        for davis, zed in zip(self.davis_points, self.zed_points):
+            davis_shift = np.linalg.norm(davis - corners_davis, axis=-1).mean() / self.davis_diagonal
+            zed_shift = np.linalg.norm(zed - corners_zed, axis=-1).mean() / self.zed_diagonal
+            if davis_shift < self.duplicate_threshold and zed_shift < self.duplicate_threshold:
+                return True
+        return False
+
+    def add_view(self, corners_davis, corners_zed):
+        # Returns (accepted, message)
+        corners_davis = np.asarray(corners_davis, np.float32).reshape(-1, 1, 2)
+        corners_zed = np.asarray(corners_zed, np.float32).reshape(-1, 1, 2)
+        if self.is_duplicate(corners_davis, corners_zed):
+            self.skipped += 1
+            return False, "near-duplicate of an accepted view, move the board"
+
+        self.davis_points.append(corners_davis)
+        self.zed_points.append(corners_zed)
+        if len(self) >= 3:
+            try:
+                self.solve()
+            except cv2.error as e:
+                self.davis_points.pop()
+                self.zed_points.pop()
+                return False, f"stereo solve failed with this view: {e}"
+        self.davis_coverage.add(corners_davis)
+        self.zed_coverage.add(corners_zed)
+        if self.rms is None:
+            return True, f"{len(self)} views, solving from 3"
+        return True, f"RMS {self.rms:.3f} px over {len(self)} views"
+
+    def solve(self):
+        flags = cv2.CALIB_FIX_INTRINSIC
+        R = np.eye(3) if self.R is None else self.R.copy()
+        T = np.zeros((3, 1)) if self.T is None else self.T.copy()
+        if self.R is not None:
+            flags |= cv2.CALIB_USE_EXTRINSIC_GUESS
+        rms, _, _, _, _, R, T, E, F, _, _, per_view_errors = cv2.stereoCalibrateExtended(
+            [self.objp] * len(self), self.davis_points, self.zed_points,
+            self.davis_matrix, self.davis_dist, self.zed_matrix, self.zed_dist, self.zed_size,
+            R, T, flags=flags, criteria=CRITERIA)
+        self.R, self.T, self.E, self.F = R, T, E, F
+        self.rms = rms
+        self.per_view_errors = per_view_errors
+        self.history.append((R.copy(), T.copy()))
+
+    @property
+    def converged(self):
+        if len(self) < self.min_views or self.rms is None or self.rms > self.max_rms:
+            return False
+        if len(self.history) < self.stable_solves:
+            return False
+        R_last, T_last = self.history[-1]
+        for R, T in self.history[-self.stable_solves:-1]:
+            rotation_change = np.degrees(np.linalg.norm(cv2.Rodrigues(R_last @ R.T)[0]))
+            translation_change = np.linalg.norm(T_last - T)
+            if rotation_change > self.max_rotation_change_deg or translation_change > self.max_translation_change:
+                return False
+        return True
+
+    def status(self):
+        rms = "-" if self.rms is None else f"{self.rms:.3f} px"
+        state = "converged" if self.converged else "collecting"
+        return (f"{len(self)} views, RMS {rms}, coverage DAVIS {self.davis_coverage.fraction * 100:.0f}% "
+                f"ZED {self.zed_coverage.fraction * 100:.0f}%, {state}")
@@ -0,0 +1,250 @@
+import json
+import os
+import shutil
+import tempfile
+import numpy as np
+
+# Columnar, chunked store for body-tracking results.
+#
+# A recording is a directory (<svo name>.bodies/) holding:
+#   meta.json              layout, max bodies per frame, chunk size, frame count
+#   chunk_NNNNNN_<field>.npy  one file per field and chunk, frames along the first axis:
+#       id              (frames, max_bodies) int32, -1 in unused slots
+#       tracking_state  (frames, max_bodies) int8, sl.OBJECT_TRACKING_STATE value
+#       confidence      (frames, max_bodies) float32
+#       keypoint_2d     (frames, max_bodies, 34, 2) float32, image pixels
+#       keypoint        (frames, max_bodies, 34, 3) float32, 3D in the recording's unit / frame
+#   timestamps.bin         int64 image timestamp (ns) of every frame, the frame -> timestamp index
+#   index.bin              one (first_timestamp, last_timestamp, frames) int64 record per chunk
+#
+# The writer fills preallocated chunk arrays in place and writes a chunk when it is full; unused
+# body slots stay NaN / -1. Chunks are plain .npy files, so the reader memory-maps them and a
+# whole session loads as NumPy arrays without running depth or body tracking again.
+#
+# A store is built in its own <name>.bodies.partial-*/ directory and renamed into place only
+# once the whole SVO was written, so <name>.bodies/ is always complete. A player and a batch worker
+# writing the same store never touch each other's files; the first to finish publishes it and the
+# other one discards its copy. An incomplete pass is discarded.
+
+NUM_KEYPOINTS = 34
+DEFAULT_MAX_BODIES = 8
+DEFAULT_CHUNK_FRAMES = 900  # 30 s at 30 fps
+FORMAT_VERSION = 1
+INDEX_DTYPE = np.dtype([("first_timestamp", "<i8"), ("last_timestamp", "<i8"), ("frames", "<i8")])
+
+
+def field_layout(max_bodies):
+    # Per-frame shape and dtype of every field
+    return {
+        "id": ((max_bodies,), np.int32),
+        "tracking_state": ((max_bodies,), np.int8),
+        "confidence": ((max_bodies,), np.float32),
+        "keypoint_2d": ((max_bodies, NUM_KEYPOINTS, 2), np.float32),
+        "keypoint": ((max_bodies, NUM_KEYPOINTS, 3), np.float32),
+    }
+
+
+def _fill_value(dtype):
+    return -1 if np.issubdtype(dtype, np.integer) else np.nan
+
+
+def _chunk_path(path, chunk_number, field):
+    return os.path.join(path, f"chunk_{chunk_number:06d}_{field}.npy")
+
+
+def store_path(svo_path):
+    return os.path.splitext(svo_path)[0] + ".bodies"
+
+
+def is_complete(path):
+    meta_path = os.path.join(path, "meta.json")
+    if not os.path.isfile(meta_path):
+        return False
+    with open(meta_path) as f:
+        meta = json.load(f)
+    return meta.get("version") == FORMAT_VERSION and meta.get("complete", False)
+
+
+def writer_for(svo_path, **kwargs):
+    # Writer for the SVO's store, or None if a complete one is already there
+    path = store_path(svo_path)
+    if is_complete(path):
+        return None
+    return BodyRecordingWriter(path, source=os.path.basename(svo_path), **kwargs)
+
+
+class BodyRecordingWriter:
+    def __init__(self, path, max_bodies=DEFAULT_MAX_BODIES, chunk_frames=DEFAULT_CHUNK_FRAMES, source=None):
+        # Writes into a private directory next to path; close(complete=True) moves it to path
+        self.path = path
+        self.max_bodies = max_bodies
+        self.chunk_frames = chunk_frames
+        parent, name = os.path.split(os.path.abspath(path))
+        self.partial_path = tempfile.mkdtemp(prefix=f"{name}.partial-", dir=parent)
+
+        self.meta = {
+            "version": FORMAT_VERSION,
+            "max_bodies": max_bodies,
+            "num_keypoints": NUM_KEYPOINTS,
+            "chunk_frames": chunk_frames,
+            "fields": {name: [list(shape), np.dtype(dtype).str] for name, (shape, dtype) in field_layout(max_bodies).items()},
+            "time_unit": "ns",
+            "source": source,
+            "complete": False,
+        }
+        self._write_meta()
+
+        self.timestamps_file = open(os.path.join(self.partial_path, "timestamps.bin"), "ab")
+        self.index_file = open(os.path.join(self.partial_path, "index.bin"), "ab")
+        self.buffers = {name: np.empty((chunk_frames,) + shape, dtype) for name, (shape, dtype) in field_layout(max_bodies).items()}
+        self.chunk_timestamps = np.empty(chunk_frames, np.int64)
+        self.chunk_number = 0
+        self.filled = 0
+        self.frames_written = 0
+        self.bodies_dropped = 0  # Bodies beyond max_bodies in a frame
+
+    def _write_meta(self):
+        meta_path = os.path.join(self.partial_path, "meta.json")
+        with open(meta_path + ".tmp", "w") as f:
+            json.dump(self.meta, f)
+        os.replace(meta_path + ".tmp", meta_path)
+
+    def append(self, timestamp_ns, bodies):
+        # bodies: sl.Bodies (or anything with a body_list of sl.BodyData-like objects)
+        row = self.filled
+        for buffer in self.buffers.values():
+            buffer[row] = _fill_value(buffer.dtype)
+
+        body_list = bodies.body_list
+        if len(body_list) > self.max_bodies:
+            self.bodies_dropped += len(body_list) - self.max_bodies
+            body_list = body_list[:self.max_bodies]
+        for slot, body in enumerate(body_list):
+            self.buffers["id"][row, slot] = body.id
+            self.buffers["tracking_state"][row, slot] = body.tracking_state.value
+            self.buffers["confidence"][row, slot] = body.confidence
+            self.buffers["keypoint_2d"][row, slot] = np.asarray(body.keypoint_2d, np.float32).reshape(NUM_KEYPOINTS, 2)
+            self.buffers["keypoint"][row, slot] = np.asarray(body.keypoint, np.float32).reshape(NUM_KEYPOINTS, 3)
+
+        self.chunk_timestamps[row] = timestamp_ns
+        self.filled += 1
+        self.frames_written += 1
+        if self.filled == self.chunk_frames:
+            self.flush()
+
+    def flush(self):
+        if self.filled == 0:
+            return
+        # Chunk files first (atomically), timestamps and index record last: a crash never
+        # indexes a partial chunk
+        for name, buffer in self.buffers.items():
+            path = _chunk_path(self.partial_path, self.chunk_number, name)
+            with open(path + ".tmp", "wb") as f:
+                np.save(f, buffer[:self.filled])
+            os.replace(path + ".tmp", path)
+
+        timestamps = self.chunk_timestamps[:self.filled]
+        self.timestamps_file.write(timestamps.tobytes())
+        self.timestamps_file.flush()
+        record = np.array([(timestamps[0], timestamps[-1], self.filled)], INDEX_DTYPE)
+        self.index_file.write(record.tobytes())
+        self.index_file.flush()
+
+        self.chunk_number += 1
+        self.filled = 0
+
+    def close(self, complete=False):
+        # complete=True once the whole source was written: the store is published at path.
+        # Returns whether it was; an incomplete pass is discarded.
+        self.flush()
+        self.index_file.close()
+        self.timestamps_file.close()
+        if not complete:
+            shutil.rmtree(self.partial_path, ignore_errors=True)
+            return False
+
+        self.meta["complete"] = True
+        self.meta["frames"] = self.frames_written
+        self.meta["bodies_dropped"] = self.bodies_dropped
+        self._write_meta()
+        os.chmod(self.partial_path, 0o755)  # mkdtemp creates it private
+        if os.path.isdir(self.path) and not is_complete(self.path):
+            shutil.rmtree(self.path)  # Incomplete store written in place by an older version
+        try:
+            os.replace(self.partial_path, self.path)
+        except OSError:
+            # Another writer published the same store first
+            shutil.rmtree(self.partial_path, ignore_errors=True)
+            return False
+        return True
+
+
+class BodyRecordingReader:
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, "meta.json")) as f:
+            self.meta = json.load(f)
+        self.max_bodies = self.meta["max_bodies"]
+        self.fields = tuple(self.meta["fields"])
+        self.index = np.fromfile(os.path.join(path, "index.bin"), INDEX_DTYPE)
+        self.offsets = np.concatenate([[0], np.cumsum(self.index["frames"])])
+        # Only timestamps of indexed chunks count, a crash may have left a partial tail
+        self.timestamps = np.fromfile(os.path.join(path, "timestamps.bin"), np.int64)[:int(self.offsets[-1])]
+        self.chunks = {}
+
+    def __len__(self):
+        return int(self.offsets[-1])
+
+    @property
+    def num_chunks(self):
+        return len(self.index)
+
+    @property
+    def complete(self):
+        return self.meta.get("complete", False)
+
+    def chunk(self, chunk_number, field):
+        # Memory-mapped on first use; pages are only read when the view is touched
+        key = (chunk_number, field)
+        chunk = self.chunks.get(key)
+        if chunk is None:
+            chunk = np.load(_chunk_path(self.path, chunk_number, field), mmap_mode="r")
+            self.chunks[key] = chunk
+        return chunk
+
+    def load(self, field, start=0, stop=None):
+        # Frames [start, stop) of one field as a single array (a zero-copy view inside one chunk)
+        stop = len(self) if stop is None else min(stop, len(self))
+        if start >= stop:
+            shape, dtype = field_layout(self.max_bodies)[field]
+            return np.empty((0,) + shape, dtype)
+        first = int(np.searchsorted(self.offsets, start, side="right")) - 1
+        last = int(np.searchsorted(self.offsets, stop, side="left")) - 1
+        parts = []
+        for chunk_number in range(first, last + 1):
+            chunk_start = int(self.offsets[chunk_number])
+            parts.append(self.chunk(chunk_number, field)[max(start - chunk_start, 0):stop - chunk_start])
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+    def load_all(self):
+        # The whole session: {field: array} plus "timestamp_ns"
+        arrays = {field: self.load(field) for field in self.fields}
+        arrays["timestamp_ns"] = self.timestamps
+        return arrays
+
+    def frame_at(self, timestamp_ns):
+        # Index of the last frame at or before timestamp_ns (-1 before the first one)
+        return int(np.searchsorted(self.timestamps, timestamp_ns, side="right")) - 1
+
+    def frames_between(self, start_ns, end_ns):
+        # Frame range [start, stop) with start_ns <= timestamp < end_ns
+        return (int(np.searchsorted(self.timestamps, start_ns, side="left")),
+                int(np.searchsorted(self.timestamps, end_ns, side="left")))
+
+    def tracks(self, tracking_state=None):
+        # Flat (frame, slot) indices of occupied slots, optionally only those in one tracking state
+        ids = self.load("id")
+        mask = ids >= 0
+        if tracking_state is not None:
+            mask &= self.load("tracking_state") == tracking_state
+        return np.nonzero(mask)
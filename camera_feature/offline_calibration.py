@@ -0,0 +1,321 @@
+import argparse
+import hashlib
+import os
+import sys
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import cv2
+from camera_feature import circle_grid_worker
+from camera_feature import frame_index
+from camera_feature import timestamp_matcher
+from camera_feature import video_scrubber
+
+# Offline DAVIS intrinsic + DAVIS/ZED stereo calibration from recorded frame pairs.
+#
+# Input is a directory of image pairs (<name>davis<suffix> next to <name>zed<suffix>, e.g.
+# pair_000010_davis.png / pair_000010_zed.png), or an .svo2 + .avi recording from which pairs are
+# extracted into such a directory first (matched by capture timestamp via the frame indexes).
+#
+# Circle-grid detection runs on all cores. The corners of every image are
+# cached under calibration_cache/corners/, keyed by a hash of the image content, the pattern and the
+# detection flags, so re-solving with other flags, view subsets or distortion models skips
+# detection entirely.
+#
+# Outputs use the same layout as the live tools: davis_intrinsics.xml (DAVIS346_00000001 node) and
+# stereo_calibration.npz (camera 1 = DAVIS, camera 2 = ZED left).
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp")
+DAVIS_CAMERA_NODE = "DAVIS346_00000001"
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(__file__), '..', 'calibration_cache', 'corners')
+
+DISTORTION_MODELS = {
+    "standard": 0,
+    "rational": cv2.CALIB_RATIONAL_MODEL,
+    "thin-prism": cv2.CALIB_RATIONAL_MODEL | cv2.CALIB_THIN_PRISM_MODEL,
+    "tilted": cv2.CALIB_RATIONAL_MODEL | cv2.CALIB_THIN_PRISM_MODEL | cv2.CALIB_TILTED_MODEL,
+}
+CRITERIA = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 30, 0.001)
+
+
+# --- Corner detection with a content-addressed cache ---
+
+def corner_cache_path(cache_dir, content_hash, pattern_size, flags):
+    return os.path.join(cache_dir, f"{content_hash}_{pattern_size[0]}x{pattern_size[1]}_{flags}.npy")
+
+
+def detect_image(path, pattern_size, flags, cache_dir):
+    # Runs in a worker process. Returns (path, corners or None, image size, cache hit); the size is
+    # None for a file that cannot be read as an image
+    try:
+        with open(path, "rb") as f:
+            content = f.read()
+    except OSError:
+        return path, None, None, False
+    cache_path = corner_cache_path(cache_dir, hashlib.sha1(content).hexdigest(), pattern_size, flags)
+    if os.path.isfile(cache_path):
+        cached = np.load(cache_path)
+        # Row 0 holds the image size, the rest the corners (none if the grid was not found)
+        size = (int(cached[0, 0, 0]), int(cached[0, 0, 1]))
+        return path, (cached[1:] if len(cached) > 1 else None), size, True
+
+    gray = cv2.imdecode(np.frombuffer(content, np.uint8), cv2.IMREAD_GRAYSCALE)
+    if gray is None:
+        return path, None, None, False
+    size = (gray.shape[1], gray.shape[0])
+    found, corners = circle_grid_worker.detect_circle_grid(gray, pattern_size, flags)
+    corners = corners.reshape(-1, 1, 2) if found else None
+
+    record = np.array([[size]], np.float32)
+    if corners is not None:
+        record = np.concatenate([record, corners.astype(np.float32)])
+    os.makedirs(cache_dir, exist_ok=True)
+    with open(cache_path + ".tmp", "wb") as f:
+        np.save(f, record)
+    os.replace(cache_path + ".tmp", cache_path)
+    return path, corners, size, False
+
+
+def detect_all(paths, pattern_size, flags, cache_dir, workers=None):
+    # {path: (corners or None, image size or None)} for every image, detected across all cores
+    workers = workers or os.cpu_count() or 1
+    results = {}
+    hits = 0
+    skipped = []
+    start_time = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        futures = [pool.submit(detect_image, path, pattern_size, flags, cache_dir) for path in paths]
+        for done, future in enumerate(futures, start=1):
+            path, corners, size, cached = future.result()
+            results[path] = (corners, size)
+            hits += cached
+            if size is None:
+                skipped.append(path)
+            if done % 10 == 0 or done == len(paths):
+                print(f"\rDetected {done}/{len(paths)} images ({hits} from cache)", end="", flush=True)
+    print(f"\nDetection took {time.perf_counter() - start_time:.1f} s with {workers} workers")
+    for path in skipped:
+        print(f"Skipped {path}: not a readable image")
+    return results
+
+
+# --- Inputs ---
+
+def find_pairs(pairs_dir):
+    # (davis_path, zed_path) for every DAVIS image that has a ZED counterpart, sorted by name
+    pairs = []
+    for name in sorted(os.listdir(pairs_dir)):
+        if "davis" not in name or not name.lower().endswith(IMAGE_EXTENSIONS):
+            continue
+        zed_path = os.path.join(pairs_dir, name.replace("davis", "zed"))
+        if os.path.isfile(zed_path):
+            pairs.append((os.path.join(pairs_dir, name), zed_path))
+    return pairs
+
+
+def extract_pairs(svo_path, avi_path, pairs_dir, step=10, tolerance_us=timestamp_matcher.DEFAULT_TOLERANCE_US):
+    # Write every step-th ZED frame and the DAVIS frame closest in time as an image pair
+    import pyzed.sl as sl
+
+    zed_index = frame_index.load(svo_path)
+    davis_index = frame_index.load(avi_path)
+    zed_t_us = zed_index.timestamps // 1000
+    davis_t_us = davis_index.timestamps // 1000
+    if not davis_index.meta["capture_timestamps"]:
+        # No capture timestamps for the AVI: assume both recordings started together
+        print("Warning: the AVI has no capture timestamps, pairing frames by time since start.")
+        davis_t_us = davis_t_us + zed_t_us[0]
+
+    sampled = np.arange(0, len(zed_t_us), step)
+    davis_frames = timestamp_matcher.nearest_within(davis_t_us, zed_t_us[sampled], tolerance_us)
+
+    input_type = sl.InputType()
+    input_type.set_from_svo_file(svo_path)
+    init = sl.InitParameters(input_t=input_type)
+    init.depth_mode = sl.DEPTH_MODE.NONE
+    init.svo_real_time_mode = False
+    zed = sl.Camera()
+    err = zed.open(init)
+    if err != sl.ERROR_CODE.SUCCESS:
+        raise RuntimeError(f"Failed to open {svo_path}: {err!r}")
+    runtime = sl.RuntimeParameters()
+    image_zed = sl.Mat()
+    davis_reader = video_scrubber.ScrubbingReader(avi_path)
+
+    os.makedirs(pairs_dir, exist_ok=True)
+    written = 0
+    for zed_frame, davis_frame in zip(sampled, davis_frames):
+        if davis_frame < 0:
+            continue
+        zed.set_svo_position(int(zed_frame))
+        if zed.grab(runtime) != sl.ERROR_CODE.SUCCESS:
+            continue
+        zed.retrieve_image(image_zed, sl.VIEW.LEFT)
+        davis_image = davis_reader.read(int(davis_frame))
+        if davis_image is None:
+            continue
+        cv2.imwrite(os.path.join(pairs_dir, f"pair_{zed_frame:06d}_zed.png"),
+                    cv2.cvtColor(image_zed.get_data(), cv2.COLOR_BGRA2BGR))
+        cv2.imwrite(os.path.join(pairs_dir, f"pair_{zed_frame:06d}_davis.png"), davis_image)
+        written += 1
+
+    # ZED left intrinsics of the recording, used for the stereo solve
+    left_cam = zed.get_camera_information().camera_configuration.calibration_parameters.left_cam
+    zed.close()
+    davis_reader.release()
+
+    disto = list(left_cam.disto)
+    disto = disto + [0.0] * (5 - len(disto))
+    zed_intrinsics = (np.array([[left_cam.fx, 0, left_cam.cx], [0, left_cam.fy, left_cam.cy], [0, 0, 1]]),
+                      np.array(disto, dtype=np.float64))
+    print(f"Extracted {written} frame pairs to {pairs_dir}")
+    return zed_intrinsics
+
+
+def parse_views(spec, count):
+    # "0-9,15,20-" -> sorted indices below count
+    if not spec:
+        return list(range(count))
+    views = set()
+    for part in spec.split(","):
+        if "-" in part:
+            first, _, last = part.partition("-")
+            views.update(range(int(first or 0), min(int(last) + 1 if last else count, count)))
+        elif int(part) < count:
+            views.add(int(part))
+    return sorted(views)
+
+
+# --- Solving ---
+
+def object_points(pattern_size, spacing_mm):
+    objp = np.zeros((pattern_size[0] * pattern_size[1], 3), np.float32)
+    objp[:, :2] = np.mgrid[0:pattern_size[0], 0:pattern_size[1]].T.reshape(-1, 2) * spacing_mm
+    return objp
+
+
+def calibrate_mono(objp, image_points, image_size, flags):
+    rms, camera_matrix, dist_coeffs, _, _ = cv2.calibrateCamera(
+        [objp] * len(image_points), image_points, image_size, None, None, flags=flags, criteria=CRITERIA)
+    return rms, camera_matrix, dist_coeffs
+
+
+def save_davis_intrinsics(path, camera_matrix, dist_coeffs, image_size, pattern_size, spacing_mm, rms):
+    fs = cv2.FileStorage(path, cv2.FILE_STORAGE_WRITE)
+    fs.startWriteStruct(DAVIS_CAMERA_NODE, cv2.FileNode_MAP)
+    fs.write("camera_matrix", camera_matrix)
+    fs.write("distortion_coefficients", dist_coeffs.reshape(-1, 1))
+    fs.write("image_width", int(image_size[0]))
+    fs.write("image_height", int(image_size[1]))
+    fs.endWriteStruct()
+    fs.write("use_fisheye_model", 0)
+    fs.write("type", "camera")
+    fs.write("pattern_width", int(pattern_size[0]))
+    fs.write("pattern_height", int(pattern_size[1]))
+    fs.write("pattern_type", "circlesGrid")
+    fs.write("square_size", float(spacing_mm))
+    fs.write("calibration_error", float(rms))
+    fs.write("calibration_time", time.strftime("%a %b %d %H:%M:%S %Y"))
+    fs.release()
+
+
+def calibrate(pairs, detections, pattern_size, spacing_mm, model_flags, zed_intrinsics, refine_intrinsics):
+    objp = object_points(pattern_size, spacing_mm)
+    davis_views = [detections[davis][0] for davis, _ in pairs if detections[davis][0] is not None]
+    if len(davis_views) < 3:
+        print(f"Only {len(davis_views)} DAVIS views with the pattern, at least 3 are needed.")
+        return None
+    davis_size = next(detections[davis][1] for davis, _ in pairs if detections[davis][1] is not None)
+    zed_size = next((detections[zed][1] for _, zed in pairs if detections[zed][1] is not None), None)
+
+    rms, davis_matrix, davis_dist = calibrate_mono(objp, davis_views, davis_size, model_flags)
+    print(f"DAVIS intrinsics from {len(davis_views)} views, RMS {rms:.4f} px")
+    result = {"davis": (rms, davis_matrix, davis_dist, davis_size)}
+
+    stereo = [(detections[davis][0], detections[zed][0]) for davis, zed in pairs
+              if detections[davis][0] is not None and detections[zed][0] is not None]
+    if len(stereo) < 3:
+        print(f"Only {len(stereo)} pairs with the pattern in both images, stereo calibration skipped.")
+        return result
+
+    if zed_intrinsics is None:
+        zed_views = [zed for _, zed in stereo]
+        zed_rms, zed_matrix, zed_dist = calibrate_mono(objp, zed_views, zed_size, model_flags)
+        print(f"ZED intrinsics (no recording or --zed-intrinsics given) RMS {zed_rms:.4f} px")
+    else:
+        zed_matrix, zed_dist = zed_intrinsics
+
+    flags = model_flags | (cv2.CALIB_USE_INTRINSIC_GUESS if refine_intrinsics else cv2.CALIB_FIX_INTRINSIC)
+    stereo_rms, davis_matrix2, davis_dist2, zed_matrix2, zed_dist2, R, T, E, F = cv2.stereoCalibrate(
+        [objp] * len(stereo), [d for d, _ in stereo], [z for _, z in stereo],
+        davis_matrix, davis_dist, zed_matrix, zed_dist, zed_size, flags=flags, criteria=CRITERIA)
+    print(f"Stereo calibration from {len(stereo)} pairs, RMS {stereo_rms:.4f} px")
+    result["stereo"] = dict(R=R, T=T, E=E, F=F, cameraMatrix1=davis_matrix2, distCoeffs1=davis_dist2,
+                            cameraMatrix2=zed_matrix2, distCoeffs2=zed_dist2, imageSize=zed_size, rms=stereo_rms)
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline DAVIS/ZED calibration from recorded frame pairs")
+    parser.add_argument("source", help="Directory of frame pairs, or an .svo2 recording (with --avi)")
+    parser.add_argument("--avi", help="DAVIS .avi recorded together with the .svo2 source")
+    parser.add_argument("--pairs-dir", help="Where extracted pairs go (default: <svo name>_pairs next to it)")
+    parser.add_argument("--step", type=int, default=10, help="Use every n-th ZED frame when extracting")
+    parser.add_argument("--rows", type=int, default=4, help="Circle grid rows")
+    parser.add_argument("--cols", type=int, default=5, help="Circle grid columns")
+    parser.add_argument("--spacing-mm", type=float, default=50.0, help="Circle center spacing")
+    parser.add_argument("--asymmetric", action="store_true", help="Asymmetric circle grid")
+    parser.add_argument("--model", choices=sorted(DISTORTION_MODELS), default="standard", help="Distortion model")
+    parser.add_argument("--views", help="Subset of pairs to use, e.g. 0-19,25")
+    parser.add_argument("--zed-intrinsics", help="stereo_calibration.npz to take the ZED intrinsics from")
+    parser.add_argument("--refine-intrinsics", action="store_true", help="Refine intrinsics in the stereo solve")
+    parser.add_argument("--workers", type=int, help="Detection processes (default: all cores)")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="Detected corner cache")
+    parser.add_argument("--output-dir", help="Where the results are written (default: the pairs directory)")
+    args = parser.parse_args(argv)
+
+    zed_intrinsics = None
+    if os.path.isdir(args.source):
+        pairs_dir = args.source
+    elif args.source.endswith(".svo2") and args.avi:
+        pairs_dir = args.pairs_dir or os.path.splitext(args.source)[0] + "_pairs"
+        zed_intrinsics = extract_pairs(args.source, args.avi, pairs_dir, args.step)
+    else:
+        print("The source must be a directory of frame pairs, or an .svo2 file together with --avi.")
+        sys.exit(1)
+
+    if args.zed_intrinsics:
+        stored = np.load(args.zed_intrinsics)
+        zed_intrinsics = (stored["cameraMatrix2"], stored["distCoeffs2"])
+
+    pairs = find_pairs(pairs_dir)
+    pairs = [pairs[i] for i in parse_views(args.views, len(pairs))]
+    if not pairs:
+        print(f"No frame pairs found in {pairs_dir}")
+        sys.exit(1)
+
+    pattern_size = (args.cols, args.rows)
+    flags = cv2.CALIB_CB_ASYMMETRIC_GRID if args.asymmetric else cv2.CALIB_CB_SYMMETRIC_GRID
+    paths = [path for pair in pairs for path in pair]
+    detections = detect_all(paths, pattern_size, flags, args.cache_dir, args.workers)
+
+    result = calibrate(pairs, detections, pattern_size, args.spacing_mm, DISTORTION_MODELS[args.model],
+                       zed_intrinsics, args.refine_intrinsics)
+    if result is None:
+        sys.exit(1)
+
+    output_dir = args.output_dir or pairs_dir
+    os.makedirs(output_dir, exist_ok=True)
+    rms, davis_matrix, davis_dist, davis_size = result["davis"]
+    xml_path = os.path.join(output_dir, "davis_intrinsics.xml")
+    save_davis_intrinsics(xml_path, davis_matrix, davis_dist, davis_size, pattern_size, args.spacing_mm, rms)
+    print(f"DAVIS intrinsics saved to {xml_path}")
+    if "stereo" in result:
+        npz_path = os.path.join(output_dir, "stereo_calibration.npz")
+        np.savez(npz_path, **result["stereo"])
+        print(f"Stereo calibration saved to {npz_path}")
+
+
+if __name__ == "__main__":
+    main()
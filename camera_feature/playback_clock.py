@@ -0,0 +1,90 @@
+import time
+
+# Deadline-based playback pacing.
+#
+# Frame k after the last restart is due at anchor + k / (fps * speed) on the monotonic clock.
+# wait_ms() is how long to wait in waitKey for the next deadline, so decode and display time is
+# already accounted for. advance() says how many frames the playhead moves: 1 when on time, more
+# when behind (the frames in between are dropped), 0 when woken early (the frame is held).
+# speed=None is benchmark mode: no waiting, every frame is shown.
+
+SPEEDS = (0.25, 0.5, 1.0, 2.0, 4.0, 8.0)
+
+
+class PlaybackClock:
+    def __init__(self, fps, speed=1.0):
+        self.fps = fps
+        self.speed = speed
+        self.presented = 0
+        self.dropped = 0
+        self.restart()
+
+    def restart(self):
+        # Re-anchor the deadlines at the current frame (after a seek, pause or speed change)
+        self.anchor = time.monotonic()
+        self.ticks = 0
+        self.stats_start = self.anchor
+        self.stats_presented = 0
+
+    @property
+    def benchmark(self):
+        return self.speed is None
+
+    @property
+    def target_fps(self):
+        return None if self.benchmark else self.fps * self.speed
+
+    def set_speed(self, speed):
+        self.speed = speed
+        self.restart()
+
+    def faster(self):
+        self.set_speed(SPEEDS[min(self._speed_position() + 1, len(SPEEDS) - 1)])
+
+    def slower(self):
+        self.set_speed(SPEEDS[max(self._speed_position() - 1, 0)])
+
+    def _speed_position(self):
+        speed = 1.0 if self.benchmark else self.speed
+        return min(range(len(SPEEDS)), key=lambda i: abs(SPEEDS[i] - speed))
+
+    def handle_key(self, key):
+        # Shared speed controls: +/- step through SPEEDS, b toggles benchmark mode
+        if key in (ord('+'), ord('=')):
+            self.faster()
+        elif key == ord('-'):
+            self.slower()
+        elif key == ord('b'):
+            self.set_speed(1.0 if self.benchmark else None)
+        else:
+            return False
+        return True
+
+    def wait_ms(self):
+        # waitKey delay until the next frame is due; never 0, which would block in waitKey
+        if self.benchmark:
+            return 1
+        deadline = self.anchor + (self.ticks + 1) / self.target_fps
+        return max(int((deadline - time.monotonic()) * 1000), 1)
+
+    def advance(self):
+        if self.benchmark:
+            steps = 1
+        else:
+            due = int((time.monotonic() - self.anchor) * self.target_fps)
+            steps = max(due - self.ticks, 0)
+        self.ticks += steps
+        if steps:
+            self.presented += 1
+            self.stats_presented += 1
+            self.dropped += steps - 1
+        return steps
+
+    def achieved_fps(self):
+        elapsed = time.monotonic() - self.stats_start
+        return self.stats_presented / elapsed if elapsed > 0 else 0.0
+
+    def status(self):
+        target = "max" if self.benchmark else f"{self.target_fps:.1f}"
+        speed = "benchmark" if self.benchmark else f"{self.speed:g}x"
+        return f"{speed} {self.achieved_fps():.1f}/{target} fps, {self.dropped} dropped"
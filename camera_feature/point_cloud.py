@@ -0,0 +1,279 @@
+import argparse
+import os
+import sys
+import time
+import numpy as np
+
+# ZED depth to a decimated 3D point cloud.
+#
+# Points are in the left camera frame, in the same unit as the depth map (millimetres with
+# coordinate_units = MILLIMETER): x right, y down, z forward. Per pixel, x = rx * z and y = ry * z
+# with the ray table (rx, ry) precomputed once from the left camera intrinsics, so back-projection
+# is two multiplies into reused buffers. Pixels without depth (NaN/inf), outside the depth range or
+# with a ZED confidence value above the threshold (the SDK's scale: 1 = most confident) are dropped.
+#
+# Voxel downsampling keeps one point per voxel, the centroid of the points that fell into it.
+# Every pixel gets a spatial hash key packing its three voxel coordinates into one int64. Neighbouring
+# pixels of a row usually share a voxel, so runs of equal keys are summed first; only the run keys
+# are then binned (sorted and merged), which is several times fewer than the valid pixels.
+#
+# PointCloudWriter streams the clouds either as one binary PLY per frame or as .npy chunks of
+# POINT_DTYPE records, each written to a temporary file and renamed.
+
+POINT_DTYPE = np.dtype([("timestamp_ns", "<i8"), ("x", "<f4"), ("y", "<f4"), ("z", "<f4")])
+
+KEY_BITS = 21  # Per axis, so +-2^20 voxels around the camera
+KEY_OFFSET = 1 << (KEY_BITS - 1)
+DEFAULT_VOXEL_MM = 20.0
+DEFAULT_CONFIDENCE_THRESHOLD = 90
+DEFAULT_CHUNK_FRAMES = 30
+
+
+def ray_table(fx, fy, cx, cy, width, height, stride=1):
+    # (rx, ry) per sampled pixel: the x/z and y/z slopes of the ray through its centre
+    rx = (np.arange(0, width, stride, dtype=np.float32) - cx) / fx
+    ry = (np.arange(0, height, stride, dtype=np.float32) - cy) / fy
+    return (np.ascontiguousarray(np.broadcast_to(rx[None, :], (len(ry), len(rx)))),
+            np.ascontiguousarray(np.broadcast_to(ry[:, None], (len(ry), len(rx)))))
+
+
+class PointCloudBuilder:
+    def __init__(self, fx, fy, cx, cy, image_size, voxel_mm=DEFAULT_VOXEL_MM, stride=1,
+                 min_depth_mm=300.0, max_depth_mm=20000.0, confidence_threshold=DEFAULT_CONFIDENCE_THRESHOLD):
+        # image_size is the resolution the intrinsics belong to; other depth sizes are scaled to it
+        self.intrinsics = (fx, fy, cx, cy)
+        self.image_size = image_size
+        self.voxel_mm = voxel_mm
+        self.stride = stride
+        self.min_depth_mm = min_depth_mm
+        self.max_depth_mm = max_depth_mm
+        self.confidence_threshold = confidence_threshold
+
+        self.depth_shape = None
+        self.buffers = {}
+        self.valid_points = 0  # Before downsampling, last frame
+
+    @classmethod
+    def from_camera(cls, zed, **kwargs):
+        config = zed.get_camera_information().camera_configuration
+        left_cam = config.calibration_parameters.left_cam
+        size = (config.resolution.width, config.resolution.height)
+        return cls(left_cam.fx, left_cam.fy, left_cam.cx, left_cam.cy, size, **kwargs)
+
+    def _configure(self, depth_shape):
+        height, width = depth_shape
+        fx, fy, cx, cy = self.intrinsics
+        sx = width / self.image_size[0]
+        sy = height / self.image_size[1]
+        self.rx, self.ry = ray_table(fx * sx, fy * sy, cx * sx, cy * sy, width, height, self.stride)
+        shape = self.rx.shape
+        self.buffers = {
+            "x": np.empty(shape, np.float32),
+            "y": np.empty(shape, np.float32),
+            "scaled": np.empty(shape, np.float32),
+            "cell": np.empty(shape, np.int64),
+            "key": np.empty(shape, np.int64),
+            "valid": np.empty(shape, bool),
+            "check": np.empty(shape, bool),
+        }
+        self.depth_shape = depth_shape
+
+    def _sample(self, data):
+        data = np.asarray(data)
+        if data.ndim == 3:
+            data = data[:, :, 0]
+        return data[::self.stride, ::self.stride] if self.stride > 1 else data
+
+    def _valid_mask(self, z, confidence):
+        valid, check = self.buffers["valid"], self.buffers["check"]
+        # NaN compares False, so missing depth drops out here as well
+        np.greater_equal(z, self.min_depth_mm, out=valid)
+        np.less_equal(z, self.max_depth_mm, out=check)
+        valid &= check
+        if confidence is not None:
+            np.less_equal(self._sample(confidence), self.confidence_threshold, out=check)
+            valid &= check
+        return valid
+
+    def _voxel_keys(self, planes):
+        scaled, cell, key = self.buffers["scaled"], self.buffers["cell"], self.buffers["key"]
+        key.fill(0)
+        with np.errstate(invalid='ignore'):  # Invalid pixels are masked out afterwards
+            for plane in planes:
+                np.divide(plane, np.float32(self.voxel_mm), out=scaled)
+                np.floor(scaled, out=scaled)
+                np.copyto(cell, scaled, casting='unsafe')
+                # The offset keeps every coordinate positive within its KEY_BITS
+                cell += KEY_OFFSET
+                np.left_shift(key, KEY_BITS, out=key)
+                np.bitwise_or(key, cell, out=key)
+        return key
+
+    def build(self, depth_mm, confidence=None):
+        # Returns an (N, 3) float32 array; a new array every call, the per-pixel buffers are reused
+        depth_mm = np.asarray(depth_mm)
+        depth_shape = depth_mm.shape[:2]
+        if self.depth_shape != depth_shape:
+            self._configure(depth_shape)
+
+        z = self._sample(depth_mm)
+        x, y = self.buffers["x"], self.buffers["y"]
+        np.multiply(self.rx, z, out=x)
+        np.multiply(self.ry, z, out=y)
+        valid = np.flatnonzero(self._valid_mask(z, confidence))
+        self.valid_points = len(valid)
+
+        if not self.voxel_mm:
+            return np.stack([x.ravel()[valid], y.ravel()[valid], z.ravel()[valid]], axis=1)
+        if len(valid) == 0:
+            return np.empty((0, 3), np.float32)
+
+        keys = self._voxel_keys((x, y, z)).ravel()[valid]
+
+        # Runs of equal keys along the rows first, then bin the run keys
+        new_run = np.concatenate(([True], keys[1:] != keys[:-1]))
+        run_of_point = np.cumsum(new_run) - 1
+        voxel_keys, voxel_of_run = np.unique(keys[new_run], return_inverse=True)
+        voxel_of_point = voxel_of_run.ravel()[run_of_point]
+
+        counts = np.bincount(voxel_of_point, minlength=len(voxel_keys))
+        points = np.empty((len(voxel_keys), 3), np.float32)
+        for axis, plane in enumerate((x, y, z)):
+            points[:, axis] = np.bincount(voxel_of_point, plane.ravel()[valid], len(voxel_keys)) / counts
+        return points
+
+
+def write_ply(path, points):
+    # Binary little-endian PLY with float x, y, z vertices
+    points = np.ascontiguousarray(points, dtype="<f4")
+    header = ("ply\nformat binary_little_endian 1.0\n"
+              f"element vertex {len(points)}\n"
+              "property float x\nproperty float y\nproperty float z\nend_header\n")
+    with open(path + ".tmp", "wb") as f:
+        f.write(header.encode("ascii"))
+        f.write(points.tobytes())
+    os.replace(path + ".tmp", path)
+
+
+def read_ply(path):
+    with open(path, "rb") as f:
+        count = 0
+        line = f.readline()
+        while line and line.strip() != b"end_header":
+            if line.startswith(b"element vertex"):
+                count = int(line.split()[2])
+            line = f.readline()
+        return np.fromfile(f, "<f4", count * 3).reshape(count, 3)
+
+
+class PointCloudWriter:
+    def __init__(self, path, fmt="ply", chunk_frames=DEFAULT_CHUNK_FRAMES):
+        # A directory of frame_NNNNNN.ply files, or of chunk_NNNNNN.npy files holding chunk_frames clouds
+        self.path = path
+        self.fmt = fmt
+        self.chunk_frames = chunk_frames
+        os.makedirs(path, exist_ok=True)
+        self.pending = []
+        self.frames_written = 0
+        self.points_written = 0
+        self.chunk_number = 0
+
+    def write(self, points, timestamp_ns):
+        if self.fmt == "ply":
+            write_ply(os.path.join(self.path, f"frame_{self.frames_written:06d}.ply"), points)
+        else:
+            records = np.empty(len(points), POINT_DTYPE)
+            records["timestamp_ns"] = timestamp_ns
+            records["x"], records["y"], records["z"] = points[:, 0], points[:, 1], points[:, 2]
+            self.pending.append(records)
+            if len(self.pending) == self.chunk_frames:
+                self.flush()
+        self.frames_written += 1
+        self.points_written += len(points)
+
+    def flush(self):
+        if not self.pending:
+            return
+        path = os.path.join(self.path, f"chunk_{self.chunk_number:06d}.npy")
+        with open(path + ".tmp", "wb") as f:
+            np.save(f, np.concatenate(self.pending))
+        os.replace(path + ".tmp", path)
+        self.pending = []
+        self.chunk_number += 1
+
+    def close(self):
+        self.flush()
+
+
+def export(svo_path, output_dir, fmt="ply", voxel_mm=DEFAULT_VOXEL_MM, stride=1,
+           confidence_threshold=DEFAULT_CONFIDENCE_THRESHOLD, max_frames=0):
+    import pyzed.sl as sl
+
+    input_type = sl.InputType()
+    input_type.set_from_svo_file(svo_path)
+    init = sl.InitParameters(input_t=input_type)
+    init.depth_mode = sl.DEPTH_MODE.NEURAL
+    init.coordinate_units = sl.UNIT.MILLIMETER
+    init.svo_real_time_mode = False
+
+    zed = sl.Camera()
+    err = zed.open(init)
+    if err != sl.ERROR_CODE.SUCCESS:
+        print(f"Failed to open {svo_path}: {err}")
+        return False
+
+    builder = PointCloudBuilder.from_camera(zed, voxel_mm=voxel_mm, stride=stride,
+                                            confidence_threshold=confidence_threshold)
+    writer = PointCloudWriter(output_dir, fmt)
+    runtime = sl.RuntimeParameters()
+    depth = sl.Mat()
+    confidence = sl.Mat()
+
+    build_seconds = 0.0
+    start = time.perf_counter()
+    while max_frames <= 0 or writer.frames_written < max_frames:
+        err = zed.grab(runtime)
+        if err == sl.ERROR_CODE.END_OF_SVOFILE_REACHED:
+            break
+        if err != sl.ERROR_CODE.SUCCESS:
+            continue
+        zed.retrieve_measure(depth, sl.MEASURE.DEPTH)
+        zed.retrieve_measure(confidence, sl.MEASURE.CONFIDENCE)
+
+        build_start = time.perf_counter()
+        points = builder.build(depth.get_data(), confidence.get_data())
+        build_seconds += time.perf_counter() - build_start
+
+        writer.write(points, zed.get_timestamp(sl.TIME_REFERENCE.IMAGE).get_nanoseconds())
+        if writer.frames_written % 30 == 0:
+            print(f"Frame {writer.frames_written}: {builder.valid_points} valid -> {len(points)} points")
+    writer.close()
+    zed.close()
+
+    frames = writer.frames_written
+    elapsed = time.perf_counter() - start
+    if frames:
+        print(f"Wrote {frames} clouds ({writer.points_written / frames:.0f} points on average) to {output_dir}")
+        print(f"Point cloud stage {build_seconds / frames * 1000:.1f} ms per frame, {frames / elapsed:.1f} fps overall")
+    return True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export voxel-downsampled point clouds from a ZED recording")
+    parser.add_argument("svo", help=".svo2 recording")
+    parser.add_argument("--output-dir", help="Where the clouds go (default: <svo name>_cloud next to it)")
+    parser.add_argument("--format", choices=["ply", "npy"], default="ply", help="One PLY per frame, or .npy chunks")
+    parser.add_argument("--voxel-mm", type=float, default=DEFAULT_VOXEL_MM, help="Voxel edge (0 = no downsampling)")
+    parser.add_argument("--stride", type=int, default=1, help="Use every n-th pixel in both directions")
+    parser.add_argument("--confidence", type=int, default=DEFAULT_CONFIDENCE_THRESHOLD,
+                        help="Drop pixels with a ZED confidence value above this (1-100)")
+    parser.add_argument("--frames", type=int, default=0, help="Stop after this many frames (0 = whole recording)")
+    args = parser.parse_args(argv)
+
+    output_dir = args.output_dir or os.path.splitext(args.svo)[0] + "_cloud"
+    if not export(args.svo, output_dir, args.format, args.voxel_mm, args.stride, args.confidence, args.frames):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
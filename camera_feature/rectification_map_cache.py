@@ -0,0 +1,75 @@
+import hashlib
+import os
+import numpy as np
+import cv2
+
+CACHE_DIR_NAME = "rectification_cache"
+
+
+def calibration_hash(calib_path):
+    # Content hash of the calibration file, so a re-run of the stereo calibration
+    # invalidates every cached map even if the file name stays the same
+    sha = hashlib.sha1()
+    with open(calib_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 16), b""):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def build_fused_maps(calib, source_size):
+    K1 = calib['cameraMatrix1']
+    D1 = calib['distCoeffs1']
+    K2 = calib['cameraMatrix2']
+    D2 = calib['distCoeffs2']
+    R = calib['R']
+    T = calib['T']
+    img_size = tuple(int(v) for v in calib['imageSize'])
+
+    # Same rectification as before (ZED = camera 2), but as float maps so they can be rescaled
+    R1, R2, P1, P2, Q, _, _ = cv2.stereoRectify(K1, D1, K2, D2, img_size, R, T, flags=cv2.CALIB_ZERO_DISPARITY)
+    map_x, map_y = cv2.initUndistortRectifyMap(K2, D2, R2, P1, img_size, cv2.CV_32FC1)
+
+    # Fold the resize (source_size -> img_size) into the map. cv2.resize with INTER_LINEAR
+    # samples the source at (x + 0.5) * scale - 0.5, so apply the same transform here and
+    # remap can read straight from the native ZED frame.
+    scale_x = source_size[0] / img_size[0]
+    scale_y = source_size[1] / img_size[1]
+    map_x = (map_x + 0.5) * scale_x - 0.5
+    map_y = (map_y + 0.5) * scale_y - 0.5
+
+    # Fixed-point maps are the fastest format for cv2.remap
+    return cv2.convertMaps(map_x, map_y, cv2.CV_16SC2)
+
+
+def _save_npy(path, array):
+    # Write to a temporary file first so a crash never leaves a truncated map behind
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        np.save(f, array)
+    os.replace(tmp_path, path)
+
+
+def get_rectification_maps(calib_path, source_size, cache_dir=None):
+    # Returns (map1, map2, img_size) for a single cv2.remap from a native source_size
+    # (width, height) frame to the calibration image size
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.dirname(os.path.abspath(calib_path)), CACHE_DIR_NAME)
+
+    key = f"{calibration_hash(calib_path)[:16]}_{source_size[0]}x{source_size[1]}"
+    map1_path = os.path.join(cache_dir, f"{key}_map1.npy")
+    map2_path = os.path.join(cache_dir, f"{key}_map2.npy")
+
+    calib = np.load(calib_path)
+    img_size = tuple(int(v) for v in calib['imageSize'])
+
+    if not (os.path.isfile(map1_path) and os.path.isfile(map2_path)):
+        print(f"Building rectification maps for {source_size[0]}x{source_size[1]}...")
+        map1, map2 = build_fused_maps(calib, source_size)
+        os.makedirs(cache_dir, exist_ok=True)
+        _save_npy(map1_path, map1)
+        _save_npy(map2_path, map2)
+
+    # Memory-mapped, so a restart only pages in the maps instead of recomputing them
+    map1 = np.load(map1_path, mmap_mode='r')
+    map2 = np.load(map2_path, mmap_mode='r')
+    return map1, map2, img_size
@@ -0,0 +1,105 @@
+import numpy as np
+import cv2
+from camera_feature import depth_colorizer
+
+
+def compute_output_size(target_aspect_ratio=1.33, window_width=1280, window_height=720):
+    # Fit the aspect ratio into the window (same rule display_live_feed always used)
+    new_height = int(window_width / target_aspect_ratio)
+    if new_height > window_height:
+        new_height = window_height
+        new_width = int(new_height * target_aspect_ratio)
+    else:
+        new_width = window_width
+    return new_width, new_height
+
+
+def compute_crop_window(width, height, zoom_factor):
+    # Centre crop that emulates the narrower DAVIS field of view
+    zoom_w = int(width / zoom_factor)
+    zoom_h = int(height / zoom_factor)
+    start_x = (width - zoom_w) // 2
+    start_y = (height - zoom_h) // 2
+    return start_x, start_y, zoom_w, zoom_h
+
+
+class RoiPipeline:
+    # Crops first, then does all per-pixel work on the ROI only, writing into buffers
+    # that are allocated once and reused for every frame.
+
+    def __init__(self, zoom_factor=3.0, output_size=None, colorizer=None):
+        self.zoom_factor = zoom_factor
+        self.output_size = output_size if output_size is not None else compute_output_size()
+        self.colorizer = colorizer if colorizer is not None else depth_colorizer.DepthColorizer()
+        self.source_shape = None
+        self.crop = None
+        self.buffers = {}
+
+        # Allocation accounting: buffers (re)allocated while processing the last frame
+        self.frame_allocations = 0
+        self.total_allocations = 0
+        self.frames = 0
+
+    def _configure(self, shape):
+        height, width = shape[:2]
+        self.source_shape = shape[:2]
+        self.crop = compute_crop_window(width, height, self.zoom_factor)
+
+    def _buffer(self, name, shape, dtype):
+        buf = self.buffers.get(name)
+        if buf is None or buf.shape != shape or buf.dtype != dtype:
+            buf = np.empty(shape, dtype)
+            self.buffers[name] = buf
+            self.frame_allocations += 1
+        return buf
+
+    def _check(self, name, result):
+        # OpenCV silently allocates a new array when dst does not match; count and keep it
+        if result is not self.buffers.get(name):
+            self.buffers[name] = result
+            self.frame_allocations += 1
+        return result
+
+    def _roi(self, data):
+        if self.source_shape != data.shape[:2]:
+            self._configure(data.shape)
+        start_x, start_y, zoom_w, zoom_h = self.crop
+        # Slicing is a view, no pixels are copied
+        return data[start_y:start_y + zoom_h, start_x:start_x + zoom_w]
+
+    def begin_frame(self):
+        self.frame_allocations = 0
+
+    def end_frame(self):
+        self.frames += 1
+        self.total_allocations += self.frame_allocations
+        return self.frame_allocations
+
+    def process_rgb(self, img_np):
+        roi = self._roi(img_np)
+        width, height = self.output_size
+        out = self._buffer("rgb_out", (height, width) + roi.shape[2:], roi.dtype)
+        return self._check("rgb_out", cv2.resize(roi, (width, height), dst=out))
+
+    def process_depth(self, depth_mm):
+        # Metric depth (MEASURE.DEPTH); colour the ROI at source size, the colorizer reuses its buffer
+        roi = self._roi(depth_mm)
+        width, height = self.output_size
+        colored = self._check("depth_color", self.colorizer.colorize(roi))
+
+        # Nearest neighbour keeps invalid (black) pixels from blending into valid depth
+        out = self._buffer("depth_out", (height, width, 4), np.uint8)
+        return self._check("depth_out", cv2.resize(colored, (width, height), dst=out, interpolation=cv2.INTER_NEAREST))
+
+    def process_confidence(self, conf_data):
+        roi = self._roi(conf_data)
+        width, height = self.output_size
+
+        norm = self._buffer("conf_norm", roi.shape[:2], np.uint8)
+        norm = self._check("conf_norm", cv2.normalize(roi, norm, 0, 255, cv2.NORM_MINMAX, cv2.CV_8U))
+
+        colored = self._buffer("conf_color", roi.shape[:2] + (3,), np.uint8)
+        colored = self._check("conf_color", cv2.applyColorMap(norm, cv2.COLORMAP_JET, dst=colored))
+
+        out = self._buffer("conf_out", (height, width, 3), np.uint8)
+        return self._check("conf_out", cv2.resize(colored, (width, height), dst=out))
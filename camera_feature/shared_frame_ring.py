@@ -0,0 +1,142 @@
+import numpy as np
+from multiprocessing import shared_memory
+
+# Frame shapes of the streams main.run_both_davis_zed publishes
+ZED_VGA_SHAPE = (376, 672, 4)  # ZED left image (BGRA) at RESOLUTION.VGA
+DAVIS_SHAPE = (260, 346, 3)  # DAVIS346 APS frame converted to BGR
+
+DEFAULT_SLOTS = 8
+
+# Header layout (int64): num_slots, height, width, channels, latest_seq, dtype code
+_HEADER_FIELDS = 6
+_LATEST = 4
+_DTYPE = 5
+DTYPES = (np.dtype(np.uint8), np.dtype(np.float32))
+
+
+def _open_shm(name):
+    # Attaching processes must not unlink the block when they exit; only the creator owns it.
+    # Python 3.13+ supports track=False, older versions register every attach with the
+    # resource tracker, so skip the registration while attaching.
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        from multiprocessing import resource_tracker
+        register = resource_tracker.register
+        resource_tracker.register = lambda *args, **kwargs: None
+        try:
+            return shared_memory.SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register
+
+
+class SharedFrameRing:
+    # Single-writer, multi-reader ring of fixed-size frame slots in shared memory.
+    #
+    # Every slot carries the sequence number of the frame it holds and its sensor timestamp (ns).
+    # The writer marks a slot with -1 while it copies a frame in, then stores the frame's
+    # sequence number and finally bumps latest_seq. Readers never lock: they look up the
+    # slot for a sequence number, use the pixels in place and afterwards check that the slot
+    # still holds the same sequence number (seqlock-style); if not, the frame was overwritten.
+
+    def __init__(self, shm, owner):
+        self.shm = shm
+        self.owner = owner
+        header = np.ndarray((_HEADER_FIELDS,), dtype=np.int64, buffer=shm.buf)
+        num_slots, height, width, channels = (int(v) for v in header[:4])
+        self.header = header
+        self.num_slots = num_slots
+        self.frame_shape = (height, width, channels)
+        self.dtype = DTYPES[int(header[_DTYPE])]
+
+        offset = header.nbytes
+        self.slot_seq = np.ndarray((num_slots,), dtype=np.int64, buffer=shm.buf, offset=offset)
+        offset += self.slot_seq.nbytes
+        self.slot_timestamp = np.ndarray((num_slots,), dtype=np.int64, buffer=shm.buf, offset=offset)
+        offset += self.slot_timestamp.nbytes
+        self.frames = np.ndarray((num_slots,) + self.frame_shape, dtype=self.dtype, buffer=shm.buf, offset=offset)
+
+    @classmethod
+    def create(cls, frame_shape, num_slots=DEFAULT_SLOTS, name=None, dtype=np.uint8):
+        height, width, channels = frame_shape
+        dtype = np.dtype(dtype)
+        size = 8 * (_HEADER_FIELDS + 2 * num_slots) + num_slots * height * width * channels * dtype.itemsize
+        shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        header = np.ndarray((_HEADER_FIELDS,), dtype=np.int64, buffer=shm.buf)
+        header[:] = (num_slots, height, width, channels, 0, DTYPES.index(dtype))
+        ring = cls(shm, owner=True)
+        ring.slot_seq[:] = 0
+        ring.slot_timestamp[:] = 0
+        del header
+        return ring
+
+    @classmethod
+    def attach(cls, name):
+        return cls(_open_shm(name), owner=False)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    @property
+    def latest_seq(self):
+        return int(self.header[_LATEST])
+
+    # --- Writer side ---
+
+    def write(self, frame, timestamp_ns):
+        # Returns False (and drops the frame) if it does not match the slot shape
+        if frame.ndim == 2:
+            frame = frame[:, :, None]
+        if frame.shape != self.frame_shape:
+            return False
+        seq = self.latest_seq + 1
+        slot = (seq - 1) % self.num_slots
+
+        self.slot_seq[slot] = -1
+        np.copyto(self.frames[slot], frame)
+        self.slot_timestamp[slot] = timestamp_ns
+        self.slot_seq[slot] = seq
+        self.header[_LATEST] = seq
+        return True
+
+    # --- Reader side ---
+
+    def read(self, seq):
+        # Zero-copy view of frame `seq`, or None if it is not (or no longer) in the ring.
+        # Call is_valid(seq) after using the view to make sure it was not overwritten meanwhile.
+        if seq <= 0:
+            return None
+        slot = (seq - 1) % self.num_slots
+        if self.slot_seq[slot] != seq:
+            return None
+        return int(self.slot_timestamp[slot]), self.frames[slot]
+
+    def read_latest(self):
+        # Returns (seq, timestamp_ns, view) of the newest complete frame, or None
+        while True:
+            seq = self.latest_seq
+            if seq == 0:
+                return None
+            result = self.read(seq)
+            if result is not None:
+                return (seq,) + result
+
+    def is_valid(self, seq):
+        return self.slot_seq[(seq - 1) % self.num_slots] == seq
+
+    def find(self, timestamp_ns):
+        # Sequence number of the frame with this timestamp, or 0 if it is not in the ring
+        slots = np.flatnonzero(self.slot_timestamp == timestamp_ns)
+        for slot in slots:
+            seq = int(self.slot_seq[slot])
+            if seq > 0:
+                return seq
+        return 0
+
+    def close(self):
+        # Drop the numpy views first, SharedMemory refuses to close while they are exported
+        self.header = self.slot_seq = self.slot_timestamp = self.frames = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
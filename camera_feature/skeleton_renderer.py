@@ -0,0 +1,81 @@
+import numpy as np
+import cv2
+
+# Batched BODY_34 skeleton overlay: all bodies are drawn from one (N, 34, 2) keypoint array,
+# with a single vectorized validity mask, one polylines call for every bone and one
+# fancy-indexing write for every joint.
+
+NUM_KEYPOINTS = 34
+
+# sl.BODY_34_PARTS pairs, same as the ZED SDK's BODY_34_BONES
+BODY_34_BONES = np.array([
+    (0, 1), (1, 2), (2, 4), (4, 5), (5, 6), (6, 7), (7, 8), (8, 9), (7, 10),
+    (2, 11), (11, 12), (12, 13), (13, 14), (14, 15), (15, 16), (14, 17),
+    (0, 18), (18, 19), (19, 20), (20, 21), (0, 22), (22, 23), (23, 24), (24, 25),
+    (2, 3), (3, 26), (26, 27), (27, 28), (28, 29), (27, 30), (30, 31),
+    (20, 32), (24, 33), (32, 21), (33, 25),
+], dtype=np.intp)
+
+JOINT_COLOR = (0, 255, 0)
+BONE_COLOR = (0, 200, 0)
+
+_disk_cache = {}
+
+
+def _disk_offsets(radius):
+    # Pixel offsets of a filled circle, computed once per radius
+    offsets = _disk_cache.get(radius)
+    if offsets is None:
+        dy, dx = np.mgrid[-radius:radius + 1, -radius:radius + 1]
+        inside = dx * dx + dy * dy <= radius * radius
+        offsets = (dy[inside].astype(np.intp), dx[inside].astype(np.intp))
+        _disk_cache[radius] = offsets
+    return offsets
+
+
+def _color_for(image, color):
+    # Same as cv2 drawing functions: missing channels (e.g. alpha of BGRA) are set to 0
+    channels = 1 if image.ndim == 2 else image.shape[2]
+    return np.array((tuple(color) + (0, 0, 0, 0))[:channels], dtype=image.dtype)
+
+
+def collect_keypoints(bodies, tracking_ok):
+    # Stack keypoint_2d of every tracked body into one (N, 34, 2) float32 array
+    keypoints = [body.keypoint_2d for body in bodies.body_list if body.tracking_state == tracking_ok]
+    if not keypoints:
+        return np.empty((0, NUM_KEYPOINTS, 2), np.float32)
+    return np.asarray(keypoints, dtype=np.float32).reshape(-1, NUM_KEYPOINTS, 2)
+
+
+def valid_keypoint_mask(keypoints, width, height):
+    # (N, 34) mask: not NaN and inside the image, in one vectorized step
+    x = keypoints[..., 0]
+    y = keypoints[..., 1]
+    with np.errstate(invalid='ignore'):
+        return (x >= 0) & (x < width) & (y >= 0) & (y < height)
+
+
+def draw_skeletons(image, keypoints, radius=3, draw_bones=True, bone_thickness=1, joint_color=JOINT_COLOR,
+                   bone_color=BONE_COLOR):
+    if len(keypoints) == 0:
+        return image
+    height, width = image.shape[:2]
+    valid = valid_keypoint_mask(keypoints, width, height)
+    # NaN compares False above, so the cast below only ever sees valid, in-bounds points
+    pixels = np.where(valid[..., None], keypoints, 0).astype(np.int32)
+
+    if draw_bones:
+        start, end = BODY_34_BONES[:, 0], BODY_34_BONES[:, 1]
+        bone_valid = valid[:, start] & valid[:, end]
+        segments = np.stack([pixels[:, start], pixels[:, end]], axis=2)[bone_valid]
+        if len(segments):
+            cv2.polylines(image, list(segments.reshape(-1, 2, 1, 2)), False, bone_color, bone_thickness)
+
+    joints = pixels[valid]
+    if len(joints):
+        dy, dx = _disk_offsets(radius)
+        ys = (joints[:, 1:2] + dy).ravel()
+        xs = (joints[:, 0:1] + dx).ravel()
+        inside = (xs >= 0) & (xs < width) & (ys >= 0) & (ys < height)
+        image[ys[inside], xs[inside]] = _color_for(image, joint_color)
+    return image
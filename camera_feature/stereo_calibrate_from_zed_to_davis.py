@@ -5,6 +5,8 @@ import os
 import time
 # You will need dv_processing installed and accessible in this single process
 import dv_processing as dv # Assuming dv_processing is used for DAVIS
+from camera_feature import circle_grid_worker
+from camera_feature import incremental_calibration
 
 def run():
     # --- Configuration ---
@@ -14,8 +16,8 @@ def run():
     SPACING_MM = 50.0 # Spacing between circle centers in millimeters
     NUM_POINTS = NUM_ROWS * NUM_COLS
 
-    # Target number of successful views for calibration
-    TARGET_CALIBRATION_VIEWS = 20
+    # Upper bound on views; collection stops earlier once the stereo solution has converged
+    MAX_CALIBRATION_VIEWS = 20
 
     # --- 1. Define the physical pattern 3D points (objp) ---
     # This is based on your 4x5 circle grid with 50mm spacing.
@@ -223,16 +225,17 @@ def run():
 
     print("-" * 40)
 
-    # --- Prepare the lists for calibration input ---
-    # These lists will be populated during the capture loop.
-    objectPoints_list = [] # List of objp arrays (one for each successful view)
-    imagePoints1_list = [] # List of 2D points from Camera 1 (DAVIS)
-    imagePoints2_list = [] # List of 2D points from Camera 2 (ZED Left)
+    # --- Incremental calibrator ---
+    # Re-solves R/T after every accepted view (warm-started), skips near-duplicate views and
+    # tracks board coverage; collection stops as soon as the solution has converged.
+    calibrator = incremental_calibration.IncrementalStereoCalibrator(
+        objp, davis_camera_matrix, davis_dist_coeffs, davis_image_size,
+        zed_camera_matrix, zed_dist_coeffs, imageSize_for_stereo)
 
 
     # --- Main Synchronized Capture Loop ---
     print("\nStarting synchronized capture loop for stereo calibration data...")
-    print(f"Target number of successful views: {TARGET_CALIBRATION_VIEWS}")
+    print(f"Collecting views until the solution converges (at most {MAX_CALIBRATION_VIEWS}).")
     print("Move the pattern to different positions and orientations.")
     print("Press 'c' to CAPTURE a frame pair and attempt pattern detection.")
     print("Press 'q' to QUIT.")
@@ -246,8 +249,13 @@ def run():
     image_zed = sl.Mat()
     runtime_params_zed = sl.RuntimeParameters()
 
+    # Circle-grid detection runs in the background on the newest frame pair
+    detector = circle_grid_worker.CircleGridWorker((NUM_COLS, NUM_ROWS))
+    pair_id = 0
+    capture_blocked_until = 0.0
 
-    while len(objectPoints_list) < TARGET_CALIBRATION_VIEWS:
+
+    while len(calibrator) < MAX_CALIBRATION_VIEWS and not calibrator.converged:
         # --- Synchronized Capture Attempt ---
         # The goal is to get frames from BOTH cameras as close in time as possible.
         # The exact method depends on your hardware and SDKs.
@@ -280,33 +288,34 @@ def run():
                 davis_cv_image = cv2.cvtColor(davis_cv_image, cv2.COLOR_GRAY2BGR)
 
 
-            # --- Pattern Detection ---
-            # Convert to grayscale for detection
-            gray_davis = cv2.cvtColor(davis_cv_image, cv2.COLOR_BGR2GRAY)
-            gray_zed = cv2.cvtColor(zed_cv_image, cv2.COLOR_BGR2GRAY)
+            # --- Pattern Detection (background) ---
+            # The pair goes to the detection worker; the preview shows the newest finished result
+            pair_id += 1
+            detector.submit(pair_id, davis_cv_image, zed_cv_image)
+            result = detector.latest()
 
-            # Find the circle grid in both images
-            # Use cv2.CALIB_CB_SYMMETRIC_GRID for symmetric grid
-            # Use cv2.CALIB_CB_ASYMMETRIC_GRID for asymmetric grid
-            # Check OpenCV docs for specific flags if needed (e.g., adaptiveThreshold, normalization)
-            ret1, corners1 = cv2.findCirclesGrid(gray_davis, (NUM_COLS, NUM_ROWS), None, cv2.CALIB_CB_SYMMETRIC_GRID)
-            ret2, corners2 = cv2.findCirclesGrid(gray_zed, (NUM_COLS, NUM_ROWS), None, cv2.CALIB_CB_SYMMETRIC_GRID)
+            # --- Display Preview with Detection Results and board coverage so far ---
+            display_davis = calibrator.davis_coverage.overlay(davis_cv_image)
+            display_zed = calibrator.zed_coverage.overlay(zed_cv_image)
 
-            # --- Display Preview with Detection Results ---
-            display_davis = davis_cv_image.copy()
-            display_zed = zed_cv_image.copy()
+            ret1 = result is not None and result.found_davis
+            ret2 = result is not None and result.found_zed
+            age = f" ({pair_id - result.pair_id} behind)" if result is not None else ""
 
             if ret1:
-                cv2.drawChessboardCorners(display_davis, (NUM_COLS, NUM_ROWS), corners1, ret1)
-                cv2.putText(display_davis, "Pattern Found", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 0), 2)
+                cv2.drawChessboardCorners(display_davis, (NUM_COLS, NUM_ROWS), result.corners_davis, ret1)
+                cv2.putText(display_davis, "Pattern Found" + age, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 0), 2)
             else:
-                 cv2.putText(display_davis, "Pattern NOT Found", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 255), 2)
+                 cv2.putText(display_davis, "Pattern NOT Found" + age, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 255), 2)
 
             if ret2:
-                cv2.drawChessboardCorners(display_zed, (NUM_COLS, NUM_ROWS), corners2, ret2)
-                cv2.putText(display_zed, "Pattern Found", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 0), 2)
+                cv2.drawChessboardCorners(display_zed, (NUM_COLS, NUM_ROWS), result.corners_zed, ret2)
+                cv2.putText(display_zed, "Pattern Found" + age, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 0), 2)
             else:
-                 cv2.putText(display_zed, "Pattern NOT Found", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 255), 2)
+                 cv2.putText(display_zed, "Pattern NOT Found" + age, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 255), 2)
+
+            status = calibrator.status()
+            cv2.putText(display_zed, status, (10, display_zed.shape[0] - 15), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 0), 1)
 
             cv2.imshow("DAVIS View", display_davis)
             cv2.imshow("ZED Left View", display_zed)
@@ -314,23 +323,14 @@ def run():
             # --- Collect Data if Pattern Found in BOTH Images ---
             key = cv2.waitKey(1) & 0xFF # Check for key press while displaying
 
-            if key == ord('c'): # Press 'c' to trigger data collection for this view
+            if key == ord('c') and time.perf_counter() >= capture_blocked_until: # Press 'c' to trigger data collection for this view
                 if ret1 and ret2:
-                    print(f"View {len(objectPoints_list) + 1}/{TARGET_CALIBRATION_VIEWS}: Pattern found in BOTH cameras. Collecting data.")
-
-                    # Refine corner locations (optional but recommended)
-                    criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 30, 0.001)
-                    cv2.cornerSubPix(gray_davis, corners1, (11, 11), (-1, -1), criteria)
-                    cv2.cornerSubPix(gray_zed, corners2, (11, 11), (-1, -1), criteria)
-
-                    # Append data to the lists
-                    objectPoints_list.append(objp)
-                    imagePoints1_list.append(corners1) # DAVIS points
-                    imagePoints2_list.append(corners2) # ZED points
-
-                    print(f"Collected {len(objectPoints_list)} views so far.")
-                    # Add a small delay after collecting to avoid accidental double-capture
-                    time.sleep(0.5)
+                    # Circle centers are used as detected: cornerSubPix pulls them towards the circle edges
+                    accepted, message = calibrator.add_view(result.corners_davis, result.corners_zed)
+                    print(f"View {'accepted' if accepted else 'skipped'}: {message}")
+                    print(calibrator.status())
+                    # Ignore 'c' for a moment to avoid accidental double-capture, without freezing the preview
+                    capture_blocked_until = time.perf_counter() + 0.5
 
                 else:
                      print("Pattern not found in both images. Not collecting data for this view.")
@@ -353,6 +353,8 @@ def run():
 
     # --- Cleanup ---
     print("\nCapture loop finished.")
+    print(f"Detection: {detector.detected} pairs checked, {detector.dropped} stale pairs dropped.")
+    detector.close()
     zed.close()
     # Add your DAVIS cleanup code here
     if davis_camera:
@@ -362,66 +364,27 @@ def run():
     cv2.destroyAllWindows()
 
     # --- Final Check and Stereo Calibration ---
-    if len(objectPoints_list) >= TARGET_CALIBRATION_VIEWS:
-        print(f"\nSuccessfully collected data from {len(objectPoints_list)} image pairs.")
-        print("objectPoints_list, imagePoints1_list, and imagePoints2_list are ready.")
-
-        # --- Now you can call cv2.stereoCalibrate ---
-        # Ensure you have your intrinsic parameters loaded correctly:
-        # davis_camera_matrix, davis_dist_coeffs
-        # zed_camera_matrix, zed_dist_coeffs
-        # And the consistent imageSize_for_stereo
-
-        print("\nCalling cv2.stereoCalibrate...")
-        # Flags: cv2.CALIB_FIX_INTRINSIC is common if intrinsics are already good
-        # cv2.CALIB_USE_INTRINSIC_GUESS if you want to refine them
-        flags = cv2.CALIB_FIX_INTRINSIC
-        criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 30, 0.001)
-
-        try:
-            ret, CM1_opt, DC1_opt, CM2_opt, DC2_opt, R, T, E, F = cv2.stereoCalibrate(
-                objectPoints_list,
-                imagePoints1_list, # DAVIS 2D points
-                imagePoints2_list, # ZED Left 2D points
-                davis_camera_matrix, davis_dist_coeffs,
-                zed_camera_matrix, zed_dist_coeffs,
-                imageSize_for_stereo,
-                flags=flags, criteria=criteria)
-
-            print("\nStereo calibration successful!")
-            print(f"Overall Reprojection Error: {ret}") # Lower is better
-            print("Rotation Matrix (R) from DAVIS to ZED Left (3x3):\n", R)
-            print("Translation Vector (T) from DAVIS to ZED Left (3x1):\n", T)
-            # T is in the same units as your spacing_mm (millimeters in this case)
-
-            # E and F are also computed, representing the epipolar geometry
-            # print("\nEssential Matrix (E):\n", E)
-            # print("\nFundamental Matrix (F):\n", F)
-
-            if not (flags & cv2.CALIB_FIX_INTRINSIC):
-                print("\nRefined Camera Matrix 1 (DAVIS):\n", CM1_opt)
-                print("\nRefined Distortion Coefficients 1 (DAVIS):\n", DC1_opt)
-                print("\nRefined Camera Matrix 2 (ZED Left):\n", CM2_opt)
-                print("\nRefined Distortion Coefficients 2 (ZED Left):\n", DC2_opt)
-
-
-            # --- Save Calibration Results ---
-            print("\nSaving calibration results to stereo_calibration.npz")
-            np.savez("stereo_calibration.npz", R=R, T=T, E=E, F=F,
-                     cameraMatrix1=davis_camera_matrix, distCoeffs1=davis_dist_coeffs,
-                     cameraMatrix2=zed_camera_matrix, distCoeffs2=zed_dist_coeffs,
-                     imageSize=imageSize_for_stereo)
-            print("Results saved.")
-
-
-        except Exception as e:
-            print(f"\nError during cv2.stereoCalibrate: {e}")
-            print("Stereo calibration failed.")
-
+    # The calibrator has solved after every view, so the result is already there
+    if calibrator.R is not None and (calibrator.converged or len(calibrator) >= MAX_CALIBRATION_VIEWS):
+        print(f"\nStereo calibration {'converged' if calibrator.converged else 'finished'} with {len(calibrator)} image pairs "
+              f"({calibrator.skipped} near-duplicates skipped).")
+        print(f"Overall Reprojection Error: {calibrator.rms}") # Lower is better
+        print("Per-view errors (DAVIS, ZED):\n", calibrator.per_view_errors)
+        print("Rotation Matrix (R) from DAVIS to ZED Left (3x3):\n", calibrator.R)
+        print("Translation Vector (T) from DAVIS to ZED Left (3x1):\n", calibrator.T)
+        # T is in the same units as your spacing_mm (millimeters in this case)
+
+        # --- Save Calibration Results ---
+        print("\nSaving calibration results to stereo_calibration.npz")
+        np.savez("stereo_calibration.npz", R=calibrator.R, T=calibrator.T, E=calibrator.E, F=calibrator.F,
+                 cameraMatrix1=davis_camera_matrix, distCoeffs1=davis_dist_coeffs,
+                 cameraMatrix2=zed_camera_matrix, distCoeffs2=zed_dist_coeffs,
+                 imageSize=imageSize_for_stereo)
+        print("Results saved.")
 
     else:
-        print(f"\nDid not collect enough successful image pairs ({len(objectPoints_list)}/{TARGET_CALIBRATION_VIEWS}).")
-        print("Stereo calibration was not performed.")
+        print(f"\nThe solution did not converge ({calibrator.status()}).")
+        print("Stereo calibration was not saved.")
 
 if __name__ == "__main__":
     run()
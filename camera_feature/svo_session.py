@@ -0,0 +1,220 @@
+import queue
+import threading
+import time
+import pyzed.sl as sl
+
+# Shared SVO playback session for the ZED players.
+#
+# The camera is opened once, so the depth model (NEURAL) is loaded once. At the end of the file
+# the session rewinds in place with set_svo_position(0) instead of close() + open(), and the first
+# frame after the rewind is flagged as `looped`. A background thread grabs and retrieves ahead of
+# the player into a bounded buffer of `prefetch` frames, so decode and depth time overlap with
+# display and a loop restart costs no more than any other frame.
+#
+# retrieve maps names to sl.VIEW or sl.MEASURE values; every frame carries a copy of each
+# (sl.Mat buffers are reused by the next retrieve). All ZED calls stay on the prefetch thread:
+# seeks are requests that the thread applies before its next grab, and frames decoded before a
+# seek are dropped by the reader.
+
+DEFAULT_PREFETCH = 8
+GRAB_RETRY_S = 0.01  # Wait after a failed grab
+MAX_GRAB_FAILURES = 100  # Consecutive grab errors before playback ends
+
+
+class SvoFrame:
+    def __init__(self, position, timestamp_ns, data, bodies, looped, generation):
+        self.position = position
+        self.timestamp_ns = timestamp_ns
+        self.data = data
+        self.bodies = bodies
+        self.looped = looped
+        self.generation = generation
+
+    def __getitem__(self, name):
+        return self.data[name]
+
+
+class SvoSession:
+    def __init__(self, path, retrieve, prefetch=DEFAULT_PREFETCH, resolution=sl.RESOLUTION.HD1080,
+                 depth_mode=sl.DEPTH_MODE.NEURAL, loop=True):
+        self.path = path
+        self.retrieve = dict(retrieve)
+        self.prefetch = max(1, prefetch)
+        self.loop = loop
+
+        input_type = sl.InputType()
+        input_type.set_from_svo_file(path)
+        self.init = sl.InitParameters(input_t=input_type)
+        self.init.camera_resolution = resolution
+        self.init.depth_mode = depth_mode
+        self.init.coordinate_units = sl.UNIT.MILLIMETER
+        self.init.svo_real_time_mode = False  # The player paces playback, the session decodes ahead
+
+        self.zed = sl.Camera()
+        self.runtime_params = sl.RuntimeParameters()
+        self.body_runtime_params = None
+
+        self.frames = queue.Queue(self.prefetch)
+        self.lock = threading.Lock()
+        self.generation = 0
+        self.pending_seek = None
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.ended = False
+        self.camera_information = None
+        self.number_of_frames = -1
+
+        self.loops = 0
+        self.decoded = 0
+        self.discarded = 0
+        self.decode_seconds = 0.0
+        self.wait_seconds = 0.0  # Time the reader spent waiting for the prefetch thread
+
+    def open(self):
+        # Returns the sl.ERROR_CODE; enable tracking modules on self.zed between open() and start()
+        err = self.zed.open(self.init)
+        if err == sl.ERROR_CODE.SUCCESS:
+            self.camera_information = self.zed.get_camera_information()
+            self.number_of_frames = self.zed.get_svo_number_of_frames()
+        return err
+
+    @property
+    def fps(self):
+        return self.camera_information.camera_configuration.fps
+
+    @property
+    def resolution(self):
+        return self.camera_information.camera_configuration.resolution
+
+    def enable_bodies(self, body_runtime_params):
+        # Retrieve sl.Bodies with every frame; body tracking must already be enabled on self.zed
+        self.body_runtime_params = body_runtime_params
+
+    def start(self):
+        self.thread = threading.Thread(target=self._prefetch_loop, daemon=True)
+        self.thread.start()
+        return self
+
+    def _retrieve(self, mats):
+        data = {}
+        for name, kind in self.retrieve.items():
+            if isinstance(kind, sl.MEASURE):
+                self.zed.retrieve_measure(mats[name], kind)
+            else:
+                self.zed.retrieve_image(mats[name], kind)
+            data[name] = mats[name].get_data().copy()
+        bodies = None
+        if self.body_runtime_params is not None:
+            bodies = sl.Bodies()
+            self.zed.retrieve_bodies(bodies, self.body_runtime_params)
+        return data, bodies
+
+    def _put(self, frame):
+        while not self.stop_event.is_set():
+            try:
+                self.frames.put(frame, timeout=0.1)
+                return
+            except queue.Full:
+                if frame is not None and frame.generation != self.generation:
+                    return  # A seek made this frame stale while waiting
+
+    def _prefetch_loop(self):
+        mats = {name: sl.Mat() for name in self.retrieve}
+        position = 0
+        looped = False
+        failures = 0
+        while not self.stop_event.is_set():
+            with self.lock:
+                generation = self.generation
+                if self.pending_seek is not None:
+                    position = self.pending_seek
+                    self.zed.set_svo_position(position)
+                    self.pending_seek = None
+                    looped = False
+
+            start = time.perf_counter()
+            err = self.zed.grab(self.runtime_params)
+            if err == sl.ERROR_CODE.END_OF_SVOFILE_REACHED:
+                if not self.loop:
+                    self.ended = True
+                    self._put(None)
+                    return
+                # Rewind in place: the camera, and with it the depth model, stays open
+                self.zed.set_svo_position(0)
+                position = 0
+                looped = True
+                self.loops += 1
+                continue
+            if err != sl.ERROR_CODE.SUCCESS:
+                failures += 1
+                if failures >= MAX_GRAB_FAILURES:
+                    # A damaged file: end playback like a non-looping session does
+                    print(f"Grab failed {failures} times in a row ({err}). Stopping playback.")
+                    self.ended = True
+                    self._put(None)
+                    return
+                self.stop_event.wait(GRAB_RETRY_S)
+                continue
+            failures = 0
+
+            data, bodies = self._retrieve(mats)
+            timestamp_ns = self.zed.get_timestamp(sl.TIME_REFERENCE.IMAGE).get_nanoseconds()
+            self.decode_seconds += time.perf_counter() - start
+            self.decoded += 1
+            self._put(SvoFrame(position, timestamp_ns, data, bodies, looped, generation))
+            position += 1
+            looped = False
+
+    def read(self, timeout=None):
+        # Next frame in playback order; None at the end (loop=False) or when nothing arrived in time
+        start = time.perf_counter()
+        try:
+            while True:
+                frame = self.frames.get(timeout=timeout)
+                if frame is None or frame.generation == self.generation:
+                    return frame
+                self.discarded += 1
+        except queue.Empty:
+            return None
+        finally:
+            self.wait_seconds += time.perf_counter() - start
+
+    def seek(self, position):
+        with self.lock:
+            self.generation += 1
+            self.pending_seek = max(0, int(position))
+        # Frames still buffered belong to the old position
+        while True:
+            try:
+                self.frames.get_nowait()
+                self.discarded += 1
+            except queue.Empty:
+                break
+
+    def skip(self, count, current_position):
+        # Drop `count` frames after current_position: buffered ones are discarded, otherwise seek
+        if count <= 0:
+            return
+        if self.frames.qsize() >= count:
+            for _ in range(count):
+                if self.read(timeout=0) is None:
+                    break
+            return
+        target = current_position + 1 + count
+        if self.number_of_frames > 0 and target >= self.number_of_frames:
+            target = 0
+        self.seek(target)
+
+    def buffered(self):
+        return self.frames.qsize()
+
+    def status(self):
+        decode_ms = self.decode_seconds / self.decoded * 1000 if self.decoded else 0.0
+        return (f"buffered {self.buffered()}/{self.prefetch}, decode {decode_ms:.1f} ms, "
+                f"{self.loops} loops, {self.discarded} discarded")
+
+    def close(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+        self.zed.close()
@@ -0,0 +1,250 @@
+import time
+import types
+from datetime import timedelta
+import numpy as np
+
+# Hardware-free stand-in for the subset of dv_processing this project uses.
+# headless_runner.install() registers it as dv_processing, so the DAVIS modules run
+# unchanged on machines without a DAVIS camera or the dv-processing library.
+
+# Load settings, change them with configure()
+settings = {
+    "resolution": (346, 260),  # DAVIS346
+    "fps": 30,  # APS frame rate
+    "event_rate": 1e6,  # Events per second
+    "batch_us": 1000,  # Time span of one getNextEventBatch() result
+    "duration_s": 10.0,  # Camera stops running after this much sensor time
+    "realtime": False,  # Pace batches at sensor time instead of running as fast as possible
+}
+
+# Counters for throughput measurements
+stats = {"events": 0, "batches": 0, "frames": 0}
+
+# Structured layout of EventStore.numpy(), same field names and types as dv_processing
+EVENT_DTYPE = np.dtype([("timestamp", "<i8"), ("x", "<i2"), ("y", "<i2"), ("polarity", "i1")])
+
+
+def configure(**kwargs):
+    for key, value in kwargs.items():
+        if key not in settings:
+            raise ValueError(f"Unknown synthetic DAVIS setting: {key}")
+        settings[key] = value
+
+
+def reset_stats():
+    for key in stats:
+        stats[key] = 0
+
+
+class EventStore:
+    def __init__(self, events=None):
+        self.events = events if events is not None else np.empty(0, EVENT_DTYPE)
+
+    def __len__(self):
+        return len(self.events)
+
+    def isEmpty(self):
+        return len(self.events) == 0
+
+    def numpy(self):
+        return self.events
+
+    def timestamps(self):
+        return self.events["timestamp"]
+
+    def coordinates(self):
+        return np.stack([self.events["x"], self.events["y"]], axis=1)
+
+    def polarities(self):
+        return self.events["polarity"]
+
+    def getLowestTime(self):
+        return int(self.events["timestamp"][0]) if len(self.events) else 0
+
+    def getHighestTime(self):
+        return int(self.events["timestamp"][-1]) if len(self.events) else 0
+
+    def sliceTime(self, start_time, end_time):
+        timestamps = self.events["timestamp"]
+        lo, hi = np.searchsorted(timestamps, [start_time, end_time])
+        return EventStore(self.events[lo:hi])
+
+
+class Frame:
+    def __init__(self, timestamp, image):
+        self.timestamp = timestamp
+        self.image = image
+
+
+class _CameraType:
+    DAVIS = "DAVIS"
+    DVXPLORER = "DVXPLORER"
+    ANY = "ANY"
+
+
+class CameraCapture:
+    CameraType = _CameraType
+
+    def __init__(self, camera_name="", camera_type=_CameraType.ANY):
+        self.width, self.height = settings["resolution"]
+        self.rng = np.random.default_rng(0)
+        self.start_us = time.time_ns() // 1000
+        self.time_us = self.start_us
+        self.end_us = self.start_us + int(settings["duration_s"] * 1e6)
+        self.next_frame_us = self.start_us
+        self.wall_start = time.perf_counter()
+        self.frames = [_aps_frame(self.width, self.height, i) for i in range(4)]
+        self.frame_count = 0
+
+    def isRunning(self):
+        return self.time_us < self.end_us
+
+    def getEventResolution(self):
+        return (self.width, self.height)
+
+    def getFrameResolution(self):
+        return (self.width, self.height)
+
+    def isEventStreamAvailable(self):
+        return True
+
+    def isFrameStreamAvailable(self):
+        return True
+
+    def getNextEventBatch(self):
+        if not self.isRunning():
+            return None
+        if settings["realtime"]:
+            delay = (self.time_us - self.start_us) / 1e6 - (time.perf_counter() - self.wall_start)
+            if delay > 0:
+                time.sleep(delay)
+
+        batch_us = settings["batch_us"]
+        count = self.rng.poisson(settings["event_rate"] * batch_us / 1e6)
+        events = np.empty(count, EVENT_DTYPE)
+        events["timestamp"] = np.sort(self.rng.integers(self.time_us, self.time_us + batch_us, count))
+        # Events cluster around a bar sweeping across the sensor, like an edge under motion
+        bar_x = (self.time_us - self.start_us) // 2000 % self.width
+        events["x"] = (bar_x + self.rng.normal(0, 6, count)).astype(np.int64) % self.width
+        events["y"] = self.rng.integers(0, self.height, count)
+        events["polarity"] = self.rng.integers(0, 2, count)
+        self.time_us += batch_us
+
+        stats["events"] += count
+        stats["batches"] += 1
+        return EventStore(events)
+
+    def getNextFrame(self):
+        if self.time_us < self.next_frame_us:
+            return None
+        frame = Frame(self.next_frame_us, self.frames[self.frame_count % len(self.frames)])
+        self.next_frame_us += int(1e6 / settings["fps"])
+        self.frame_count += 1
+        stats["frames"] += 1
+        return frame
+
+
+def _aps_frame(width, height, phase):
+    ys, xs = np.mgrid[0:height, 0:width]
+    return ((xs * 3 + ys * 2 + phase * 20) % 256).astype(np.uint8)
+
+
+class _SliceData:
+    def __init__(self, events, frames):
+        self.events = events
+        self.frames = frames
+
+    def getEvents(self, name):
+        return self.events[name]
+
+    def getFrames(self, name):
+        return self.frames[name]
+
+
+class EventMultiStreamSlicer:
+    # Time-interval slicing keyed on the main event stream, like dv.EventMultiStreamSlicer
+    def __init__(self, main_stream_name):
+        self.main_stream = main_stream_name
+        self.event_streams = {main_stream_name: []}
+        self.frame_streams = {}
+        self.jobs = []
+
+    def addEventStream(self, name):
+        self.event_streams[name] = []
+
+    def addFrameStream(self, name):
+        self.frame_streams[name] = []
+
+    def doEveryTimeInterval(self, interval, callback):
+        interval_us = int(interval / timedelta(microseconds=1))
+        self.jobs.append({"interval_us": interval_us, "callback": callback, "start_us": None})
+
+    def accept(self, name, data):
+        if name in self.event_streams:
+            if len(data):
+                self.event_streams[name].append(data.numpy())
+        else:
+            self.frame_streams[name].extend(data)
+        if name == self.main_stream and len(data):
+            self._evaluate(data.getHighestTime())
+
+    def _evaluate(self, highest_time):
+        for job in self.jobs:
+            if job["start_us"] is None:
+                job["start_us"] = int(self.event_streams[self.main_stream][0]["timestamp"][0])
+            while highest_time >= job["start_us"] + job["interval_us"]:
+                start, end = job["start_us"], job["start_us"] + job["interval_us"]
+                job["callback"](self._slice(start, end))
+                job["start_us"] = end
+        self._trim(min(job["start_us"] for job in self.jobs) if self.jobs else highest_time)
+
+    def _slice(self, start, end):
+        events = {}
+        for name, chunks in self.event_streams.items():
+            merged = np.concatenate(chunks) if chunks else np.empty(0, EVENT_DTYPE)
+            lo, hi = np.searchsorted(merged["timestamp"], [start, end])
+            events[name] = EventStore(merged[lo:hi])
+        frames = {name: [f for f in stream if start <= f.timestamp < end] for name, stream in self.frame_streams.items()}
+        return _SliceData(events, frames)
+
+    def _trim(self, keep_from):
+        # Drop data that every job has already sliced past
+        for name, chunks in self.event_streams.items():
+            self.event_streams[name] = [c for c in chunks if len(c) and c["timestamp"][-1] >= keep_from]
+        for name, stream in self.frame_streams.items():
+            self.frame_streams[name] = [f for f in stream if f.timestamp >= keep_from]
+
+
+class EventVisualizer:
+    def __init__(self, resolution, background_color=(255, 255, 255), positive_color=(0, 255, 0),
+                 negative_color=(0, 0, 255)):
+        self.resolution = resolution
+        self.background_color = background_color
+        self.positive_color = positive_color
+        self.negative_color = negative_color
+
+    def generateImage(self, events, background=None):
+        if background is None:
+            width, height = self.resolution
+            image = np.empty((height, width, 3), np.uint8)
+            image[:] = self.background_color
+        else:
+            image = background.copy()
+        data = events.numpy()
+        positive = data["polarity"] > 0
+        image[data["y"][positive], data["x"][positive]] = self.positive_color
+        image[data["y"][~positive], data["x"][~positive]] = self.negative_color
+        return image
+
+
+# dv.io / dv.visualization namespaces
+io = types.SimpleNamespace(CameraCapture=CameraCapture)
+visualization = types.SimpleNamespace(
+    EventVisualizer=EventVisualizer,
+    colors=types.SimpleNamespace(
+        white=lambda: (255, 255, 255),
+        black=lambda: (0, 0, 0),
+        green=lambda: (0, 255, 0),
+        red=lambda: (0, 0, 255),
+    ),
+)
@@ -0,0 +1,536 @@
+import enum
+import math
+import time
+import numpy as np
+
+# Hardware-free stand-in for the subset of pyzed.sl this project uses.
+# headless_runner.install() registers it as pyzed.sl, so the camera_feature modules run
+# unchanged on machines without a ZED camera, GPU or ZED SDK.
+
+# Load settings, change them with configure()
+settings = {
+    "resolution": None,  # Overrides InitParameters.camera_resolution, e.g. "HD1080"
+    "fps": None,  # Overrides InitParameters.camera_fps
+    "svo_frames": 300,  # Frames in a synthetic SVO before END_OF_SVOFILE_REACHED
+    "num_bodies": 2,  # Bodies returned by retrieve_bodies
+    "realtime": False,  # Pace grab() at the camera fps instead of running as fast as possible
+    "pool_size": 4,  # Precomputed frames cycled through, keeps generation cost out of the loop
+}
+
+# Counters for throughput measurements
+stats = {"grabs": 0, "retrieves": 0}
+
+
+def configure(**kwargs):
+    for key, value in kwargs.items():
+        if key not in settings:
+            raise ValueError(f"Unknown synthetic ZED setting: {key}")
+        settings[key] = value
+
+
+def reset_stats():
+    for key in stats:
+        stats[key] = 0
+
+
+class ERROR_CODE(enum.Enum):
+    SUCCESS = 0
+    FAILURE = 1
+    CAMERA_NOT_DETECTED = 2
+    INVALID_SVO_FILE = 3
+    END_OF_SVOFILE_REACHED = 4
+
+
+class RESOLUTION(enum.Enum):
+    HD2K = 0
+    HD1080 = 1
+    HD720 = 2
+    VGA = 3
+    AUTO = 4
+
+
+RESOLUTION_SIZES = {
+    RESOLUTION.HD2K: (2208, 1242),
+    RESOLUTION.HD1080: (1920, 1080),
+    RESOLUTION.HD720: (1280, 720),
+    RESOLUTION.VGA: (672, 376),
+    RESOLUTION.AUTO: (1280, 720),
+}
+
+DEFAULT_FPS = {
+    RESOLUTION.HD2K: 15,
+    RESOLUTION.HD1080: 30,
+    RESOLUTION.HD720: 60,
+    RESOLUTION.VGA: 100,
+    RESOLUTION.AUTO: 60,
+}
+
+
+class DEPTH_MODE(enum.Enum):
+    NONE = 0
+    PERFORMANCE = 1
+    QUALITY = 2
+    ULTRA = 3
+    NEURAL = 4
+
+
+class UNIT(enum.Enum):
+    MILLIMETER = 0
+    CENTIMETER = 1
+    METER = 2
+
+
+class VIEW(enum.Enum):
+    LEFT = 0
+    RIGHT = 1
+    DEPTH = 9
+    CONFIDENCE = 10
+
+
+class MEASURE(enum.Enum):
+    DISPARITY = 0
+    DEPTH = 1
+    CONFIDENCE = 2
+    XYZ = 3
+
+
+class MEM(enum.Enum):
+    CPU = 0
+    GPU = 1
+
+
+class MAT_TYPE(enum.Enum):
+    F32_C1 = 0
+    F32_C4 = 3
+    U8_C1 = 4
+    U8_C4 = 7
+
+
+class TIME_REFERENCE(enum.Enum):
+    IMAGE = 0
+    CURRENT = 1
+
+
+class REFERENCE_FRAME(enum.Enum):
+    WORLD = 0
+    CAMERA = 1
+
+
+class SVO_COMPRESSION_MODE(enum.Enum):
+    LOSSLESS = 0
+    H264 = 1
+    H265 = 2
+
+
+class BODY_TRACKING_MODEL(enum.Enum):
+    HUMAN_BODY_FAST = 0
+    HUMAN_BODY_MEDIUM = 1
+    HUMAN_BODY_ACCURATE = 2
+
+
+class BODY_FORMAT(enum.Enum):
+    BODY_18 = 0
+    BODY_34 = 1
+    BODY_38 = 2
+
+
+class OBJECT_TRACKING_STATE(enum.Enum):
+    OFF = 0
+    OK = 1
+    SEARCHING = 2
+    TERMINATE = 3
+
+
+class Resolution:
+    def __init__(self, width=0, height=0):
+        self.width = width
+        self.height = height
+
+
+class Timestamp:
+    def __init__(self, ns=0):
+        self.data_ns = int(ns)
+
+    def get_nanoseconds(self):
+        return self.data_ns
+
+    def get_microseconds(self):
+        return self.data_ns // 1000
+
+    def get_milliseconds(self):
+        return self.data_ns // 1000000
+
+    def get_seconds(self):
+        return self.data_ns // 1000000000
+
+
+class InputType:
+    def __init__(self):
+        self.svo_file = None
+
+    def set_from_svo_file(self, svo_input_filename):
+        self.svo_file = svo_input_filename
+
+
+class InitParameters:
+    def __init__(self, input_t=None, camera_resolution=RESOLUTION.AUTO, camera_fps=0,
+                 depth_mode=DEPTH_MODE.NEURAL, coordinate_units=UNIT.MILLIMETER, sdk_verbose=1,
+                 svo_real_time_mode=False):
+        self.input = input_t if input_t is not None else InputType()
+        self.camera_resolution = camera_resolution
+        self.camera_fps = camera_fps
+        self.depth_mode = depth_mode
+        self.coordinate_units = coordinate_units
+        self.sdk_verbose = sdk_verbose
+        self.svo_real_time_mode = svo_real_time_mode
+        self.depth_minimum_distance = -1
+        self.depth_maximum_distance = -1
+
+
+class RuntimeParameters:
+    def __init__(self):
+        self.measure3D_reference_frame = REFERENCE_FRAME.CAMERA
+        self.enable_depth = True
+        self.confidence_threshold = 95
+
+
+class PositionalTrackingParameters:
+    pass
+
+
+class BodyTrackingParameters:
+    def __init__(self):
+        self.detection_model = BODY_TRACKING_MODEL.HUMAN_BODY_ACCURATE
+        self.enable_tracking = True
+        self.enable_body_fitting = False
+        self.body_format = BODY_FORMAT.BODY_18
+
+
+class BodyTrackingRuntimeParameters:
+    def __init__(self):
+        self.detection_confidence_threshold = 50
+
+
+class RecordingParameters:
+    def __init__(self, video_filename="", compression_mode=SVO_COMPRESSION_MODE.H264):
+        self.video_filename = video_filename
+        self.compression_mode = compression_mode
+
+
+class Mat:
+    # Only CPU memory; get_data() returns the backing array without a copy like the SDK does
+    def __init__(self, width=0, height=0, mat_type=MAT_TYPE.U8_C4, memory_type=MEM.CPU):
+        self.data = None
+        if width and height:
+            self.data = np.zeros(_mat_shape(width, height, mat_type), _mat_dtype(mat_type))
+
+    def _fill(self, source):
+        if self.data is None or self.data.shape != source.shape or self.data.dtype != source.dtype:
+            self.data = np.empty_like(source)
+        np.copyto(self.data, source)
+
+    def get_data(self, memory_type=MEM.CPU, deep_copy=False):
+        if self.data is None:
+            return None
+        return self.data.copy() if deep_copy else self.data
+
+    def get_width(self):
+        return 0 if self.data is None else self.data.shape[1]
+
+    def get_height(self):
+        return 0 if self.data is None else self.data.shape[0]
+
+
+def _mat_shape(width, height, mat_type):
+    channels = 4 if mat_type in (MAT_TYPE.U8_C4, MAT_TYPE.F32_C4) else 1
+    return (height, width, channels) if channels > 1 else (height, width)
+
+
+def _mat_dtype(mat_type):
+    return np.float32 if mat_type in (MAT_TYPE.F32_C1, MAT_TYPE.F32_C4) else np.uint8
+
+
+class Translation:
+    def __init__(self, values):
+        self.values = np.asarray(values, dtype=np.float64)
+
+    def get(self):
+        return self.values
+
+
+class Transform:
+    def __init__(self, translation):
+        self.translation = Translation(translation)
+
+    def get_translation(self):
+        return self.translation
+
+
+class CameraParameters:
+    def __init__(self, width, height):
+        # Scaled from the ZED 2 VGA intrinsics in stereo_calibration.npz
+        scale = width / 672.0
+        self.fx = 333.51 * scale
+        self.fy = 333.51 * scale
+        self.cx = width / 2.0
+        self.cy = height / 2.0
+        self.disto = np.zeros(12, dtype=np.float64)
+        self.h_fov = math.degrees(2 * math.atan(width / (2 * self.fx)))
+        self.v_fov = math.degrees(2 * math.atan(height / (2 * self.fy)))
+        self.image_size = Resolution(width, height)
+
+
+class CalibrationParameters:
+    def __init__(self, width, height):
+        self.left_cam = CameraParameters(width, height)
+        self.right_cam = CameraParameters(width, height)
+        self.stereo_transform = Transform([-120.0, 0.0, 0.0])
+
+
+class CameraConfiguration:
+    def __init__(self, width, height, fps):
+        self.resolution = Resolution(width, height)
+        self.fps = fps
+        self.calibration_parameters = CalibrationParameters(width, height)
+
+
+class CameraInformation:
+    def __init__(self, width, height, fps):
+        self.serial_number = 0
+        self.camera_configuration = CameraConfiguration(width, height, fps)
+
+
+class BodyData:
+    def __init__(self):
+        self.id = -1
+        self.unique_object_id = ""
+        self.tracking_state = OBJECT_TRACKING_STATE.OFF
+        self.confidence = 0.0
+        self.keypoint_2d = np.zeros((34, 2), np.float32)
+        self.keypoint = np.zeros((34, 3), np.float32)
+        self.keypoint_confidence = np.zeros(34, np.float32)
+        self.position = np.zeros(3, np.float32)
+        self.bounding_box_2d = np.zeros((4, 2), np.float32)
+
+
+class Bodies:
+    def __init__(self):
+        self.body_list = []
+        self.timestamp = Timestamp()
+        self.is_new = False
+        self.is_tracked = False
+
+
+# BODY_34 joint layout of a standing person, in body heights (x right, y down, origin at the pelvis)
+_SKELETON_34 = np.array([
+    (0.00, 0.00), (0.00, -0.12), (0.00, -0.25), (0.00, -0.33), (-0.04, -0.31), (-0.10, -0.31),
+    (-0.12, -0.18), (-0.14, -0.05), (-0.15, -0.02), (-0.16, 0.00), (-0.14, -0.01), (0.04, -0.31),
+    (0.10, -0.31), (0.12, -0.18), (0.14, -0.05), (0.15, -0.02), (0.16, 0.00), (0.14, -0.01),
+    (-0.05, 0.00), (-0.06, 0.24), (-0.06, 0.47), (-0.06, 0.52), (0.05, 0.00), (0.06, 0.24),
+    (0.06, 0.47), (0.06, 0.52), (0.00, -0.38), (0.00, -0.43), (-0.02, -0.45), (-0.04, -0.44),
+    (0.02, -0.45), (0.04, -0.44), (-0.06, 0.49), (0.06, 0.49),
+], dtype=np.float32)
+
+
+class Camera:
+    def __init__(self):
+        self.opened = False
+        self.svo = False
+        self.width = 0
+        self.height = 0
+        self.fps = 0
+        self.frame_index = -1
+        self.svo_position = 0
+        self.start_ns = 0
+        self.next_grab_time = 0.0
+        self.body_tracking = False
+        self.recording = False
+        self.pool = {}
+
+    # --- Lifecycle ---
+
+    def open(self, init_params=None):
+        init_params = init_params if init_params is not None else InitParameters()
+        resolution = init_params.camera_resolution
+        if settings["resolution"] is not None:
+            resolution = RESOLUTION[settings["resolution"]]
+        self.width, self.height = RESOLUTION_SIZES[resolution]
+        self.fps = settings["fps"] or init_params.camera_fps or DEFAULT_FPS[resolution]
+        self.svo = init_params.input.svo_file is not None
+        self.frame_index = -1
+        self.svo_position = 0
+        self.start_ns = time.time_ns()
+        self.next_grab_time = time.perf_counter()
+        self.pool = {}
+        self.opened = True
+        return ERROR_CODE.SUCCESS
+
+    def close(self):
+        self.opened = False
+        self.recording = False
+        self.pool = {}
+
+    def is_opened(self):
+        return self.opened
+
+    def get_camera_information(self):
+        return CameraInformation(self.width, self.height, self.fps)
+
+    def enable_positional_tracking(self, params=None):
+        return ERROR_CODE.SUCCESS
+
+    def enable_body_tracking(self, params=None):
+        self.body_tracking = True
+        return ERROR_CODE.SUCCESS
+
+    def enable_recording(self, params):
+        self.recording = True
+        return ERROR_CODE.SUCCESS
+
+    def disable_recording(self):
+        self.recording = False
+
+    # --- SVO navigation ---
+
+    def set_svo_position(self, frame_number):
+        self.svo_position = max(0, min(int(frame_number), settings["svo_frames"]))
+
+    def get_svo_position(self):
+        return self.svo_position
+
+    def get_svo_number_of_frames(self):
+        return settings["svo_frames"] if self.svo else -1
+
+    # --- Grab / retrieve ---
+
+    def grab(self, runtime_params=None):
+        if not self.opened:
+            return ERROR_CODE.FAILURE
+        if self.svo and self.svo_position >= settings["svo_frames"]:
+            return ERROR_CODE.END_OF_SVOFILE_REACHED
+
+        if settings["realtime"]:
+            delay = self.next_grab_time - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            self.next_grab_time = max(self.next_grab_time, time.perf_counter() - 1.0) + 1.0 / self.fps
+
+        self.frame_index = self.svo_position if self.svo else self.frame_index + 1
+        self.svo_position += 1
+        stats["grabs"] += 1
+        return ERROR_CODE.SUCCESS
+
+    def get_timestamp(self, time_reference=TIME_REFERENCE.IMAGE):
+        if time_reference == TIME_REFERENCE.CURRENT:
+            return Timestamp(time.time_ns())
+        return Timestamp(self.start_ns + int(self.frame_index * 1e9 / self.fps))
+
+    def _pooled(self, key, make):
+        frames = self.pool.get(key)
+        if frames is None:
+            frames = [make(i) for i in range(settings["pool_size"])]
+            self.pool[key] = frames
+        return frames[self.frame_index % len(frames)]
+
+    def _resize_target(self, resolution):
+        if resolution is None or not resolution.width or not resolution.height:
+            return self.width, self.height
+        return resolution.width, resolution.height
+
+    def retrieve_image(self, mat, view=VIEW.LEFT, memory_type=MEM.CPU, resolution=None):
+        width, height = self._resize_target(resolution)
+        if view == VIEW.DEPTH:
+            mat._fill(self._pooled(("depth_view", width, height), lambda i: _depth_view(width, height, i)))
+        elif view == VIEW.CONFIDENCE:
+            mat._fill(self._pooled(("confidence_view", width, height), lambda i: _confidence_view(width, height, i)))
+        else:
+            mat._fill(self._pooled(("image", view, width, height), lambda i: _color_image(width, height, i)))
+        stats["retrieves"] += 1
+        return ERROR_CODE.SUCCESS
+
+    def retrieve_measure(self, mat, measure=MEASURE.DEPTH, memory_type=MEM.CPU, resolution=None):
+        width, height = self._resize_target(resolution)
+        if measure == MEASURE.CONFIDENCE:
+            mat._fill(self._pooled(("confidence", width, height), lambda i: _confidence_measure(width, height, i)))
+        else:
+            mat._fill(self._pooled(("depth", width, height), lambda i: _depth_measure(width, height, i)))
+        stats["retrieves"] += 1
+        return ERROR_CODE.SUCCESS
+
+    def retrieve_bodies(self, bodies, body_runtime_params=None):
+        bodies.body_list = _bodies(self.width, self.height, self.frame_index, settings["num_bodies"])
+        bodies.timestamp = self.get_timestamp()
+        bodies.is_new = True
+        bodies.is_tracked = True
+        return ERROR_CODE.SUCCESS
+
+
+# --- Synthetic content ---
+
+def _depth_measure(width, height, phase):
+    # A tilted floor plane with a moving box in front of it, depth in millimetres.
+    # The SDK marks missing depth with NaN, add a band of it along the left border.
+    ys, xs = np.mgrid[0:height, 0:width].astype(np.float32)
+    depth = 1500.0 + 3000.0 * (ys / max(height - 1, 1)) + 300.0 * np.sin(xs / 40.0 + phase)
+    box_x = int(width * (0.3 + 0.1 * phase))
+    depth[height // 3:2 * height // 3, box_x:box_x + width // 5] = 900.0
+    depth[:, :width // 40] = np.nan
+    return depth.astype(np.float32)
+
+
+def _depth_view(width, height, phase):
+    depth = _depth_measure(width, height, phase)
+    gray = np.nan_to_num(255.0 - (depth - 500.0) * (255.0 / 5000.0), nan=0.0)
+    gray = np.clip(gray, 0, 255).astype(np.uint8)
+    return np.dstack([gray, gray, gray, np.full_like(gray, 255)])
+
+
+def _confidence_measure(width, height, phase):
+    ys, xs = np.mgrid[0:height, 0:width].astype(np.float32)
+    confidence = 50.0 + 49.0 * np.sin(xs / 25.0 + phase) * np.cos(ys / 30.0)
+    return confidence.astype(np.float32)
+
+
+def _confidence_view(width, height, phase):
+    gray = (_confidence_measure(width, height, phase) * 2.55).astype(np.uint8)
+    return np.dstack([gray, gray, gray, np.full_like(gray, 255)])
+
+
+def _color_image(width, height, phase):
+    rng = np.random.default_rng(phase)
+    ys, xs = np.mgrid[0:height, 0:width]
+    image = np.empty((height, width, 4), np.uint8)
+    image[..., 0] = (xs * 255 // max(width - 1, 1)).astype(np.uint8)
+    image[..., 1] = (ys * 255 // max(height - 1, 1)).astype(np.uint8)
+    image[..., 2] = ((xs + ys + phase * 16) % 256).astype(np.uint8)
+    image[..., 3] = 255
+    image[..., :3] = np.clip(image[..., :3] + rng.integers(-8, 8, (height, width, 3)), 0, 255).astype(np.uint8)
+    return image
+
+
+def _bodies(width, height, frame_index, num_bodies):
+    body_list = []
+    body_height = height * 0.8
+    for body_id in range(num_bodies):
+        # People walk left/right across the frame at different speeds
+        t = frame_index / 30.0 + body_id * 1.7
+        center_x = width * (0.5 + 0.4 * math.sin(t * (0.3 + 0.1 * body_id)))
+        center_y = height * 0.55
+
+        body = BodyData()
+        body.id = body_id
+        body.unique_object_id = f"synthetic-{body_id}"
+        body.tracking_state = OBJECT_TRACKING_STATE.OK
+        body.confidence = 80.0
+        body.keypoint_2d = (_SKELETON_34 * body_height + (center_x, center_y)).astype(np.float32)
+        # Occluded joints are reported as NaN
+        if (frame_index + body_id) % 5 == 0:
+            body.keypoint_2d[21] = np.nan
+        depth_mm = 2000.0 + 500.0 * body_id
+        body.keypoint[:, 0] = (body.keypoint_2d[:, 0] - width / 2.0) * depth_mm / (333.51 * width / 672.0)
+        body.keypoint[:, 1] = (body.keypoint_2d[:, 1] - height / 2.0) * depth_mm / (333.51 * width / 672.0)
+        body.keypoint[:, 2] = depth_mm
+        body.keypoint_confidence[:] = 90.0
+        body.position = body.keypoint[0].copy()
+        body_list.append(body)
+    return body_list
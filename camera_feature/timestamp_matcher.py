@@ -0,0 +1,303 @@
+import argparse
+import collections
+import sys
+import time
+import numpy as np
+
+# ZED <-> DAVIS timestamp pairing.
+#
+# ZED frame timestamps are nanoseconds, DAVIS frame and event timestamps are microseconds; both
+# are host-clock based, clock_offset_us corrects a known offset (added to the ZED time).
+# For every ZED frame the result holds the nearest DAVIS frame within the tolerance window
+# (-1 if there is none) and the range [event_start, event_end) of events between this ZED frame
+# and the next one.
+#
+# match_offline() does it for whole arrays with searchsorted. StreamingMatcher gives the same
+# result incrementally (live or while scanning a long recording), keeping only a bounded window;
+# every input is handled once, so matching is linear in frames plus events.
+#
+#   python -m camera_feature.timestamp_matcher     scaling check against match_offline
+
+MATCH_DTYPE = np.dtype([
+    ("zed_index", "<i8"),
+    ("zed_t_ns", "<i8"),
+    ("davis_index", "<i8"),
+    ("davis_t_us", "<i8"),
+    ("offset_us", "<i8"),  # davis_t_us - ZED time in us
+    ("event_start", "<i8"),
+    ("event_end", "<i8"),
+])
+
+DEFAULT_TOLERANCE_US = 20000
+
+
+def nearest_within(sorted_times, query, tolerance):
+    # Index of the nearest value in sorted_times for each query, -1 if further than tolerance
+    sorted_times = np.asarray(sorted_times, dtype=np.int64)
+    query = np.asarray(query, dtype=np.int64)
+    if len(sorted_times) == 0:
+        return np.full(len(query), -1, np.int64)
+    right = np.searchsorted(sorted_times, query).clip(0, len(sorted_times) - 1)
+    left = (right - 1).clip(0)
+    use_left = np.abs(query - sorted_times[left]) <= np.abs(sorted_times[right] - query)
+    nearest = np.where(use_left, left, right)
+    return np.where(np.abs(sorted_times[nearest] - query) <= tolerance, nearest, -1)
+
+
+def match_offline(zed_t_ns, davis_frame_t_us, event_t_us, tolerance_us=DEFAULT_TOLERANCE_US, clock_offset_us=0):
+    zed_t_ns = np.asarray(zed_t_ns, dtype=np.int64)
+    davis_frame_t_us = np.asarray(davis_frame_t_us, dtype=np.int64)
+    event_t_us = np.asarray(event_t_us, dtype=np.int64)
+    zed_t_us = zed_t_ns // 1000 + clock_offset_us
+
+    matches = np.empty(len(zed_t_ns), MATCH_DTYPE)
+    matches["zed_index"] = np.arange(len(zed_t_ns))
+    matches["zed_t_ns"] = zed_t_ns
+
+    davis_index = nearest_within(davis_frame_t_us, zed_t_us, tolerance_us)
+    found = davis_index >= 0
+    matches["davis_index"] = davis_index
+    matches["davis_t_us"] = np.where(found, davis_frame_t_us[davis_index] if len(davis_frame_t_us) else -1, -1)
+    matches["offset_us"] = np.where(found, matches["davis_t_us"] - zed_t_us, 0)
+
+    event_start = np.searchsorted(event_t_us, zed_t_us)
+    matches["event_start"] = event_start
+    matches["event_end"][:-1] = event_start[1:]
+    if len(matches):
+        matches["event_end"][-1] = len(event_t_us)
+    return matches
+
+
+class StreamingMatcher:
+    # Feed ZED frame timestamps, DAVIS frame timestamps and event timestamp batches in any
+    # interleaving (each stream in time order); pop_matches() returns the ZED frames whose
+    # pairing is final. Streams may lag each other by up to max_lag_us.
+
+    def __init__(self, tolerance_us=DEFAULT_TOLERANCE_US, clock_offset_us=0, max_lag_us=2000000):
+        self.tolerance_us = tolerance_us
+        self.clock_offset_us = clock_offset_us
+        self.max_lag_us = max_lag_us
+
+        # Pending ZED frames: [zed_index, t_ns, t_us, event_start or None]; the ones still waiting
+        # for their event index are also in awaiting_events (a suffix of pending, in time order)
+        self.pending = collections.deque()
+        self.awaiting_events = collections.deque()
+        self.zed_count = 0
+
+        # Recent DAVIS frames (index, t_us) and the newest DAVIS frame time seen
+        self.davis_frames = collections.deque()
+        self.davis_count = 0
+        self.davis_watermark = None
+
+        # Recent event batches (global index of first event, timestamps) and the newest event time
+        self.event_batches = collections.deque()
+        self.event_count = 0
+        self.event_watermark = None
+
+        self.ready = []
+
+        # High-water marks of the buffered inputs, to check that memory stays bounded
+        self.peak_pending = 0
+        self.peak_davis_frames = 0
+
+    # --- Input ---
+
+    def push_zed(self, t_ns):
+        t_us = int(t_ns) // 1000 + self.clock_offset_us
+        entry = [self.zed_count, int(t_ns), t_us, None]
+        self.zed_count += 1
+        if self.event_watermark is not None and self.event_watermark >= t_us:
+            entry[3] = self._event_index_from_history(t_us)
+        else:
+            self.awaiting_events.append(entry)
+        self.pending.append(entry)
+        self.peak_pending = max(self.peak_pending, len(self.pending))
+        self._emit()
+
+    def push_davis_frame(self, t_us):
+        self.davis_frames.append((self.davis_count, int(t_us)))
+        self.davis_count += 1
+        self.davis_watermark = int(t_us)
+        self.peak_davis_frames = max(self.peak_davis_frames, len(self.davis_frames))
+        self._emit()
+
+    def push_events(self, event_t_us):
+        event_t_us = np.asarray(event_t_us, dtype=np.int64)
+        if len(event_t_us) == 0:
+            return
+        base = self.event_count
+        self.event_batches.append((base, event_t_us))
+        self.event_count += len(event_t_us)
+        self.event_watermark = int(event_t_us[-1])
+
+        # Every waiting ZED frame at or before the new watermark gets its event index in one lookup.
+        # Earlier batches ended before these frames, so the first event >= t is in this batch.
+        waiting = []
+        while self.awaiting_events and self.awaiting_events[0][2] <= self.event_watermark:
+            waiting.append(self.awaiting_events.popleft())
+        if waiting:
+            times = np.fromiter((entry[2] for entry in waiting), np.int64, len(waiting))
+            for entry, offset in zip(waiting, np.searchsorted(event_t_us, times)):
+                entry[3] = base + int(offset)
+
+        # Bounded memory: forget event batches older than the lag window
+        horizon = self.event_watermark - self.max_lag_us
+        while len(self.event_batches) > 1 and self.event_batches[0][1][-1] < horizon:
+            self.event_batches.popleft()
+        self._emit()
+
+    # --- Output ---
+
+    def pop_matches(self):
+        matches = np.array(self.ready, MATCH_DTYPE) if self.ready else np.empty(0, MATCH_DTYPE)
+        self.ready = []
+        return matches
+
+    def flush(self):
+        # End of all streams: finalize every pending ZED frame with what has been seen
+        while self.awaiting_events:
+            self.awaiting_events.popleft()[3] = self.event_count
+        while self.pending:
+            entry = self.pending.popleft()
+            event_end = self.pending[0][3] if self.pending else self.event_count
+            self._finish(entry, event_end)
+        return self.pop_matches()
+
+    # --- Internals ---
+
+    def _event_index_from_history(self, t_us):
+        # ZED frame arrived after events past its time: look it up in the retained batches
+        for base, timestamps in self.event_batches:
+            if timestamps[-1] >= t_us:
+                return base + int(np.searchsorted(timestamps, t_us))
+        return self.event_count
+
+    def _emit(self):
+        while self.pending:
+            entry = self.pending[0]
+            davis_final = self.davis_watermark is not None and self.davis_watermark > entry[2] + self.tolerance_us
+            if not davis_final or entry[3] is None:
+                break
+            if len(self.pending) < 2 or self.pending[1][3] is None:
+                break
+            self.pending.popleft()
+            self._finish(entry, self.pending[0][3])
+
+        # Bounded memory: DAVIS frames too old for any pending (or future) ZED frame
+        oldest = self.pending[0][2] if self.pending else None
+        if oldest is not None:
+            while len(self.davis_frames) > 1 and self.davis_frames[1][1] < oldest - self.tolerance_us:
+                self.davis_frames.popleft()
+        elif self.davis_watermark is not None:
+            while len(self.davis_frames) > 1 and self.davis_frames[1][1] < self.davis_watermark - self.max_lag_us:
+                self.davis_frames.popleft()
+
+    def _finish(self, entry, event_end):
+        # ZED frames finish in time order, so DAVIS frames before the last one earlier than this
+        # frame can never be the nearest again: the candidates are the first two frames left
+        zed_index, t_ns, t_us, event_start = entry
+        while len(self.davis_frames) > 1 and self.davis_frames[1][1] < t_us:
+            self.davis_frames.popleft()
+
+        davis_index, davis_t_us, offset_us = -1, -1, 0
+        if self.davis_frames:
+            # Same choice as nearest_within(): the earlier frame wins a tie
+            nearest = self.davis_frames[0]
+            if nearest[1] < t_us and len(self.davis_frames) > 1 and \
+                    self.davis_frames[1][1] - t_us < t_us - nearest[1]:
+                nearest = self.davis_frames[1]
+            if abs(nearest[1] - t_us) <= self.tolerance_us:
+                davis_index, davis_t_us = nearest
+                offset_us = davis_t_us - t_us
+        self.ready.append((zed_index, t_ns, davis_index, davis_t_us, offset_us, event_start, event_end))
+
+
+def match_streams(zed_t_ns, davis_frame_t_us, event_batches, tolerance_us=DEFAULT_TOLERANCE_US, clock_offset_us=0,
+                  matcher=None):
+    # Feeds the three streams to a StreamingMatcher interleaved by time: before each event batch,
+    # the ZED and DAVIS frames up to the batch's last event. Only about one batch worth of frames
+    # is pending at any time.
+    zed_t_ns = np.asarray(zed_t_ns, dtype=np.int64)
+    davis_frame_t_us = np.asarray(davis_frame_t_us, dtype=np.int64)
+    zed_t_us = zed_t_ns // 1000 + clock_offset_us
+    matcher = matcher or StreamingMatcher(tolerance_us, clock_offset_us)
+
+    matches = []
+    zed_next = 0
+    davis_next = 0
+    for event_t_us in event_batches:
+        if len(event_t_us) == 0:
+            continue
+        last = int(event_t_us[-1])
+        zed_end = int(np.searchsorted(zed_t_us, last, side="right"))
+        davis_end = int(np.searchsorted(davis_frame_t_us, last, side="right"))
+        for t_ns in zed_t_ns[zed_next:zed_end]:
+            matcher.push_zed(t_ns)
+        for t_us in davis_frame_t_us[davis_next:davis_end]:
+            matcher.push_davis_frame(t_us)
+        zed_next, davis_next = zed_end, davis_end
+        matcher.push_events(event_t_us)
+        matches.append(matcher.pop_matches())
+
+    # Frames after the last event
+    for t_ns in zed_t_ns[zed_next:]:
+        matcher.push_zed(t_ns)
+    for t_us in davis_frame_t_us[davis_next:]:
+        matcher.push_davis_frame(t_us)
+    matches.append(matcher.flush())
+    return np.concatenate(matches)
+
+
+def match_recording(zed_t_ns, event_reader, tolerance_us=DEFAULT_TOLERANCE_US, clock_offset_us=0):
+    # Pair a ZED recording with an event_recording.EventRecordingReader. Events are streamed
+    # chunk by chunk, so memory stays bounded however long the recording is.
+    return match_streams(zed_t_ns, event_reader.frame_timestamps(), (chunk["t"] for chunk in event_reader.iter_chunks()),
+                         tolerance_us, clock_offset_us)
+
+
+def synthetic_streams(zed_frames, seed=0, events_per_s=5000, batch_events=4096):
+    # ZED at 30 fps, DAVIS frames at about 25 fps with jitter and events at events_per_s, in batches
+    rng = np.random.default_rng(seed)
+    start_us = 1_700_000_000_000_000
+    zed_t_ns = (start_us + np.arange(zed_frames) * 33333 + rng.integers(-500, 500, zed_frames)) * 1000
+    duration_us = zed_frames * 33333
+    davis_t_us = start_us + np.arange(0, duration_us, 40000) + rng.integers(-2000, 2000, len(range(0, duration_us, 40000)))
+    event_t_us = np.sort(start_us + rng.integers(0, duration_us, duration_us * events_per_s // 1000000))
+    batches = [event_t_us[i:i + batch_events] for i in range(0, len(event_t_us), batch_events)]
+    return zed_t_ns, np.sort(davis_t_us), event_t_us, batches
+
+
+def check_scaling(sizes, max_growth=2.0):
+    # Matches synthetic recordings of growing length, compares them with match_offline and checks
+    # that the time per ZED frame stays flat (linear total time) and the buffers stay bounded
+    per_frame = []
+    for zed_frames in sizes:
+        zed_t_ns, davis_t_us, event_t_us, batches = synthetic_streams(zed_frames)
+        matcher = StreamingMatcher()
+        start = time.perf_counter()
+        streamed = match_streams(zed_t_ns, davis_t_us, batches, matcher=matcher)
+        elapsed = time.perf_counter() - start
+        offline = match_offline(zed_t_ns, davis_t_us, event_t_us)
+        if not np.array_equal(streamed, offline):
+            print(f"{zed_frames} frames: streaming result differs from match_offline")
+            return False
+        per_frame.append(elapsed / zed_frames)
+        print(f"{zed_frames:>8} ZED frames, {len(event_t_us):>10} events: {elapsed:.3f} s, "
+              f"{per_frame[-1] * 1e6:.1f} us/frame, peak pending {matcher.peak_pending}, "
+              f"peak DAVIS frames {matcher.peak_davis_frames}")
+
+    growth = per_frame[-1] / per_frame[0]
+    print(f"Time per frame grew {growth:.2f}x from {sizes[0]} to {sizes[-1]} frames (allowed {max_growth:.1f}x)")
+    return growth <= max_growth
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Scaling check of the streaming ZED / DAVIS matcher")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[2000, 8000, 32000, 108000],
+                        help="ZED frames per synthetic recording (108000 = one hour at 30 fps)")
+    args = parser.parse_args(argv)
+    sys.exit(0 if check_scaling(args.sizes) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -25,7 +25,9 @@ def select_resolution():
 
     return resolutions.get(choice, sl.RESOLUTION.HD720)
 
-def run(duration=5):
+def run(duration=5, resolution=None, output_path=None):
+    # resolution: sl.RESOLUTION name (e.g. "HD720"), asked interactively when None
+
     # Create a ZED camera object
     zed = sl.Camera()
 
@@ -36,10 +38,11 @@ def run(duration=5):
     base_filename = "captured_video"
 
     # Get the next available filename with a unique timestamp
-    output_path = get_next_filename(directory, base_filename)
+    if output_path is None:
+        output_path = get_next_filename(directory, base_filename)
 
     # Select resolution from user input
-    resolution = select_resolution()
+    resolution = select_resolution() if resolution is None else sl.RESOLUTION[resolution]
 
     # Initialize the camera
     init_params = sl.InitParameters()
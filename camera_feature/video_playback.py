@@ -2,11 +2,10 @@ import sys
 import pyzed.sl as sl
 import cv2
 import os
+from camera_feature import playback_clock
+from camera_feature import svo_session
 
 def run():
-    # Create a ZED camera object
-    zed = sl.Camera()
-
     # Path to the folder containing the videos, go one level up from the current directory
     video_folder = os.path.join(os.path.dirname(__file__), '..', 'captured_videos')
 
@@ -37,53 +36,46 @@ def run():
 
     print(f"Playing video: {video_files[choice - 1]}")
 
-    input_type = sl.InputType()
-    input_type.set_from_svo_file(input_file)
-
-    init = sl.InitParameters(input_t=input_type)
-    init.camera_resolution = sl.RESOLUTION.HD1080
-    init.depth_mode = sl.DEPTH_MODE.NEURAL
-    init.coordinate_units = sl.UNIT.MILLIMETER
-
-    # Open the ZED camera or load the SVO file
-    err = zed.open(init)
+    # Decoding runs ahead on the session's thread; the file loops in place without reopening
+    session = svo_session.SvoSession(input_file, {"image": sl.VIEW.LEFT})
+    err = session.open()
     if err != sl.ERROR_CODE.SUCCESS:
         print(repr(err))
-        zed.close()
+        session.close()
         sys.exit(1)
+    session.start()
 
-    # Get original recording FPS and compute delay for real-time playback
-    camera_fps = zed.get_camera_information().camera_configuration.fps
-    frame_delay = int(1000 / camera_fps)  # in milliseconds
-
-    # Prepare runtime parameters
-    runtime = sl.RuntimeParameters()
-
-    # Get the resolution of the SVO file
-    image_size = zed.get_camera_information().camera_configuration.resolution
-
-    # Declare the image matrix
-    image_zed = sl.Mat(image_size.width, image_size.height, sl.MAT_TYPE.U8_C4)
+    # Get original recording FPS, frames are paced against presentation deadlines at that rate
+    clock = playback_clock.PlaybackClock(session.fps)
 
     cv2.namedWindow("Image", cv2.WINDOW_AUTOSIZE)
     key = ' '
-    print('Press q to close the playback window')
+    print('Press q to close the playback window, -/+ to change speed, b for benchmark mode')
 
+    steps = 1
+    frame = None
     while key != 113:  # 'q' to quit
-        err = zed.grab(runtime)
-        if err == sl.ERROR_CODE.SUCCESS:
-            zed.retrieve_image(image_zed, sl.VIEW.LEFT, sl.MEM.CPU, image_size)
-            image_ocv = image_zed.get_data()
-            cv2.imshow("Image", image_ocv)
-        elif err == sl.ERROR_CODE.END_OF_SVOFILE_REACHED:
-            print("End of file reached. Looping back.")
-            zed.set_svo_position(0)
-            continue
-
-        key = cv2.waitKey(frame_delay)
-
+        # A frame is only taken when one is due; otherwise the current one is held
+        if steps:
+            frame = session.read(timeout=1.0)
+            if frame is not None:
+                if frame.looped:
+                    print("End of file reached. Looping back.")
+                image_ocv = frame["image"]
+                cv2.putText(image_ocv, clock.status(), (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0, 255), 2)
+                cv2.imshow("Image", image_ocv)
+
+        key = cv2.waitKey(clock.wait_ms())
+        clock.handle_key(key & 0xFF)
+
+        # Frames whose deadline already passed are skipped instead of shown late
+        steps = clock.advance()
+        if steps > 1 and frame is not None:
+            session.skip(steps - 1, frame.position)
+
+    print(f"Playback: {clock.presented} frames shown, {clock.dropped} dropped, {session.status()}")
     cv2.destroyAllWindows()
-    zed.close()
+    session.close()
     print("\nFINISH")
 
 if __name__ == "__main__":
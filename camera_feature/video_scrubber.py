@@ -0,0 +1,96 @@
+import collections
+import cv2 as cv
+from camera_feature import frame_index
+
+# Random access into AVI recordings for scrubbing.
+#
+# read(frame) serves decoded frames from a byte-bounded LRU. On a miss it seeks the decoder to the
+# nearest keyframe at or before the target (from the frame index) and decodes forward, caching every
+# frame on the way, so stepping backwards afterwards is served from the cache. When the decoder is
+# already between that keyframe and the target it just keeps decoding without seeking.
+
+DEFAULT_CACHE_BYTES = 256 * 1024 * 1024
+
+
+class FrameLRU:
+    def __init__(self, max_bytes=DEFAULT_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.frames = collections.OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.frames)
+
+    def __contains__(self, frame_number):
+        return frame_number in self.frames
+
+    def get(self, frame_number):
+        frame = self.frames.get(frame_number)
+        if frame is None:
+            self.misses += 1
+            return None
+        self.frames.move_to_end(frame_number)
+        self.hits += 1
+        return frame
+
+    def put(self, frame_number, frame):
+        old = self.frames.pop(frame_number, None)
+        if old is not None:
+            self.bytes -= old.nbytes
+        self.frames[frame_number] = frame
+        self.bytes += frame.nbytes
+        while self.bytes > self.max_bytes and len(self.frames) > 1:
+            _, evicted = self.frames.popitem(last=False)
+            self.bytes -= evicted.nbytes
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class ScrubbingReader:
+    def __init__(self, path, cache_bytes=DEFAULT_CACHE_BYTES):
+        self.index = frame_index.load(path)
+        self.cap = cv.VideoCapture(path)
+        if not self.cap.isOpened():
+            raise RuntimeError(f"Could not open {path}")
+        self.cache = FrameLRU(cache_bytes)
+        self.position = 0  # Frame number the decoder returns next
+        self.seeks = 0
+        self.decoded = 0
+
+    def __len__(self):
+        return len(self.index)
+
+    @property
+    def fps(self):
+        return self.index.fps
+
+    def read(self, frame_number):
+        frame = self.cache.get(frame_number)
+        if frame is not None:
+            return frame
+
+        if self.index.meta["keyframes_known"]:
+            start = self.index.keyframe_before(frame_number)
+        else:
+            start = frame_number  # Let the backend find its own way there
+        if not start <= self.position <= frame_number:
+            self.cap.set(cv.CAP_PROP_POS_FRAMES, start)
+            self.position = start
+            self.seeks += 1
+
+        while self.position <= frame_number:
+            ok, frame = self.cap.read()
+            if not ok:
+                return None
+            self.cache.put(self.position, frame)
+            self.position += 1
+            self.decoded += 1
+        return frame
+
+    def release(self):
+        self.cap.release()
@@ -0,0 +1,100 @@
+import importlib
+import multiprocessing
+
+# Pre-spawned worker processes for the options that run in their own process.
+#
+# With the spawn start method every new process starts a fresh interpreter and imports numpy,
+# OpenCV and the camera SDKs before it can run anything. The pool starts its workers once, they
+# import the given modules up front and then wait for tasks, so starting an option costs a pipe
+# message. A worker goes back to idle when its task returns; if none is idle, a new one is spawned.
+#
+# The recording flag is a multiprocessing.Value, which can only be handed over at spawn time, so
+# every worker gets it as a process argument and passes it to tasks submitted with_flag=True.
+
+
+def _worker_main(conn, recording_flag, modules):
+    for name in modules:
+        importlib.import_module(name)
+    conn.send(("ready", None))
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            return
+        if task is None:
+            return
+        module_name, function_name, args, with_flag = task
+        if with_flag:
+            args = (recording_flag,) + tuple(args)
+        try:
+            getattr(importlib.import_module(module_name), function_name)(*args)
+            conn.send(("done", None))
+        except (Exception, SystemExit) as exc:
+            conn.send(("error", repr(exc)))
+
+
+class _Worker:
+    def __init__(self, context, recording_flag, modules):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn, recording_flag, modules), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.ready = False
+
+    def wait_ready(self, timeout=None):
+        try:
+            if not self.ready and self.conn.poll(timeout):
+                self.ready = self.conn.recv()[0] == "ready"
+        except EOFError:
+            pass  # The worker died while importing
+        return self.ready
+
+
+class WorkerPool:
+    def __init__(self, size, recording_flag, modules=()):
+        self.size = size
+        self.recording_flag = recording_flag
+        self.modules = tuple(modules)
+        self.context = multiprocessing.get_context()  # Same start method as the recording flag (spawn in main.py)
+        self.idle = []
+
+    def start(self):
+        # Workers warm up in the background; submit() waits for one if none is ready yet
+        self.idle = [self._spawn() for _ in range(self.size)]
+        return self
+
+    def _spawn(self):
+        return _Worker(self.context, self.recording_flag, self.modules)
+
+    def submit(self, module_name, function_name, *args, with_flag=False):
+        worker = self.idle.pop(0) if self.idle else self._spawn()
+        if not worker.wait_ready():
+            print(f"Worker for {module_name}.{function_name} failed to start.")
+            return None
+        worker.conn.send((module_name, function_name, args, with_flag))
+        return worker
+
+    def wait(self, workers):
+        # Blocks until every submitted task has returned; the workers become idle again
+        for worker in workers:
+            if worker is None:
+                continue
+            try:
+                status, detail = worker.conn.recv()
+            except EOFError:
+                print("Worker process exited.")
+                self.idle.append(self._spawn())
+                continue
+            if status == "error":
+                print(f"Worker task failed: {detail}")
+            self.idle.append(worker)
+
+    def close(self):
+        for worker in self.idle:
+            try:
+                worker.conn.send(None)
+            except OSError:
+                pass
+        for worker in self.idle:
+            worker.process.join(timeout=5)
+        self.idle = []
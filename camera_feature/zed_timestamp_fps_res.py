@@ -1,5 +1,5 @@
-import cv2
 import os
+from camera_feature import frame_index
 
 def run():
     # Path to the folder containing the DAVIS video
@@ -29,33 +29,25 @@ def run():
         return
 
     video_path = os.path.join(video_folder, video_files[choice - 1])
-    cap = cv2.VideoCapture(video_path)
 
-    if not cap.isOpened():
-        print("Failed to open the video.")
-        return
-
-    # Get video properties
-    fps = cap.get(cv2.CAP_PROP_FPS)
-    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-
-    duration_sec = frame_count / fps if fps else 0
+    # Recording facts come from the frame index sidecar, built on first use
+    index = frame_index.load(video_path)
+    width, height = index.resolution
 
-    print(f"FPS: {fps}")
+    print(f"FPS: {index.fps}")
     print(f"Resolution: {width}x{height}")
-    print(f"Frame Count: {frame_count}")
-    print(f"Duration (s): {duration_sec:.2f}")
+    print(f"Frame Count: {len(index)}")
+    print(f"Duration (s): {index.duration:.2f}")
 
-    # Timestamps in nanoseconds
-    first_frame_timestamp_ns = 0
-    last_frame_timestamp_ns = int(duration_sec * 1e9)
+    # Timestamps in nanoseconds (capture time if recorded, otherwise relative to the first frame)
+    time_range = index.time_range()
+    if time_range is None:
+        print("The video has no frames.")
+        return
+    first_frame_timestamp_ns, last_frame_timestamp_ns = time_range
 
     print(f"Start timestamp: {first_frame_timestamp_ns} ns")
     print(f"End timestamp: {last_frame_timestamp_ns} ns")
 
-    cap.release()
-
 if __name__ == "__main__":
     run()
@@ -1,86 +1,160 @@
+import time
+
+STARTED = time.perf_counter()
+
+import argparse
+import importlib
 import multiprocessing
-from camera_feature import camera_calibration
-from camera_feature import display_live_feed
-from camera_feature import zed_timestamp_fps_res
-from camera_feature import video_playback
-from camera_feature import display_body_tracking
-from camera_feature import display_depth_video
-from camera_feature import display_confidence_map
-from camera_feature import video_capture
-from camera_feature import display_all_features
-from camera_feature import display_davis_feed
-from camera_feature import display_davis_calibration
-from camera_feature import display_davis_playback
-from camera_feature import davis_timestamp_fps_res
-from camera_feature import stereo_calibrate_from_zed_to_davis
-from camera_feature import stereo_calibrate_from_dvsense_to_davis  # ✅ New import
-from camera_feature import display_extrinsic_parameters
-from camera_feature import display_rectified_view
-from camera_feature import convert_svo_to_mp4  # New import for SVO to MP4 conversion
-
-def run_both_davis_zed(recording_flag):
-    process1 = multiprocessing.Process(target=display_davis_feed.run, args=(recording_flag,))
-    process2 = multiprocessing.Process(target=display_live_feed.run, args=(recording_flag,))
-    process1.start()
-    process2.start()
-    process1.join()
-    process2.join()
-
-def main():
-    recording_flag = multiprocessing.Value('b', False)
+import sys
 
-    # Functions that require the recording_flag argument
-    options_with_args = {
-        "3": run_both_davis_zed,  # This requires recording_flag
-        "4": display_live_feed.run,  # This requires recording_flag
-        "5": display_davis_feed.run,  # This requires recording_flag
-        "17": display_rectified_view.run,
-    }
+# Menu options are registered by name and imported only when they are selected, so the menu (and a
+# single option run from the command line) does not pay for importing pyzed.sl, dv_processing and
+# OpenCV through every camera_feature module first.
+#
+#   python main.py                      interactive menu
+#   python main.py list                 options with their command names
+#   python main.py live-zed --record --output run1.svo
+#   python main.py 11 --input 2 --frames 300     (numbers work as command names too)
+#
+# Options answer their own prompts through input(); --input answers them in order for scheduled
+# jobs, and --frames runs without windows for that many loop iterations.
 
-    # Functions that do not require arguments
-    options = {
-        "1": camera_calibration.run,
-        "2": display_davis_calibration.run,
-        "6": display_davis_playback.run,
-        "7": davis_timestamp_fps_res.run,
-        "8": video_capture.run,
-        "9": zed_timestamp_fps_res.run,
-        "10": video_playback.run,
-        "11": display_depth_video.run,
-        "12": display_confidence_map.run,
-        "13": display_body_tracking.run,
-        "14": display_all_features.run,
-        "15": stereo_calibrate_from_zed_to_davis.run,
-        "16": display_extrinsic_parameters.run,
-        "18": stereo_calibrate_from_dvsense_to_davis.run,
-        "19": convert_svo_to_mp4.run,  # New option for SVO to MP4 conversion
-    }
+# Modules the pre-spawned workers import while the menu waits for input
+WORKER_MODULES = ("camera_feature.display_davis_feed", "camera_feature.display_live_feed")
 
-    while True:
-        print("\nChoose a function to run:")
-        print("1.  Display ZED Camera Calibration Info")
-        print("2.  Display DAVIS Camera Info")
-        print("3.  Display Both DAVIS and ZED Live Feed")
-        print("4.  Display ZED Live Feed")
-        print("5.  Display DAVIS Live Feed")
-        print("6.  Display DAVIS Playback")
-        print("7.  Display DAVIS Timestamp, FPS And Resolution")
-        print("8.  Capture ZED Video")
-        print("9.  Display ZED Timestamp, FPS And Resolution")
-        print("10. Display ZED RGB Playback")
-        print("11. Display ZED Depth Video")
-        print("12. Display ZED Confidence Map")
-        print("13. Display ZED Body Tracking")
-        print("14. Display ZED All Features")
-        print("15. StereoCalibrate ZED to DAVIS")
-        print("16. Display Extrinsic Parameter Info")
-        print("17. Display Rectified View from ZED and DAVIS")
-        print("18. StereoCalibrate DVSense to DAVIS")
-        print("19. Convert SVO to MP4")  # New option
-        print("0.  Exit")
 
+class MenuOption:
+    def __init__(self, key, command, title, target, args=(), device=None):
+        # target: "module:function"; args: the keyword arguments main passes (recording_flag,
+        # service_address, pool, output_path, resolution, duration, record_keypoints); device: "service"
+        # for options that attach to the camera service, "exclusive" for options that open the ZED themselves
+        self.key = key
+        self.command = command
+        self.title = title
+        self.target = target
+        self.args = args
+        self.device = device
+
+    def load(self):
+        module_name, function_name = self.target.split(":")
+        return getattr(importlib.import_module(module_name), function_name)
+
+
+OPTIONS = [
+    MenuOption("1", "zed-calibration", "Display ZED Camera Calibration Info",
+               "camera_feature.camera_calibration:run", ("service_address",), "service"),
+    MenuOption("2", "davis-info", "Display DAVIS Camera Info", "camera_feature.display_davis_calibration:run"),
+    MenuOption("3", "live-both", "Display Both DAVIS and ZED Live Feed", "main:run_both_davis_zed",
+               ("recording_flag", "service_address", "pool"), "service"),
+    MenuOption("4", "live-zed", "Display ZED Live Feed", "camera_feature.display_live_feed:run",
+               ("recording_flag", "service_address", "output_path"), "service"),
+    MenuOption("5", "live-davis", "Display DAVIS Live Feed", "camera_feature.display_davis_feed:run", ("recording_flag",)),
+    MenuOption("6", "davis-playback", "Display DAVIS Playback", "camera_feature.display_davis_playback:run"),
+    MenuOption("7", "davis-timestamps", "Display DAVIS Timestamp, FPS And Resolution",
+               "camera_feature.davis_timestamp_fps_res:run"),
+    MenuOption("8", "capture", "Capture ZED Video", "camera_feature.video_capture:run",
+               ("duration", "resolution", "output_path"), "exclusive"),
+    MenuOption("9", "zed-timestamps", "Display ZED Timestamp, FPS And Resolution", "camera_feature.zed_timestamp_fps_res:run"),
+    MenuOption("10", "playback", "Display ZED RGB Playback", "camera_feature.video_playback:run"),
+    MenuOption("11", "depth-video", "Display ZED Depth Video", "camera_feature.display_depth_video:run"),
+    MenuOption("12", "confidence-map", "Display ZED Confidence Map", "camera_feature.display_confidence_map:run"),
+    MenuOption("13", "body-tracking", "Display ZED Body Tracking", "camera_feature.display_body_tracking:run",
+               ("record_keypoints",)),
+    MenuOption("14", "all-features", "Display ZED All Features", "camera_feature.display_all_features:run",
+               ("record_keypoints",)),
+    MenuOption("15", "stereo-calibrate-zed", "StereoCalibrate ZED to DAVIS",
+               "camera_feature.stereo_calibrate_from_zed_to_davis:run", (), "exclusive"),
+    MenuOption("16", "extrinsics", "Display Extrinsic Parameter Info", "camera_feature.display_extrinsic_parameters:run"),
+    MenuOption("17", "rectified-view", "Display Rectified View from ZED and DAVIS", "camera_feature.display_rectified_view:run",
+               ("recording_flag", "service_address", "output_path"), "service"),
+    MenuOption("18", "stereo-calibrate-dvsense", "StereoCalibrate DVSense to DAVIS",
+               "camera_feature.stereo_calibrate_from_dvsense_to_davis:run", (), "exclusive"),
+    MenuOption("19", "svo-to-mp4", "Convert SVO to MP4", "camera_feature.convert_svo_to_mp4:run"),
+    MenuOption("20", "davis-depth", "Display ZED Depth in DAVIS View", "camera_feature.display_davis_depth:run"),
+]
+
+OPTIONS_BY_NAME = {name: option for option in OPTIONS for name in (option.key, option.command)}
+
+def run_both_davis_zed(recording_flag, service_address=None, pool=None):
+    from camera_feature import shared_frame_ring
+
+    # One shared-memory frame ring per camera; a fusion or recorder process can attach by name
+    davis_ring = shared_frame_ring.SharedFrameRing.create(shared_frame_ring.DAVIS_SHAPE)
+    zed_ring = shared_frame_ring.SharedFrameRing.create(shared_frame_ring.ZED_VGA_SHAPE)
+    print(f"DAVIS frame ring: {davis_ring.name}")
+    print(f"ZED frame ring: {zed_ring.name}")
+
+    if pool is not None:
+        # Already running workers with the camera modules imported, no interpreter start-up here
+        workers = [
+            pool.submit("camera_feature.display_davis_feed", "run", davis_ring.name, with_flag=True),
+            pool.submit("camera_feature.display_live_feed", "run", zed_ring.name, service_address, with_flag=True),
+        ]
+        pool.wait(workers)
+    else:
+        from camera_feature import display_davis_feed
+        from camera_feature import display_live_feed
+
+        process1 = multiprocessing.Process(target=display_davis_feed.run, args=(recording_flag, davis_ring.name))
+        process2 = multiprocessing.Process(target=display_live_feed.run, args=(recording_flag, zed_ring.name, service_address))
+        process1.start()
+        process2.start()
+        process1.join()
+        process2.join()
+
+    davis_ring.close()
+    zed_ring.close()
+
+def run_option(option, recording_flag, service=None, pool=None, settings=None, timing=False):
+    # Imports the option on first use and calls it with the arguments it declares
+    start = time.perf_counter()
+    function = option.load()
+    if timing:
+        print(f"Loaded {option.target} in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    values = {"recording_flag": recording_flag, "pool": pool}
+    if service is not None and option.device is not None and service.ready():
+        values["service_address"] = service.address
+    values.update(settings or {})
+    kwargs = {name: values[name] for name in option.args if values.get(name) is not None}
+
+    # The option opens the ZED itself with its own settings, so the service releases the device meanwhile
+    exclusive = option.device == "exclusive" and "service_address" in values
+    if exclusive:
+        service.suspend()
+    start = time.perf_counter()
+    try:
+        return function(**kwargs)
+    finally:
+        if exclusive:
+            service.resume()
+        if timing:
+            print(f"Option {option.key} ({option.command}) ran for {time.perf_counter() - start:.2f} s")
+
+def print_menu():
+    print("\nChoose a function to run:")
+    for option in OPTIONS:
+        print(f"{option.key + '.':<4}{option.title}")
+    print(f"{'0.':<4}Exit")
+
+def menu(timing=False):
+    from camera_feature import camera_service
+    from camera_feature import worker_pool
+
+    recording_flag = multiprocessing.Value('b', False)
+
+    # The live ZED stays open in the camera service between options; it opens in the background
+    # and options wait for it only when they need it. If it cannot be opened, the options open the
+    # camera themselves as before.
+    service = camera_service.CameraService().start()
+    pool = worker_pool.WorkerPool(2, recording_flag, WORKER_MODULES).start()
+    if timing:
+        print(f"Menu ready {(time.perf_counter() - STARTED) * 1000:.0f} ms after start")
+
+    while True:
+        print_menu()
         try:
-            choice = input("Enter the number (0-19): ").strip()
+            choice = input(f"Enter the number (0-{len(OPTIONS)}): ").strip()
         except (EOFError, KeyboardInterrupt):
             print("\nExiting...")
             break
@@ -88,15 +162,85 @@ def main():
         if choice == "0":
             print("Exiting...")
             break
-        elif choice in options_with_args:
-            print(f"\nRunning option {choice}...\n")
-            options_with_args[choice](recording_flag)  # Pass the recording_flag here
-        elif choice in options:
-            print(f"\nRunning option {choice}...\n")
-            options[choice]()  # No arguments needed
-        else:
+        option = OPTIONS_BY_NAME.get(choice)
+        if option is None:
             print("Invalid choice!")
+            continue
+        print(f"\nRunning option {option.key}...\n")
+        run_option(option, recording_flag, service, pool, timing=timing)
+
+    pool.close()
+    service.stop()
+
+def answer_prompts(answers):
+    # Prompts inside an option are answered in order; a job never blocks on a prompt it did not script
+    answers = list(answers)
+
+    def scripted_input(prompt=""):
+        if not answers:
+            raise SystemExit(f"No --input left for prompt: {prompt.strip()}")
+        answer = answers.pop(0)
+        print(f"{prompt}{answer}")
+        return answer
+
+    import builtins
+    builtins.input = scripted_input
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="ZED / DAVIS camera tools. Without a command, shows the menu.")
+    parser.add_argument("--timing", action="store_true", help="Report start-up, import and run times")
+    commands = parser.add_subparsers(dest="command", metavar="command")
+    commands.add_parser("menu", help="Interactive menu (default)")
+    commands.add_parser("list", help="List the options and their command names")
+
+    for option in OPTIONS:
+        sub = commands.add_parser(option.command, aliases=[option.key], help=option.title)
+        sub.add_argument("--input", action="append", default=None, help="Answer for the next prompt (repeatable)")
+        sub.add_argument("--frames", type=int, help="Run without windows and quit after this many loop iterations")
+        if "recording_flag" in option.args:
+            sub.add_argument("--record", action="store_true", help="Record from the first frame")
+        if "output_path" in option.args:
+            sub.add_argument("--output", help="Recording path (default: captured_videos/captured_video_<time>.svo)")
+        if "resolution" in option.args:
+            sub.add_argument("--resolution", choices=["HD2K", "HD1080", "HD720", "VGA"], help="ZED resolution")
+        if "duration" in option.args:
+            sub.add_argument("--duration", type=float, help="Recording length in seconds")
+        if "record_keypoints" in option.args:
+            sub.add_argument("--record-keypoints", action="store_true",
+                             help="Save the body keypoints of the first full pass next to the SVO (<name>.bodies/)")
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command in (None, "menu"):
+        menu(args.timing)
+        return 0
+    if args.command == "list":
+        for option in OPTIONS:
+            print(f"{option.key:>3}  {option.command:<26}{option.title}")
+        return 0
+
+    option = OPTIONS_BY_NAME[args.command]
+    if args.timing:
+        print(f"Start-up {(time.perf_counter() - STARTED) * 1000:.0f} ms, running option {option.key} ({option.command})")
+    if args.input is not None or not sys.stdin.isatty():
+        # Without a terminal (scheduled jobs) an unanswered prompt ends the run instead of blocking it
+        answer_prompts(args.input or [])
+    if args.frames:
+        from camera_feature import headless_runner
+        headless_runner.install_headless_display(args.frames)
+
+    # A single option runs on its own: no camera service or worker pool to start
+    recording_flag = multiprocessing.Value('b', getattr(args, "record", False))
+    settings = {
+        "output_path": getattr(args, "output", None),
+        "resolution": getattr(args, "resolution", None),
+        "duration": getattr(args, "duration", None),
+        "record_keypoints": getattr(args, "record_keypoints", None),
+    }
+    run_option(option, recording_flag, settings=settings, timing=args.timing)
+    return 0
 
 if __name__ == "__main__":
     multiprocessing.set_start_method("spawn")
-    main()
+    sys.exit(main())